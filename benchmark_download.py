@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import sys
+import time
+import socket
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+# Import DustPedia API
+from core import network, progress
+
+# -----------------------------------------------------------------
+
+# Parse arguments
+parser = argparse.ArgumentParser(description="benchmark the CPU cost of streaming a download to disk")
+parser.add_argument("--url", type=str, help="URL of the file to download (default: a file served from a local HTTP server)")
+parser.add_argument("--size", type=int, default=200, help="size of the local test file in MB")
+parser.add_argument("--repeat", type=int, default=3, help="number of repetitions")
+parser.add_argument("--progress", action="store_true", help="show the progress bars (by default they are hidden, for both methods)")
+arguments = parser.parse_args()
+
+# -----------------------------------------------------------------
+
+# CPU time of this process
+cpu_time = time.process_time if hasattr(time, "process_time") else time.clock
+
+# -----------------------------------------------------------------
+
+def legacy_download(url, filepath):
+
+    """
+    This function is the streaming loop with progress bar that was used before (1 KB chunks, flush per chunk).
+    The progress bar is shown or hidden in the same way as in network.write_response, so that only the transfer is compared.
+    :param url:
+    :param filepath:
+    :return:
+    """
+
+    chunk_size = 1024
+    r = network.get_session().get(url, stream=True, timeout=(60,600))
+    with open(filepath, 'wb') as f:
+        total_length = int(r.headers.get('content-length'))
+        for chunk in progress.bar(r.iter_content(chunk_size=chunk_size), expected_size=(total_length / chunk_size) + 1, hide=None):
+            if chunk:
+                f.write(chunk)
+                f.flush()
+
+# -----------------------------------------------------------------
+
+def new_download(url, filepath):
+
+    """
+    This function ...
+    :param url:
+    :param filepath:
+    :return:
+    """
+
+    r = network.get_session().get(url, stream=True, timeout=(60,600))
+    with open(filepath, 'wb') as f: network.write_response(r, f, progress_bar=True)
+
+# -----------------------------------------------------------------
+
+def free_port():
+
+    """
+    This function ...
+    :return:
+    """
+
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+# -----------------------------------------------------------------
+
+temp_path = tempfile.mkdtemp()
+server = None
+
+try:
+
+    # Serve a test file from a local HTTP server (in another process, so that its CPU time is not counted)
+    if arguments.url is None:
+
+        with open(os.path.join(temp_path, "test.fits"), "wb") as f:
+            for _ in range(arguments.size): f.write(os.urandom(1024**2))
+
+        serve_path = os.path.join(temp_path, "serve")
+        os.mkdir(serve_path)
+        os.rename(os.path.join(temp_path, "test.fits"), os.path.join(serve_path, "test.fits"))
+
+        port = free_port()
+        module = "http.server" if sys.version_info[0] >= 3 else "SimpleHTTPServer"
+        with open(os.devnull, "w") as devnull: server = subprocess.Popen([sys.executable, "-m", module, str(port)], cwd=serve_path, stdout=devnull, stderr=devnull)
+        url = "http://127.0.0.1:" + str(port) + "/test.fits"
+
+        # Wait for the server
+        for _ in range(50):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except socket.error: time.sleep(0.1)
+
+    else: url = arguments.url
+
+    # Hide the progress bars (of both methods), unless asked otherwise
+    if not arguments.progress: progress.STREAM = open(os.devnull, "w")
+
+    # Suppress the messages
+    stdout = sys.stdout
+
+    print("")
+    print("{:<10} {:>10} {:>12} {:>14} {:>12}".format("method", "size [MB]", "CPU [s]", "CPU/MB [ms]", "wall [s]"))
+
+    results = dict()
+    for name, function in [("legacy", legacy_download), ("new", new_download)]:
+
+        best = None
+        for index in range(arguments.repeat):
+
+            filepath = os.path.join(temp_path, name + "_" + str(index))
+
+            sys.stdout = open(os.devnull, "w")
+            try:
+                cpu_start, wall_start = cpu_time(), time.time()
+                function(url, filepath)
+                cpu, wall = cpu_time() - cpu_start, time.time() - wall_start
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+            size = os.path.getsize(filepath) / 1024**2
+            os.remove(filepath)
+            if best is None or cpu < best[0]: best = (cpu, wall, size)
+
+        cpu, wall, size = best
+        results[name] = cpu / size
+        print("{:<10} {:>10.1f} {:>12.3f} {:>14.3f} {:>12.3f}".format(name, size, cpu, cpu / size * 1000., wall))
+
+    print("")
+    print("CPU per MB reduced by a factor " + "{:.1f}".format(results["legacy"] / results["new"]))
+    print("")
+
+finally:
+
+    if server is not None: server.terminate()
+    shutil.rmtree(temp_path)
+
+# -----------------------------------------------------------------
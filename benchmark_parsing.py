@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import timeit
+import argparse
+from lxml import html
+
+# Import DustPedia API
+from core import parsing
+
+# -----------------------------------------------------------------
+
+# Parse arguments
+parser = argparse.ArgumentParser(description="benchmark the parsing of saved DustPedia pages")
+parser.add_argument("pages", type=str, nargs='*', help="paths of saved HTML pages")
+parser.add_argument("--save", type=str, help="first download example pages (full-sample print preview, Data and MBB page) to this directory")
+parser.add_argument("--galaxy", type=str, default="NGC3031", help="galaxy for the Data and MBB example pages")
+parser.add_argument("--repeat", type=int, default=20, help="number of repetitions")
+arguments = parser.parse_args()
+
+# -----------------------------------------------------------------
+
+def legacy_info_boxes_and_links(page):
+
+    """
+    This function is the full-tree walk that was used before
+    :param page:
+    :return:
+    """
+
+    tree = html.fromstring(page)
+
+    tables = [e for e in tree.iter() if e.tag == 'table']
+    table = tables[-1]
+
+    table_rows = [e for e in table.iter() if e.tag == 'tr']
+
+    boxes = []
+    links = []
+
+    for row in table_rows[1:]:
+
+        column_index = 0
+
+        for e in row.iter():
+
+            if e.tag != "td": continue
+
+            if column_index == 0: boxes.append(e.text_content())
+            else:
+                for ee in e.iterlinks(): links.append(ee[2])
+
+            column_index += 1
+
+    return boxes, links
+
+# -----------------------------------------------------------------
+
+def info_boxes_and_links(page):
+
+    """
+    This function ...
+    :param page:
+    :return:
+    """
+
+    tree = html.fromstring(page)
+    return parsing.get_info_boxes(tree), parsing.get_links(tree)
+
+# -----------------------------------------------------------------
+
+paths = list(arguments.pages)
+
+# Download example pages
+if arguments.save is not None:
+
+    from core.database import DustPediaDatabase, page_link_from_parameters, print_preview_link, data_link, mbb_link
+
+    if not os.path.isdir(arguments.save): os.makedirs(arguments.save)
+
+    database = DustPediaDatabase()
+    database.session.get(page_link_from_parameters(dict()))
+    search = "?GalaxyName=" + arguments.galaxy + "&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search"
+    pages = [("print_preview.html", print_preview_link), ("data_" + arguments.galaxy + ".html", data_link + search), ("mbb_" + arguments.galaxy + ".html", mbb_link + search)]
+
+    for filename, url in pages:
+        filepath = os.path.join(arguments.save, filename)
+        with open(filepath, "wb") as page_file: page_file.write(database.session.get(url).content)
+        paths.append(filepath)
+
+if len(paths) == 0: parser.error("no pages to benchmark: give paths of saved pages or use --save")
+
+# -----------------------------------------------------------------
+
+print("")
+print("{:<40} {:>8} {:>14} {:>14} {:>9}".format("page", "rows", "legacy [ms]", "parser [ms]", "speedup"))
+
+# Loop over the pages
+for filepath in paths:
+
+    with open(filepath, "rb") as page_file: page = page_file.read()
+
+    # Check that both give the same result
+    boxes, links = info_boxes_and_links(page)
+    legacy_boxes, legacy_links = legacy_info_boxes_and_links(page)
+    if boxes != legacy_boxes or links != legacy_links: print("WARNING: results differ for '" + filepath + "'")
+
+    # Time
+    legacy = min(timeit.repeat(lambda: legacy_info_boxes_and_links(page), number=1, repeat=arguments.repeat)) * 1000.
+    new = min(timeit.repeat(lambda: info_boxes_and_links(page), number=1, repeat=arguments.repeat)) * 1000.
+
+    print("{:<40} {:>8} {:>14.3f} {:>14.3f} {:>8.1f}x".format(os.path.basename(filepath)[:40], len(boxes), legacy, new, legacy / new))
+
+print("")
+
+# -----------------------------------------------------------------
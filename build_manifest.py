@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import argparse
+
+# Import DustPedia API
+from core.database import DustPediaDatabase
+
+# -----------------------------------------------------------------
+
+# Parse arguments
+parser = argparse.ArgumentParser(description="build the image manifest for the DustPedia sample")
+parser.add_argument("galaxies", type=str, nargs='*', help="galaxy names (default: the complete sample)")
+parser.add_argument("--threads", type=int, default=8, help="number of simultaneous page loads")
+parser.add_argument("--refresh", action="store_true", help="also scrape galaxies that are already in the manifest")
+parser.add_argument("--manifest", type=str, help="path of the manifest file")
+arguments = parser.parse_args()
+
+# -----------------------------------------------------------------
+
+# Create the database
+database = DustPediaDatabase(manifest_path=arguments.manifest)
+
+# -----------------------------------------------------------------
+
+# Build the manifest
+galaxy_names = arguments.galaxies if len(arguments.galaxies) > 0 else None
+database.build_manifest(galaxy_names, nthreads=arguments.threads, refresh=arguments.refresh)
+
+# -----------------------------------------------------------------
@@ -8,7 +8,7 @@
 import os
 import os.path
 import zipfile
-import StringIO
+from io import BytesIO
 import shutil
 import gzip
 import bz2
@@ -234,7 +234,7 @@ def openbinary(filepath):
     # otherwise, try a zip archive with the same name as the directory in which the file would have resided
     directory,filename = os.path.split(filepath)
     zippath = directory + ".zip"
-    return StringIO.StringIO(zipfile.ZipFile(zippath,'r').read(filename))
+    return BytesIO(zipfile.ZipFile(zippath,'r').read(filename))
 
 ## This function returns True if the specified file exists at the specified path and/or inside a ZIP archive with
 # the same name as the directory in which the file would have resided, but with the ".zip" extension added.
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# This module requires Python 3 (asyncio) and the aiohttp package
+
+# Import standard modules
+import os
+import os.path
+import time
+import shutil
+import asyncio
+import tempfile
+
+# Import DustPedia modules
+from . import tables, parsing
+from .manifest import ImageManifest, get_image_name
+from .downloader import DownloadResult
+from .database import base_link, data_link, login_link, user_link, all_mmb_results_url, all_cigale_results_url, photometry_urls
+from .database import galaxy_info_keys
+
+# -----------------------------------------------------------------
+
+class AsyncDustPediaDatabase(object):
+
+    """
+    This class is the asyncio counterpart of DustPediaDatabase: one event loop can drive many page loads and downloads
+    at once, with at most 'concurrency' requests in flight.
+    Usage:
+
+        async with AsyncDustPediaDatabase(concurrency=64) as database:
+            urls = await asyncio.gather(*[database.get_image_urls(name) for name in names])
+    """
+
+    def __init__(self, concurrency=32, manifest_path=None, chunk_size=256*1024):
+
+        """
+        The constructor ...
+        :param concurrency: the maximum number of simultaneous requests
+        :param manifest_path:
+        :param chunk_size:
+        """
+
+        # Settings
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+
+        # The index of available images (shared with DustPediaDatabase)
+        self.manifest = ImageManifest(manifest_path)
+
+        # The session and semaphore are created on first use, inside the event loop
+        self._session = None
+        self._semaphore = None
+
+        # The page requests in flight (URL -> task), shared by concurrent callers
+        self._pages = dict()
+
+        # Manifest saves (in a thread, one at a time)
+        self._manifest_lock = None
+        self._manifest_changed = False
+
+        # A flag that states whether we are connected
+        self.connected = False
+
+    # -----------------------------------------------------------------
+
+    @property
+    def session(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Import here to enable this module to be imported without aiohttp
+        import aiohttp
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True))
+        return self._session
+
+    # -----------------------------------------------------------------
+
+    @property
+    def semaphore(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if self._semaphore is None: self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    # -----------------------------------------------------------------
+
+    async def save_manifest(self):
+
+        """
+        This function writes the manifest in a worker thread, so that the event loop is not blocked. Changes made while
+        a save is running are written by one next save (not one per change).
+        :return:
+        """
+
+        if self._manifest_lock is None: self._manifest_lock = asyncio.Lock()
+        self._manifest_changed = True
+
+        async with self._manifest_lock:
+            if not self._manifest_changed: return # saved by another caller in the meantime
+            self._manifest_changed = False
+            await asyncio.get_event_loop().run_in_executor(None, self.manifest.save)
+
+    # -----------------------------------------------------------------
+
+    async def __aenter__(self):
+        return self
+
+    # -----------------------------------------------------------------
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    # -----------------------------------------------------------------
+
+    async def close(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if self._session is not None: await self._session.close()
+        self._session = None
+        self.connected = False
+
+    # -----------------------------------------------------------------
+
+    async def get_page(self, url):
+
+        """
+        This function returns the contents of a page. Concurrent requests for the same page share one request.
+        :param url:
+        :return:
+        """
+
+        task = self._pages.get(url)
+        if task is None:
+            task = self._pages[url] = asyncio.ensure_future(self._get_page(url))
+            task.add_done_callback(lambda _: self._pages.pop(url, None))
+
+        # Shield, so that a cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    # -----------------------------------------------------------------
+
+    async def _get_page(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        async with self.semaphore:
+            async with self.session.get(url) as r:
+                r.raise_for_status()
+                return await r.read()
+
+    # -----------------------------------------------------------------
+
+    async def login(self, username, password):
+
+        """
+        This function ...
+        :param username:
+        :param password:
+        :return:
+        """
+
+        # Inform the user
+        print("Logging in to the DustPedia database ...")
+
+        await self.get_page(user_link)
+        async with self.semaphore:
+            async with self.session.post(login_link, data={'UserName': username, 'password': password}) as r: await r.read()
+
+        # Check login
+        page = await self.get_page(user_link)
+
+        # Check whether the login was successful
+        self.connected = username.encode("utf-8") in page
+
+        # If the login failed, raise an error
+        if not self.connected: raise RuntimeError("Login failed")
+        else: print("Succesfully connected to the DustPedia database")
+
+    # -----------------------------------------------------------------
+
+    async def scrape_image_urls(self, galaxy_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :return:
+        """
+
+        page = await self.get_page(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
+        return [base_link + link for link in parsing.get_links(page)]
+
+    # -----------------------------------------------------------------
+
+    async def get_image_urls(self, galaxy_name, error_maps=True, instrument=None, refresh=False):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param error_maps:
+        :param instrument:
+        :param refresh:
+        :return:
+        """
+
+        # Scrape the Data page only if the galaxy is not yet in the manifest
+        if refresh or not self.manifest.has_galaxy(galaxy_name):
+
+            urls = await self.scrape_image_urls(galaxy_name)
+            self.manifest.set_urls(galaxy_name, urls)
+            await self.save_manifest()
+
+        # Return the URLs
+        return self.manifest.get_urls(galaxy_name, error_maps=error_maps, instrument=instrument)
+
+    # -----------------------------------------------------------------
+
+    async def get_image_url(self, galaxy_name, image_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :return:
+        """
+
+        url = self.manifest.get_url(galaxy_name, image_name) if self.manifest.has_galaxy(galaxy_name) else None
+
+        # Not found: the manifest may be outdated
+        if url is None:
+            await self.get_image_urls(galaxy_name, refresh=True)
+            url = self.manifest.get_url(galaxy_name, image_name)
+
+        if url is None: raise ValueError("Image '" + image_name + "' is not available for galaxy '" + galaxy_name + "'")
+        return url
+
+    # -----------------------------------------------------------------
+
+    async def get_galaxy_info(self, galaxy_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :return:
+        """
+
+        page = await self.get_page(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
+
+        # Parse the info box (of the last row)
+        info = parsing.parse_galaxy_info(parsing.get_info_boxes(page)[-1])
+
+        # Create the table (same columns as DustPediaDatabase.get_galaxy_info)
+        names = ["Name", "RA", "DEC", "Hubble Stage", "Hubble Type", "V", "D25", "Inclination"]
+        data = [[info[key]] for key in galaxy_info_keys]
+        return tables.new(data, names)
+
+    # -----------------------------------------------------------------
+
+    async def download_file(self, url, path, new_name=None, overwrite=False):
+
+        """
+        This function ...
+        :param url:
+        :param path:
+        :param new_name:
+        :param overwrite:
+        :return:
+        """
+
+        # Determine the local path to the file
+        filename = new_name if new_name is not None else os.path.basename(url)
+        filepath = os.path.join(path, filename) if os.path.isdir(path) else path
+
+        # Check filepath
+        if os.path.isfile(filepath):
+            if overwrite: os.remove(filepath)
+            else: raise IOError("File is already present: " + filepath)
+
+        # Stream to a '.part' file that is moved in place when complete (the disk writes in the executor, so that
+        # they don't block the event loop)
+        loop = asyncio.get_event_loop()
+        part_path = filepath + ".part"
+        try:
+            async with self.semaphore:
+                async with self.session.get(url) as r:
+                    r.raise_for_status()
+                    f = await loop.run_in_executor(None, open, part_path, 'wb')
+                    try:
+                        async for chunk in r.content.iter_chunked(self.chunk_size): await loop.run_in_executor(None, f.write, chunk)
+                    finally: await loop.run_in_executor(None, f.close)
+        except BaseException: # also when the task is cancelled
+            if os.path.isfile(part_path): os.remove(part_path)
+            raise
+        await loop.run_in_executor(None, os.rename, part_path, filepath)
+
+        # Return the file path
+        return filepath
+
+    # -----------------------------------------------------------------
+
+    async def download_files(self, urls, filepaths):
+
+        """
+        This function downloads many files concurrently: a failed file does not cancel the others
+        :param urls:
+        :param filepaths: the local path (or directory) for each URL
+        :return: a DownloadResult
+        """
+
+        # Download, collect the outcome of every file
+        start = time.time()
+        outcomes = await asyncio.gather(*[self.download_file(url, filepath) for url, filepath in zip(urls, filepaths)], return_exceptions=True)
+
+        # Fill the result (in the order of the URLs)
+        result = DownloadResult()
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, Exception): result.failed[url] = outcome
+            elif isinstance(outcome, BaseException): raise outcome # cancellation, interrupt
+            else: result.succeeded[url] = outcome
+        result.elapsed = time.time() - start
+
+        # Return the result
+        return result
+
+    # -----------------------------------------------------------------
+
+    async def download_image(self, galaxy_name, image_name, path):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :param path:
+        :return:
+        """
+
+        url = await self.get_image_url(galaxy_name, image_name)
+        filepath = os.path.join(path, image_name) if os.path.isdir(path) else path
+        return await self.download_file(url, filepath)
+
+    # -----------------------------------------------------------------
+
+    async def download_images(self, galaxy_name, path, error_maps=True, instrument=None):
+
+        """
+        This function downloads all images of a galaxy concurrently
+        :param galaxy_name:
+        :param path: directory
+        :param error_maps:
+        :param instrument:
+        :return:
+        """
+
+        urls = await self.get_image_urls(galaxy_name, error_maps=error_maps, instrument=instrument)
+        result = await self.download_files(urls, [os.path.join(path, get_image_name(url)) for url in urls])
+        result.raise_on_failure()
+        return result.paths
+
+    # -----------------------------------------------------------------
+
+    async def download_dust_black_body_table(self, path):
+
+        """
+        This function ...
+        :param path:
+        :return:
+        """
+
+        return await self.download_file(all_mmb_results_url, path)
+
+    # -----------------------------------------------------------------
+
+    async def download_cigale_table(self, path):
+
+        """
+        This function ...
+        :param path:
+        :return:
+        """
+
+        return await self.download_file(all_cigale_results_url, path)
+
+    # -----------------------------------------------------------------
+
+    async def _get_table(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        temp_path = tempfile.mkdtemp()
+        try:
+            filepath = await self.download_file(url, temp_path)
+            return tables.from_file(filepath, format="ascii")
+        finally: shutil.rmtree(temp_path)
+
+    # -----------------------------------------------------------------
+
+    async def get_dust_black_body_table(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return await self._get_table(all_mmb_results_url)
+
+    # -----------------------------------------------------------------
+
+    async def get_cigale_table(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return await self._get_table(all_cigale_results_url)
+
+    # -----------------------------------------------------------------
+
+    async def download_photometry(self, dir_path):
+
+        """
+        This function ...
+        :param dir_path:
+        :return:
+        """
+
+        result = await self.download_files(photometry_urls, [dir_path] * len(photometry_urls))
+        result.raise_on_failure()
+        return result.paths
+
+# -----------------------------------------------------------------
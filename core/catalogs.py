@@ -8,26 +8,32 @@
 from __future__ import absolute_import, division, print_function
 
 # Import standard modules
-import requests
 from lxml import html
 
+# Import DustPedia modules
+from . import network
+
 # -----------------------------------------------------------------
 
 leda_search_object_url = "http://leda.univ-lyon1.fr/ledacat.cgi?"
 
 # -----------------------------------------------------------------
 
-def get_hyperleda_name(galaxy_name):
+def get_hyperleda_name(galaxy_name, session=None):
 
     """
     This function ...
     :param galaxy_name:
+    :param session: the session for the lookup (default: the session of this thread from the default pool)
     :return:
     """
 
     url = leda_search_object_url + galaxy_name
 
-    page_as_string = requests.get(url).content
+    # Use the session of this thread from the pool
+    if session is None: session = network.get_session()
+
+    page_as_string = session.get(url).content
 
     tree = html.fromstring(page_as_string)
 
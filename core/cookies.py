@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import os.path
+import json
+import time
+import threading
+
+# Import DustPedia modules
+from .paths import user_path, create_user_directory
+
+# -----------------------------------------------------------------
+
+# The default location of the session store
+session_store_path = os.path.join(user_path, "sessions.json")
+
+# -----------------------------------------------------------------
+
+def cookies_to_list(jar):
+
+    """
+    This function ...
+    :param jar:
+    :return:
+    """
+
+    cookies = []
+    for cookie in jar:
+        cookies.append({"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path,
+                        "secure": cookie.secure, "expires": cookie.expires})
+    return cookies
+
+# -----------------------------------------------------------------
+
+def add_cookies(jar, cookies):
+
+    """
+    This function ...
+    :param jar:
+    :param cookies:
+    :return:
+    """
+
+    for cookie in cookies: jar.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"], secure=cookie["secure"], expires=cookie["expires"])
+
+# -----------------------------------------------------------------
+
+class SessionStore(object):
+
+    """
+    This class keeps the cookies of authenticated sessions on disk (readable only by the user),
+    so that later processes can reuse a login instead of logging in again
+    """
+
+    def __init__(self, path=None, max_age=24*3600):
+
+        """
+        The constructor ...
+        :param path:
+        :param max_age: stored sessions older than this (in seconds) are not reused
+        """
+
+        # The path of the store
+        self.path = path if path is not None else session_store_path
+
+        # The maximum age
+        self.max_age = max_age
+
+        # Lock for access from multiple threads
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    def _read(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if not os.path.isfile(self.path): return dict()
+        try:
+            with open(self.path, "r") as store_file: return json.load(store_file)
+        except ValueError: return dict() # corrupt store
+
+    # -----------------------------------------------------------------
+
+    def _write(self, sessions):
+
+        """
+        This function ...
+        :param sessions:
+        :return:
+        """
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory): create_user_directory(directory)
+
+        # Write to a temporary file that only the user can read, then move it in place
+        temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+        descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as store_file: json.dump(sessions, store_file)
+        os.rename(temp_path, self.path)
+
+    # -----------------------------------------------------------------
+
+    def load(self, username):
+
+        """
+        This function returns the stored cookies for the user, or None if there is no valid stored session
+        :param username:
+        :return:
+        """
+
+        with self._lock: entry = self._read().get(username)
+        if entry is None: return None
+
+        # Check the age
+        if time.time() - entry["time"] > self.max_age: return None
+
+        # Check whether any of the cookies has expired
+        now = time.time()
+        for cookie in entry["cookies"]:
+            if cookie["expires"] is not None and cookie["expires"] < now: return None
+
+        # Return the cookies
+        return entry["cookies"]
+
+    # -----------------------------------------------------------------
+
+    def save(self, username, jar):
+
+        """
+        This function ...
+        :param username:
+        :param jar:
+        :return:
+        """
+
+        with self._lock:
+            sessions = self._read()
+            sessions[username] = {"time": time.time(), "cookies": cookies_to_list(jar)}
+            self._write(sessions)
+
+    # -----------------------------------------------------------------
+
+    def remove(self, username):
+
+        """
+        This function ...
+        :param username:
+        :return:
+        """
+
+        with self._lock:
+            sessions = self._read()
+            if sessions.pop(username, None) is not None: self._write(sessions)
+
+# -----------------------------------------------------------------
@@ -9,19 +9,29 @@ from __future__ import absolute_import, division, print_function
 
 # Import standard modules
 import shutil
+import threading
 import requests
-from lxml import html
+import numpy as np
+from multiprocessing.pool import ThreadPool
 import os.path
 from collections import OrderedDict
 
 # Import astronomical modules
+from astropy.io import fits
 from astropy.io.fits import getheader
 from astropy.wcs import WCS
 from astropy.units import Unit
 
 # Import other DustPedia modules
-from . import network, tables, types
-from .utils import lazyproperty
+from . import network, tables, types, progress, parsing
+from .utils import lazyproperty, SingleFlight
+from .manifest import ImageManifest, get_image_name
+from .cookies import SessionStore, add_cookies
+from .paths import create_user_directory
+from .endpoints import EndpointRegistry, get_environment_mirrors
+from .downloader import DownloadEngine
+from .imagecache import ImageCache
+from .jobs import JobJournal
 
 # -----------------------------------------------------------------
 
@@ -62,6 +72,29 @@ all_cigale_results_url = "http://dustpedia.astro.noa.gr/Content/tempFiles/cigale
 
 # -----------------------------------------------------------------
 
+# main photometry, IRAS and Planck photometry
+photometry_urls = ["http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_Aperture_Photometry.csv",
+                   "http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_IRAS_SCANPI.csv",
+                   "http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_Planck_CCS2.csv"]
+
+# -----------------------------------------------------------------
+
+# The number of galaxies in the DustPedia sample
+sample_size = 876
+
+# The columns of the galaxies tables, and the corresponding keys of the parsed info boxes
+galaxy_column_names = ["Name", "RA", "DEC", "Hubble stage", "Hubble type", "V", "D25", "Inclination"]
+galaxy_info_keys = ["name", "ra", "dec", "stage", "type", "v", "d25", "inclination"]
+galaxy_string_columns = ["Name", "Hubble type"]
+
+# The MBB parameters: name, column in the MBB table, unit
+black_body_parameters = [("dust_temperature", "Tdust__K", "K"), ("dust_temperature_error", "Tdust_err", "K"),
+                         ("dust_luminosity", "Ldust__Lo", "Lsun"), ("dust_luminosity_error", "Ldust_err", "Lsun"),
+                         ("dust_mass", "Mdust__Mo", "Msun"), ("dust_mass_error", "Mdust_err", "Msun"),
+                         ("chi_squared", "nchi2", None)]
+
+# -----------------------------------------------------------------
+
 def create_temp_dir(name):
 
     """
@@ -89,48 +122,217 @@ class DustPediaDatabase(object):
     This class ...
     """
 
-    def __init__(self):
+    def __init__(self, manifest_path=None, pool_size=10, session_store_path=None, catalog_path=None, http_cache=None,
+                 mirrors=None, image_cache=True):
 
         """
         The constructor ...
+        :param manifest_path:
+        :param pool_size: the number of connections kept alive per host
+        :param session_store_path:
+        :param catalog_path: directory where the MBB, CIGALE and photometry catalogs are kept
+        :param http_cache: True (for the default cache) or a ResponseCache, to serve repeated page requests locally
+        :param mirrors: base URLs of mirrors of the archive, or an EndpointRegistry (default: the DUSTPEDIA_MIRRORS environment variable)
+        :param image_cache: True (for the default cache), an ImageCache, or False to always download the images.
+        The default cache is kept in the user directory and takes up to 10 GB; images that are saved elsewhere are
+        copied out of it (pass ImageCache(link=True) to hard-link them instead, or False to download them directly).
         :return:
         """
 
         # Determine the path to a temporary directory
         self.temp_path = create_temp_dir("_tmp_database")
 
-        # Create the session
-        self.session = requests.session()
+        # Determine the path to the catalog cache
+        self.catalog_path = catalog_path if catalog_path is not None else create_user_directory("catalogs")
+        if not os.path.isdir(self.catalog_path): os.makedirs(self.catalog_path)
+
+        # The index of available images
+        self.manifest = ImageManifest(manifest_path)
+
+        # The response cache
+        if http_cache is True:
+            from .httpcache import ResponseCache
+            http_cache = ResponseCache()
+        self.http_cache = http_cache if http_cache else None
+
+        # The cache of downloaded images
+        if image_cache is True: image_cache = ImageCache()
+        self.image_cache = image_cache if image_cache else None
+
+        # The mirrors of the archive
+        if mirrors is None: mirrors = get_environment_mirrors()
+        if mirrors and not isinstance(mirrors, EndpointRegistry): mirrors = EndpointRegistry(mirrors)
+        self.endpoints = mirrors if mirrors else None
+
+        # Create the pool of sessions (one per thread, sharing connections and cookies)
+        self.pool = network.SessionPool(pool_size=pool_size, cache=self.http_cache, endpoints=self.endpoints)
+
+        # Identical page requests and catalog downloads from different threads are done only once
+        self.flights = SingleFlight()
+
+        # The print preview shows the results of the last search in the (shared) server session,
+        # so a search and its print preview must not be interleaved with another search
+        self._search_lock = threading.Lock()
 
         # A flag that states whether we are connected
         self.connected = False
 
+        # The store of authenticated sessions
+        self.session_store = SessionStore(session_store_path)
+
+    # -----------------------------------------------------------------
+
+    def is_logged_in(self, username):
+
+        """
+        This function checks on the user page whether the current session is logged in
+        :param username:
+        :return:
+        """
+
+        r = self.session.get(user_link)
+        return username in r.text
+
     # -----------------------------------------------------------------
 
-    def login(self, username, password):
+    def login(self, username, password, reuse=True):
 
         """
         This function ...
         :param username:
         :param password:
+        :param reuse: reuse a stored session of an earlier login if it is still valid
         :return:
         """
 
-        # Inform the user
-        print("Logging in to the DustPedia database ...")
+        # The login and the checks of the user page depend on the server-side session: use one endpoint for all
+        with self.pool.bound():
 
-        r = self.session.get(user_link)
-        p = self.session.post(login_link, {'UserName': username, 'password': password})
+            # Try the stored session
+            if reuse:
 
-        # Check login
-        r = self.session.get(user_link)
+                cookies = self.session_store.load(username)
+                if cookies is not None:
+
+                    add_cookies(self.pool.cookies, cookies)
+
+                    # Check whether the session is still valid
+                    if self.is_logged_in(username):
+                        self.connected = True
+                        print("Reusing the stored session for the DustPedia database")
+                        return
+
+                    # Not valid anymore
+                    self.pool.cookies.clear()
+                    self.session_store.remove(username)
+
+            # Inform the user
+            print("Logging in to the DustPedia database ...")
+
+            r = self.session.get(user_link)
+            p = self.session.post(login_link, {'UserName': username, 'password': password})
+
+            # Check whether the login was successful
+            self.connected = self.is_logged_in(username)
+
+            # If the login failed, raise an error
+            if not self.connected: raise RuntimeError("Login failed")
+            else: print("Succesfully connected to the DustPedia database")
+
+        # Store the session for later processes
+        self.session_store.save(username, self.pool.cookies)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def session(self):
+
+        """
+        This function returns the session for the current thread
+        :return:
+        """
+
+        return self.pool.session
+
+    # -----------------------------------------------------------------
+
+    def resolve_name(self, galaxy_name):
+
+        """
+        This function returns the HyperLEDA name of a galaxy in the DustPedia sample (looked up with the session of
+        this database, so that the lookup is answered from the response cache when it is enabled)
+        :param galaxy_name:
+        :return:
+        """
+
+        # Import here to avoid loading the sample table when it is not needed
+        from .sample import resolve_name
+        return resolve_name(galaxy_name, session=self.session)
+
+    # -----------------------------------------------------------------
+
+    def get_page(self, url):
+
+        """
+        This function returns the contents of a page. Concurrent requests for the same page share one request.
+        :param url:
+        :return:
+        """
+
+        return self.flights.do(("page", url), self._get_page, url)
+
+    # -----------------------------------------------------------------
+
+    def _get_page(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        return self.session.get(url).content
+
+    # -----------------------------------------------------------------
+
+    def get_search_results(self, link):
+
+        """
+        This function does a search and returns the contents of its print preview page.
+        Concurrent requests for the same search share one search and print preview request.
+        :param link:
+        :return:
+        """
+
+        return self.flights.do(("search", link), self._get_search_results, link)
+
+    # -----------------------------------------------------------------
+
+    def _get_search_results(self, link):
+
+        """
+        This function ...
+        :param link:
+        :return:
+        """
 
-        # Check whether the login was successful
-        self.connected = username in r.content
+        # The print preview shows the last search of the server-side session: use the same endpoint for both
+        with self._search_lock, self.pool.bound():
+            self.session.get(link)
+            return self.session.get(print_preview_link).content
 
-        # If the login failed, raise an error
-        if not self.connected: raise RuntimeError("Login failed")
-        else: print("Succesfully connected to the DustPedia database")
+    # -----------------------------------------------------------------
+
+    def update_catalog(self, url):
+
+        """
+        This function brings the cached copy of a catalog up to date and returns its path.
+        Concurrent requests for the same catalog share one download.
+        :param url:
+        :return:
+        """
+
+        return self.flights.do(("catalog", url), network.download_file_if_modified, url, self.catalog_path, session=self.session)
 
     # -----------------------------------------------------------------
 
@@ -166,8 +368,8 @@ class DustPediaDatabase(object):
         # Logout
         self.logout()
 
-        # Create new session
-        self.session = requests.session()
+        # Create new sessions
+        self.pool.reset()
 
         # Login
         self.login(username, password)
@@ -185,7 +387,7 @@ class DustPediaDatabase(object):
         print("Logging out from the DustPedia database ...")
 
         # Disconnect
-        if self.connected: self.session.close()
+        if self.connected: self.pool.close()
 
     # -----------------------------------------------------------------
 
@@ -204,219 +406,256 @@ class DustPediaDatabase(object):
 
     # -----------------------------------------------------------------
 
-    def get_galaxy_names(self, parameters):
+    @lazyproperty
+    def query_engine(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        from .query import LocalQueryEngine
+        return LocalQueryEngine()
+
+    # -----------------------------------------------------------------
+
+    def get_galaxy_names(self, parameters, local=False):
 
         """
         This function ...
         :param parameters:
+        :param local: select from the bundled LEDAWISE table instead of querying the archive
         :return:
         """
 
         # Inform the user
         print("Getting the galaxy names ...")
 
-        link = page_link_from_parameters(parameters)
-
-        r = self.session.get(link)
-        r = self.session.get(print_preview_link)
+        # Local query
+        if local: return self.query_engine.get_galaxy_names(parameters)
 
-        page_as_string = r.content
+        link = page_link_from_parameters(parameters)
 
-        tree = html.fromstring(page_as_string)
+        page = self.get_search_results(link)
 
-        tables = [e for e in tree.iter() if e.tag == 'table']
-        table = tables[-1]
+        # Get the names from the info boxes
+        return parsing.get_galaxy_names(page)
 
-        table_rows = [e for e in table.iter() if e.tag == 'tr']
-        column_headings = [e.text_content() for e in table_rows[0].iter() if e.tag == 'th']
+    # -----------------------------------------------------------------
 
-        galaxy_names = []
+    def iter_galaxies(self, parameters):
 
-        for row in table_rows[1:]:
+        """
+        This function yields the info of each galaxy (as a dictionary) while the print preview page is being read
+        :param parameters:
+        :return:
+        """
 
-            column_index = 0
+        link = page_link_from_parameters(parameters)
 
-            for e in row.iter():
+        # Search, and start reading the print preview
+        with self._search_lock, self.pool.bound():
+            self.session.get(link)
+            r = self.session.get(print_preview_link, stream=True)
+        r.raw.decode_content = True
 
-                if e.tag != "td": continue
+        try:
 
-                galaxy_info = e.text_content()
+            # Loop over the info boxes as they come in
+            for box in parsing.iter_info_boxes(r.raw):
 
-                galaxy_name = galaxy_info.split("Name: ")[1].split(" \r\n")[0]
-                galaxy_names.append(galaxy_name)
-                break
+                # Parse
+                info = parsing.parse_galaxy_info(box)
+                if add_hubble_type(info["type"], parameters): yield info
 
-        return galaxy_names
+        # Release the connection, also when the caller stops early
+        finally: r.close()
 
     # -----------------------------------------------------------------
 
-    def get_galaxies(self, parameters):
+    def get_galaxies(self, parameters, local=False):
 
         """
         This function ...
         :param parameters:
+        :param local: select from the bundled LEDAWISE table instead of querying the archive
         :return:
         """
 
-        name_column = []
-        ra_column = []
-        dec_column = []
-        stage_column = []
-        type_column = []
-        v_column = []
-        d25_column = []
-        i_column = []
-
-        link = page_link_from_parameters(parameters)
-
-        r = self.session.get(link)
-        r = self.session.get(print_preview_link)
-
-        page_as_string = r.content
+        # Local query
+        if local: return self.query_engine.get_galaxies(parameters)
 
-        tree = html.fromstring(page_as_string)
+        # Initialize the columns
+        data = [[] for _ in galaxy_column_names]
 
-        page_tables = [e for e in tree.iter() if e.tag == 'table']
-        table = page_tables[-1]
+        # Add the galaxies
+        for info in self.iter_galaxies(parameters):
+            for column, key in zip(data, galaxy_info_keys): column.append(info[key])
 
-        table_rows = [e for e in table.iter() if e.tag == 'tr']
-        column_headings = [e.text_content() for e in table_rows[0].iter() if e.tag == 'th']
+        # Create the table
+        table = tables.new(data, galaxy_column_names)
 
-        info_boxes = []
+        return table
 
-        for row in table_rows[1:]:
+    # -----------------------------------------------------------------
 
-            column_index = 0
+    def get_galaxies_columns(self, parameters, capacity=sample_size):
 
-            for e in row.iter():
+        """
+        This function fills preallocated NumPy arrays with the info of the galaxies while the print preview page is being read.
+        Missing values are NaN (real columns) or None (string columns).
+        :param parameters:
+        :param capacity: the initial length of the arrays (grown when exceeded)
+        :return: ordered dictionary of column name -> array
+        """
 
-                if e.tag != "td": continue
+        # Preallocate the arrays
+        columns = OrderedDict()
+        for name in galaxy_column_names:
+            if name in galaxy_string_columns: columns[name] = np.empty(capacity, dtype=object)
+            else: columns[name] = np.full(capacity, np.nan)
 
-                galaxy_info = e.text_content()
+        # Fill
+        count = 0
+        for info in self.iter_galaxies(parameters):
 
-                #galaxy_name = galaxy_info.split("Name: ")[1].split(" \r\n")[0]
-                #galaxy_names.append(galaxy_name)
-                info_boxes.append(galaxy_info)
-                break
+            # Grow the arrays
+            if count == len(columns["Name"]):
+                for name in galaxy_column_names:
+                    extra = np.empty(max(count, 1), dtype=object) if name in galaxy_string_columns else np.full(max(count, 1), np.nan)
+                    columns[name] = np.concatenate((columns[name], extra))
 
-        for box in info_boxes:
+            # Set the values
+            for name, key in zip(galaxy_column_names, galaxy_info_keys):
+                value = info[key]
+                if value is not None: columns[name][count] = value
 
-            lines = box.split("\r\n")
+            count += 1
 
-            name = None
-            ra = None
-            dec = None
-            stage = None
-            type = None
-            v = None
-            d25 = None
-            i = None
+        # Return the filled part of the arrays
+        for name in galaxy_column_names: columns[name] = columns[name][:count]
+        return columns
 
-            for line in lines:
+    # -----------------------------------------------------------------
 
-                if "Name" in line: name = line.split(": ")[1].strip()
-                elif "RA(2000)" in line: ra = float(line.split(": ")[1])
-                elif "DEC(2000)" in line: dec = float(line.split(": ")[1])
-                elif "Hubble Stage(T)" in line: stage = float(line.split(": ")[1])
-                elif "Hubble Type: Sab" in line: type = line.split(": ")[1].strip()
-                elif "V (km/s)" in line: v = float(line.split(": ")[1])
-                elif "D25 (arcmin)" in line: d25 = float(line.split(": ")[1])
-                elif "Inclination (deg.)" in line: i = float(line.split(": ")[1])
+    def get_image_urls(self, galaxy_name, error_maps=True, instrument=None, refresh=False):
 
-            if add_hubble_type(type, parameters):
+        """
+        This function ...
+        :param galaxy_name:
+        :param error_maps:
+        :param instrument:
+        :param refresh: scrape the Data page again even if the galaxy is in the manifest
+        :return:
+        """
 
-                name_column.append(name)
-                ra_column.append(ra)
-                dec_column.append(dec)
-                stage_column.append(stage)
-                type_column.append(type)
-                v_column.append(v)
-                d25_column.append(d25)
-                i_column.append(i)
+        # Scrape the Data page only if the galaxy is not yet in the manifest
+        if refresh or not self.manifest.has_galaxy(galaxy_name):
 
-        # Create the table
-        names = ["Name", "RA", "DEC", "Hubble stage", "Hubble type", "V", "D25", "Inclination"]
-        data = [name_column, ra_column, dec_column, stage_column, type_column, v_column, d25_column, i_column]
-        table = tables.new(data, names)
+            # Scrape and add to the manifest
+            urls = self.scrape_image_urls(galaxy_name)
+            self.manifest.set_urls(galaxy_name, urls)
+            self.manifest.save()
 
-        return table
+        # Return the URLs
+        return self.manifest.get_urls(galaxy_name, error_maps=error_maps, instrument=instrument)
 
     # -----------------------------------------------------------------
 
-    def get_image_urls(self, galaxy_name, error_maps=True):
+    def scrape_image_urls(self, galaxy_name, verbose=True):
 
         """
-        This function ...
+        This function gets the URLs of all images (including error maps) from the Data page of the galaxy
         :param galaxy_name:
-        :param error_maps:
+        :param verbose:
         :return:
         """
 
         # Inform the user
-        print("Getting the URLs of the available images for galaxy '" + galaxy_name + "' ...")
+        if verbose: print("Getting the URLs of the available images for galaxy '" + galaxy_name + "' ...")
 
         # Go to the page
-        r = self.session.get(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
-
-        page_as_string = r.content
-
-        tree = html.fromstring(page_as_string)
+        page = self.get_page(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
 
-        tables = [ e for e in tree.iter() if e.tag == 'table']
-        table = tables[-1]
+        # Get the links
+        return [base_link + link for link in parsing.get_links(page)]
 
-        table_rows = [ e for e in table.iter() if e.tag == 'tr']
-        column_headings = [ e.text_content() for e in table_rows[0].iter() if e.tag == 'th']
+    # -----------------------------------------------------------------
 
-        galaxy_info = None
-        image_links = []
+    def build_manifest(self, galaxy_names=None, nthreads=8, refresh=False, progress_bar=True):
 
-        for row in table_rows[1:]:
+        """
+        This function scrapes the Data pages of many galaxies in parallel and writes the complete image manifest
+        :param galaxy_names: default is the complete DustPedia sample
+        :param nthreads: the number of simultaneous page loads
+        :param refresh: also scrape galaxies that are already in the manifest
+        :param progress_bar:
+        :return: the names of the galaxies for which scraping failed
+        """
 
-            column_index = 0
+        from .sample import DustPediaSample
 
-            #row_content = []
+        # Get the galaxy names
+        if galaxy_names is None: galaxy_names = DustPediaSample().get_names()
+        if not refresh: galaxy_names = [name for name in galaxy_names if not self.manifest.has_galaxy(name)]
 
-            for e in row.iter():
+        # Inform the user
+        print("Building the image manifest for " + str(len(galaxy_names)) + " galaxies with " + str(nthreads) + " threads ...")
 
-                if e.tag != "td": continue
+        # Scrape one galaxy (each thread uses its own session from the pool)
+        def scrape(galaxy_name):
+            try: return galaxy_name, self.scrape_image_urls(galaxy_name, verbose=False), None
+            except Exception as e: return galaxy_name, None, e
 
-                if column_index == 0:
+        failed = []
 
-                    galaxy_info = e.text_content()
+        # Scrape the pages, add the results to the manifest as they come in
+        pool = ThreadPool(nthreads)
+        try:
+            with progress.Bar(label="Scraping ", expected_size=max(len(galaxy_names), 1), hide=None if progress_bar else True) as bar:
+                for index, (galaxy_name, urls, error) in enumerate(pool.imap_unordered(scrape, galaxy_names)):
+                    if error is not None: failed.append(galaxy_name)
+                    else: self.manifest.set_urls(galaxy_name, urls)
+                    bar.show(index + 1)
+        finally:
+            pool.close()
+            pool.join()
 
-                else:
+        # Write the manifest once
+        self.manifest.save()
 
-                    #print("CHILDREN")
-                    #for ee in e.iterchildren(): print(ee)
-                    #print()
-                    #print("DESCENDANTS")
-                    #for ee in e.iterdescendants(): print(ee)
-                    #print()
-                    #print("LINKS")
-                    for ee in e.iterlinks():
+        # Report
+        print("Added " + str(len(galaxy_names) - len(failed)) + " galaxies to the image manifest")
+        if len(failed) > 0: print("Failed for " + str(len(failed)) + " galaxies: " + ", ".join(failed))
 
-                        link = base_link + ee[2]
+        # Return the failed galaxies
+        return failed
 
-                        name = os.path.basename(link)
-                        if "_Error" in name and not error_maps: continue
+    # -----------------------------------------------------------------
 
-                        image_links.append(link)
+    def get_image_url(self, galaxy_name, image_name):
 
-                    #print()
-                    #print("SIBLINGS")
-                    #for ee in e.itersiblings(): print(ee)
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :return:
+        """
 
-                column_index += 1
+        # Look in the manifest
+        url = self.manifest.get_url(galaxy_name, image_name) if self.manifest.has_galaxy(galaxy_name) else None
 
-        # Request other page
-        #r = self.session.get(user_link)
+        # Not found: the manifest may be outdated
+        if url is None:
 
-        #self.session.prepare_request()
+            self.get_image_urls(galaxy_name, refresh=True)
+            url = self.manifest.get_url(galaxy_name, image_name)
 
-        #print(image_links)
+        # Still not found
+        if url is None: raise ValueError("Image '" + image_name + "' is not available for galaxy '" + galaxy_name + "'")
 
-        return image_links
+        # Return the URL
+        return url
 
     # -----------------------------------------------------------------
 
@@ -432,17 +671,11 @@ class DustPediaDatabase(object):
         # Inform the user
         print("Getting the names of the images that are available for galaxy '" + galaxy_name + "' ...")
 
-        # Example link: http://dustpedia.astro.noa.gr/Data/GetImage?imageName=NGC3031_Planck_10600.fits&instrument=Planck
-
-        names = []
-
-        for url in self.get_image_urls(galaxy_name):
+        # Make sure the galaxy is in the manifest
+        if not self.manifest.has_galaxy(galaxy_name): self.get_image_urls(galaxy_name)
 
-            name = url.split("imageName=")[1].split("&instrument")[0]
-            if "_Error" in name and not error_maps: continue
-            names.append(name)
-
-        return names
+        # Return the names
+        return self.manifest.get_names(galaxy_name, error_maps=error_maps)
 
     # -----------------------------------------------------------------
 
@@ -459,10 +692,9 @@ class DustPediaDatabase(object):
         urls = dict()
 
         # Loop over all the urls
-        for url in self.get_image_urls(galaxy_name):
+        for url in self.get_image_urls(galaxy_name, error_maps=error_maps):
 
-            name = url.split("imageName=")[1].split("&instrument")[0]
-            if "_Error" in name and not error_maps: continue
+            name = get_image_name(url)
             urls[name] = url
 
         # Return the dictionary of urls
@@ -476,30 +708,58 @@ class DustPediaDatabase(object):
         This function ...
         :param galaxy_name:
         :param image_name:
-        :param path
+        :param path: directory for the temporary file, for images that are too large to be kept in memory
         :return:
         """
 
         # Inform the user
         print("Getting the header for the '" + image_name + "' for galaxy '" + galaxy_name + "' ...")
 
-        # Determine a temporary path for the image file
-        local_path = os.path.join(path, image_name)
-
-        # Download the image to the temporary directory
-        self.download_image(galaxy_name, image_name, local_path)
+        # Open the image (from the image cache or in memory)
+        hdulist = self.open_image(galaxy_name, image_name, spill_path=path)
 
-        # Load the header
-        header = getheader(local_path)
-
-        # Remove again
-        os.remove(local_path)
+        # Get the header
+        try: header = hdulist[0].header.copy()
+        finally: hdulist.close()
 
         # Return the header
         return header
 
     # -----------------------------------------------------------------
 
+    def open_image(self, galaxy_name, image_name, max_memory=512*1024**2, spill_path=None, progress_bar=False):
+
+        """
+        This function opens an image without saving it: an image that is in the image cache is opened from there,
+        other images are downloaded into memory (or into a temporary file when they are larger than max_memory)
+        :param galaxy_name:
+        :param image_name:
+        :param max_memory: the maximum size (in bytes) of an image that is kept in memory (None for no maximum)
+        :param spill_path: the directory for the temporary file (default: the system temporary directory)
+        :param progress_bar:
+        :return: the HDUList (close it to release the memory or remove the temporary file)
+        """
+
+        # From the image cache
+        if self.image_cache is not None and self.image_cache.has_image(image_name):
+            filepath = self.image_cache.get(image_name)
+            if filepath is not None: return fits.open(filepath)
+
+        # Inform the user
+        print("Loading the image '" + image_name + "' for galaxy '" + galaxy_name + "' ...")
+
+        # Download into memory
+        url = self.get_image_url(galaxy_name, image_name)
+        fileobj = network.fetch_buffer(url, session=self.session, max_memory=max_memory, spill_path=spill_path, progress_bar=progress_bar)
+
+        # Open
+        try: return fits.open(fileobj)
+        except Exception:
+            fileobj.close()
+            raise
+
+    # -----------------------------------------------------------------
+
     def get_wcs(self, galaxy_name, image_name, path):
 
         """
@@ -535,38 +795,100 @@ class DustPediaDatabase(object):
 
     # -----------------------------------------------------------------
 
-    def download_image(self, galaxy_name, image_name, path, progress_bar=True):
+    def get_cached_image(self, galaxy_name, image_name, progress_bar=False, segments=1):
+
+        """
+        This function returns the path of the image in the image cache, downloading it first if it is not cached
+        :param galaxy_name:
+        :param image_name:
+        :param progress_bar:
+        :param segments:
+        :return:
+        """
+
+        # Cached
+        if self.image_cache.has_image(image_name):
+            filepath = self.image_cache.get(image_name)
+            if filepath is not None: return filepath
+
+        # Download (once, when several threads ask for the same image)
+        url = self.get_image_url(galaxy_name, image_name)
+        return self.flights.do(("image", image_name), self.image_cache.fetch, image_name, url, session=self.session, progress_bar=progress_bar, segments=segments, pool=self.pool)
+
+    # -----------------------------------------------------------------
+
+    def copy_cached_image(self, galaxy_name, image_name, filepath, progress_bar=False, segments=1):
 
         """
         This function ...
         :param galaxy_name:
         :param image_name:
-        :param path:
+        :param filepath:
         :param progress_bar:
+        :param segments:
         :return:
         """
 
-        # Inform the user
-        print("Downloading the image '" + image_name + "' for galaxy '" + galaxy_name + "' to '" + path + " ...")
+        # Check filepath
+        if os.path.isfile(filepath): raise IOError("File is already present: " + filepath)
+
+        # Copy from the cache
+        fetch = lambda: self.get_cached_image(galaxy_name, image_name, progress_bar=progress_bar, segments=segments)
+        return self._copy_from_cache(image_name, filepath, fetch)
+
+    # -----------------------------------------------------------------
+
+    def _copy_from_cache(self, image_name, filepath, fetch, attempts=3):
+
+        """
+        This function copies an image out of the cache, fetching it again when it was evicted (by another thread or
+        process) between the fetch and the copy
+        :param image_name:
+        :param filepath:
+        :param fetch: the function that puts the image in the cache
+        :param attempts:
+        :return:
+        """
 
-        get_link = None
+        for attempt in range(attempts):
 
-        for url in self.get_image_urls(galaxy_name):
+            fetch()
+            try:
+                self.image_cache.copy(image_name, filepath)
+                return filepath
+            except (IOError, OSError):
+                if os.path.isfile(self.image_cache.get_filepath(image_name)) or attempt == attempts - 1: raise
+                print("The image '" + image_name + "' was removed from the cache in the meantime, fetching it again ...")
+
+    # -----------------------------------------------------------------
 
-            #print(url)
-            link_name = url.split("imageName=")[1].split("&instrument")[0]
+    def download_image(self, galaxy_name, image_name, path, progress_bar=True, segments=1):
 
-            if link_name == image_name:
-                get_link = url
-                break
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :param path:
+        :param progress_bar:
+        :param segments: download large images as this number of byte ranges at once
+        :return:
+        """
 
-        #print(get_link)
+        # Inform the user
+        print("Downloading the image '" + image_name + "' for galaxy '" + galaxy_name + "' to '" + path + " ...")
 
         if os.path.isdir(path): filepath = os.path.join(path, image_name)
         else: filepath = path
 
+        # Through the image cache
+        if self.image_cache is not None: return self.copy_cached_image(galaxy_name, image_name, filepath, progress_bar=progress_bar, segments=segments)
+
+        # Look up the URL
+        get_link = self.get_image_url(galaxy_name, image_name)
+
         # Download
-        network.download_file(get_link, filepath, progress_bar=progress_bar, stream=True, session=self.session)
+        if segments > 1: return network.download_file(get_link, filepath, progress_bar=progress_bar, stream=True, segments=segments, pool=self.pool)
+        else: return network.download_file(get_link, filepath, progress_bar=progress_bar, stream=True, session=self.session)
 
     # -----------------------------------------------------------------
 
@@ -579,12 +901,22 @@ class DustPediaDatabase(object):
         :return:
         """
 
+        # Through the image cache
+        if self.image_cache is not None:
+
+            image_name = get_image_name(url)
+            filepath = os.path.join(path, image_name) if os.path.isdir(path) else path
+            if os.path.isfile(filepath): raise IOError("File is already present: " + filepath)
+
+            fetch = lambda: self.flights.do(("image", image_name), self.image_cache.fetch, image_name, url, session=self.session, progress_bar=True)
+            return self._copy_from_cache(image_name, filepath, fetch)
+
         # Download
-        network.download_file(url, path, progress_bar=True, stream=True, session=self.session)
+        return network.download_file(url, path, progress_bar=True, stream=True, session=self.session)
 
     # -----------------------------------------------------------------
 
-    def download_images(self, galaxy_name, path, error_maps=True, progress_bar=True, instrument=None):
+    def download_images(self, galaxy_name, path, error_maps=True, progress_bar=True, instrument=None, nthreads=1, journal=False):
 
         """
         This function ...
@@ -593,27 +925,76 @@ class DustPediaDatabase(object):
         :param error_maps:
         :param progress_bar:
         :param instrument:
-        :return:
+        :param nthreads: the number of images that are downloaded simultaneously
+        :param journal: keep a journal in the directory, so that an interrupted call continues where it stopped when it is repeated
+        :return: the paths of the images
         """
 
         # Inform the user
         print("Downloading all images for galaxy '" + galaxy_name + "' to '" + path + " ...")
 
-        # Loop over the image URLS found for this galaxy
-        for url in self.get_image_urls(galaxy_name, error_maps=error_maps):
+        # Get the image URLs
+        urls = self.get_image_urls(galaxy_name, error_maps=error_maps, instrument=instrument)
+
+        # The journal of this directory
+        journal = JobJournal(path) if journal else None
+
+        # Through the image cache
+        if self.image_cache is not None:
+
+            # Progress of each image only when they are done one by one (the engine shows the overall progress)
+            image_progress_bar = progress_bar and nthreads <= 1 and journal is None
+
+            # Images that are already present (before anything is planned, as in DownloadEngine.download)
+            if journal is not None:
+                for url in urls:
+                    filepath = os.path.join(path, get_image_name(url))
+                    if journal.is_done(url) or not os.path.isfile(filepath): continue
+
+                    # Copied by an earlier run, which was interrupted before it was recorded (files are moved in place when complete)
+                    if journal.get_state(url) is not None: journal.mark_done(url, filepath)
+                    else: raise IOError("File is already present: " + filepath)
+
+            def copy_image(url):
+                filepath = os.path.join(path, get_image_name(url))
+                return self.copy_cached_image(galaxy_name, get_image_name(url), filepath, progress_bar=image_progress_bar)
+
+            # Simultaneously (and with retries)
+            if nthreads > 1 or journal is not None:
+                engine = DownloadEngine(nthreads=nthreads, per_host=nthreads, pool=self.pool, progress_bar=progress_bar)
+                result = engine.run(copy_image, urls, journal=journal)
+                result.raise_on_failure()
+                return result.paths
 
-            # Determine instrument
-            instr = url.split("instrument=")[1]
-            if instrument is not None and instr != instrument: continue
+            # One by one
+            else: return [copy_image(url) for url in urls]
+
+        # Download simultaneously (and with retries)
+        if nthreads > 1 or journal is not None:
+
+            engine = DownloadEngine(nthreads=nthreads, per_host=nthreads, pool=self.pool, progress_bar=progress_bar)
+            result = engine.download(urls, path, names=[get_image_name(url) for url in urls], journal=journal)
+            result.report()
+            result.raise_on_failure()
+            return result.paths
+
+        paths = []
+
+        # Loop over the image URLS found for this galaxy
+        for url in urls:
 
             # Determine path
-            image_name = url.split("imageName=")[1].split("&instrument")[0]
+            image_name = get_image_name(url)
             image_path = os.path.join(path, image_name)
 
             print("Downloading '" + image_name + "' ...")
 
             # Download this image
             network.download_file(url, image_path, progress_bar=progress_bar, stream=True, session=self.session)
+            paths.append(image_path)
+
+        # Return the paths
+        return paths
 
     # -----------------------------------------------------------------
 
@@ -621,76 +1002,79 @@ class DustPediaDatabase(object):
 
         """
         This function ...
-        :param galaxy_name:
+        :param galaxy_name: a galaxy name, or a list of galaxy names (see get_galaxies_info)
         :return:
         """
 
+        # Multiple galaxies
+        if not types.is_string_type(galaxy_name): return self.get_galaxies_info(galaxy_name)
+
         # Inform the user
         print("Getting general information about galaxy '" + galaxy_name + "' ...")
 
         # Set the names of the table columns
         names = ["Name", "RA", "DEC", "Hubble Stage", "Hubble Type", "V", "D25", "Inclination"]
 
-        r = self.session.get(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
-
-        page_as_string = r.content
+        page = self.get_page(data_link + "?GalaxyName="+galaxy_name+"&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
 
-        tree = html.fromstring(page_as_string)
+        # Parse the info box (of the last row)
+        info = parsing.parse_galaxy_info(parsing.get_info_boxes(page)[-1])
+        name = info["name"]
+        ra = info["ra"]
+        dec = info["dec"]
+        stage = info["stage"]
+        type = info["type"]
+        v = info["v"]
+        d25 = info["d25"]
+        i = info["inclination"]
 
-        table_list = [ e for e in tree.iter() if e.tag == 'table']
-        table = table_list[-1]
-
-        table_rows = [ e for e in table.iter() if e.tag == 'tr']
-
-        galaxy_info = None
-
-        for row in table_rows[1:]:
-
-            column_index = 0
-
-            for e in row.iter():
-
-                if e.tag != "td": continue
-
-                if column_index == 0:
-
-                    #for ee in e.iterchildren(): print(ee.text_content())
-                    #for ee in e.iterdescendants(): print(ee.text_content())
-                    #for ee in e.itersiblings(): print(ee.text_content())
-
-                    galaxy_info = e.text_content()
+        data = [[name], [ra], [dec], [stage], [type], [v], [d25], [i]]
 
-                    #print(galaxy_info)
+        table = tables.new(data, names)
 
-                column_index += 1
+        return table
 
-        splitted = galaxy_info.split("\r\n")
+    # -----------------------------------------------------------------
 
-        lines = [split.strip() for split in splitted if split.strip()]
+    def get_galaxies_info(self, galaxy_names):
 
-        name = None
-        ra = None
-        dec = None
-        stage = None
-        type = None
-        v = None
-        d25 = None
-        i = None
+        """
+        This function gets the general information of many galaxies from a single print preview page
+        :param galaxy_names:
+        :return: table with the same columns as get_galaxy_info, one row per galaxy (in the given order), indexed on name
+        """
 
-        for line in lines:
+        # Inform the user
+        print("Getting general information about " + str(len(galaxy_names)) + " galaxies ...")
 
-            if "Name" in line: name = line.split(": ")[1]
-            elif "RA(2000)" in line: ra = float(line.split(": ")[1])
-            elif "DEC(2000)" in line: dec = float(line.split(": ")[1])
-            elif "Hubble Stage(T)" in line: stage = float(line.split(": ")[1])
-            elif "Hubble Type: Sab" in line: type = line.split(": ")[1]
-            elif "V (km/s)" in line: v = float(line.split(": ")[1])
-            elif "D25 (arcmin)" in line: d25 = float(line.split(": ")[1])
-            elif "Inclination (deg.)" in line: i = float(line.split(": ")[1])
+        # Set the names of the table columns
+        names = ["Name", "RA", "DEC", "Hubble Stage", "Hubble Type", "V", "D25", "Inclination"]
 
-        data = [[name], [ra], [dec], [stage], [type], [v], [d25], [i]]
+        # Read the print preview of the complete sample, until all galaxies are found
+        remaining = set(galaxy_names)
+        found = dict()
+        galaxies = self.iter_galaxies(dict())
+        try:
+            for info in galaxies:
+                if info["name"] not in remaining: continue
+                found[info["name"]] = info
+                remaining.discard(info["name"])
+                if len(remaining) == 0: break
+        finally: galaxies.close()
+
+        # Not found
+        if len(remaining) > 0: print("WARNING: no information found for " + ", ".join(sorted(remaining)))
+
+        # Create the columns, with missing values for galaxies that were not found
+        data = [[] for _ in names]
+        for galaxy_name in galaxy_names:
+            for column, key in zip(data, galaxy_info_keys):
+                if galaxy_name in found: column.append(found[galaxy_name][key])
+                else: column.append(galaxy_name if key == "name" else None)
 
+        # Create the table
         table = tables.new(data, names)
+        table.add_index("Name")
 
         return table
 
@@ -709,102 +1093,23 @@ class DustPediaDatabase(object):
 
         # http://dustpedia.astro.noa.gr/MBB?GalaxyName=NGC3031&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search
 
-        r = self.session.get(mbb_link + "?GalaxyName=" + galaxy_name + "&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
-
-        page_as_string = r.content
-
-        tree = html.fromstring(page_as_string)
-
-        table_list = [e for e in tree.iter() if e.tag == 'table']
-        table = table_list[-1]
-
-        table_rows = [e for e in table.iter() if e.tag == 'tr']
-
-        galaxy_info = None
-
-        for row in table_rows[1:]:
-
-            column_index = 0
-
-            for e in row.iter():
-
-                if e.tag != "td": continue
-
-                if column_index == 0:
-
-                    # for ee in e.iterchildren(): print(ee.text_content())
-                    # for ee in e.iterdescendants(): print(ee.text_content())
-                    # for ee in e.itersiblings(): print(ee.text_content())
-
-                    galaxy_info = e.text_content()
-
-                    # print(galaxy_info)
-
-                column_index += 1
-
-        splitted = galaxy_info.split("\r\n")
-
-        lines = [split.strip() for split in splitted if split.strip()]
-
-        #return lines
+        page = self.get_page(mbb_link + "?GalaxyName=" + galaxy_name + "&tLow=&tHigh=&vLow=&vHigh=&inclLow=&inclHigh=&d25Low=&d25High=&SearchButton=Search")
 
         # Dust Temperature (K): 22.6±0.7
         # Dust Mass (M_sun): 4900000±1000000
         # Dust Luminosity (L_sun): 2.10E+09
 
-        temperature = None
-        temperature_error = None
-        mass = None
-        mass_error = None
-        luminosity = None
-        luminosity_error = None
-
-        #for index in range(len(lines)):
-        index = 0
-        while index < len(lines):
-
-            line = lines[index]
+        # Parse the info box (of the last row)
+        values = parsing.parse_black_body_info(parsing.get_info_boxes(page)[-1])
+        temperature, temperature_error, mass, mass_error, luminosity, luminosity_error = values
 
-            if "Dust Temperature" in line:
-
-                next_line = lines[index+1]
-                valuestr, errorstr = next_line.split("&plusmn")
-                value = float(valuestr)
-                error = float(errorstr)
-
-                temperature = value * Unit("K")
-                temperature_error = error * Unit("K")
-
-                index += 1
-
-            elif "Dust Mass" in line:
-
-                next_line = lines[index+1]
-                valuestr, errorstr = next_line.split("&plusmn")
-                value = float(valuestr)
-                error = float(errorstr)
-
-                mass = value * Unit("Msun")
-                mass_error = error * Unit("Msun")
-
-                index += 1
-
-            elif "Dust Luminosity" in line:
-
-                next_line = lines[index+1]
-
-                valuestr, errorstr = next_line.split("&plusmn")
-                value = float(valuestr)
-                error = float(errorstr)
-
-                #value = float(next_line)
-                #error = None
-
-                luminosity = value * Unit("Lsun")
-                luminosity_error = error * Unit("Lsun")
-                #luminosity_error = None
-
-            index += 1
+        # Add units
+        if temperature is not None: temperature = temperature * Unit("K")
+        if temperature_error is not None: temperature_error = temperature_error * Unit("K")
+        if mass is not None: mass = mass * Unit("Msun")
+        if mass_error is not None: mass_error = mass_error * Unit("Msun")
+        if luminosity is not None: luminosity = luminosity * Unit("Lsun")
+        if luminosity_error is not None: luminosity_error = luminosity_error * Unit("Lsun")
 
         # Return the parameters
         return mass, mass_error, temperature, temperature_error, luminosity, luminosity_error
@@ -852,7 +1157,7 @@ class DustPediaDatabase(object):
         :return:
         """
 
-        filepath = self.download_dust_black_body_table(self.temp_path)
+        filepath = self.update_catalog(all_mmb_results_url)
         return tables.from_file(filepath, format="ascii")
 
     # -----------------------------------------------------------------
@@ -1015,6 +1320,82 @@ class DustPediaDatabase(object):
 
     # -----------------------------------------------------------------
 
+    def get_black_body_galaxy_indices(self, galaxy_names):
+
+        """
+        This function looks up many galaxies in the black body table at once
+        :param galaxy_names:
+        :return: the indices, and a mask of the galaxies that were found
+        """
+
+        galaxy_names = np.array([str(name) for name in galaxy_names])
+        table_names = np.array([str(name) for name in self.dust_black_body_table["Name"]])
+
+        # Empty table: none found
+        if len(table_names) == 0: return np.zeros(len(galaxy_names), dtype=int), np.zeros(len(galaxy_names), dtype=bool)
+
+        # Search in the sorted names
+        sorter = np.argsort(table_names)
+        positions = np.clip(np.searchsorted(table_names, galaxy_names, sorter=sorter), 0, max(len(table_names) - 1, 0))
+        indices = sorter[positions]
+        found = table_names[indices] == galaxy_names
+
+        # Return the indices and the mask
+        return indices, found
+
+    # -----------------------------------------------------------------
+
+    def get_dust_black_body_parameters_table(self, galaxy_names, scrape_missing=True):
+
+        """
+        This function gets the MBB parameters of many galaxies from the MBB table, scraping the MBB page only for
+        galaxies that are not in the table
+        :param galaxy_names:
+        :param scrape_missing:
+        :return: table with a row per galaxy (in the given order), indexed on name
+        """
+
+        galaxy_names = list(galaxy_names)
+
+        # Look up all galaxies in the table
+        indices, found = self.get_black_body_galaxy_indices(galaxy_names)
+
+        # Get the values
+        columns = OrderedDict()
+        for name, column_name, unit in black_body_parameters:
+            column = np.asarray(self.dust_black_body_table[column_name])
+            values = column[indices].tolist() if len(column) > 0 else [None] * len(indices)
+            columns[name] = [value if found[index] else None for index, value in enumerate(values)]
+
+        # Scrape the galaxies that are not in the table
+        if scrape_missing:
+            for index in np.flatnonzero(~found):
+
+                # No MBB results for this galaxy: leave the row empty
+                try: mass, mass_error, temperature, temperature_error, luminosity, luminosity_error = self.get_dust_black_body_parameters(galaxy_names[index])
+                except IndexError:
+                    print("No MBB results for galaxy '" + galaxy_names[index] + "'")
+                    continue
+
+                scraped = {"dust_temperature": temperature, "dust_temperature_error": temperature_error,
+                           "dust_luminosity": luminosity, "dust_luminosity_error": luminosity_error,
+                           "dust_mass": mass, "dust_mass_error": mass_error}
+                for name, column_name, unit in black_body_parameters:
+                    if scraped.get(name) is not None: columns[name][index] = scraped[name].to(unit).value
+
+        # Create the table
+        names = ["Name"] + list(columns.keys())
+        data = [galaxy_names] + list(columns.values())
+        table = tables.new(data, names)
+        for name, column_name, unit in black_body_parameters:
+            if unit is not None: table[name].unit = unit
+        table.add_index("Name")
+
+        # Return the table
+        return table
+
+    # -----------------------------------------------------------------
+
     def download_cigale_table(self, path):
 
         """
@@ -1035,7 +1416,7 @@ class DustPediaDatabase(object):
         :return:
         """
 
-        filepath = self.download_cigale_table(self.temp_path)
+        filepath = self.update_catalog(all_cigale_results_url)
         return tables.from_file(filepath, format="ascii")
 
     # -----------------------------------------------------------------
@@ -1327,12 +1708,18 @@ class DustPediaDatabase(object):
         # Planck: http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_Planck_CCS2.csv
         # Release notes: http://dustpedia.astro.noa.gr/Content/tempFiles/Photometry_Notes.pdf
 
-        urls = ["http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_Aperture_Photometry.csv",
-                "http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_IRAS_SCANPI.csv",
-                "http://dustpedia.astro.noa.gr/Content/tempFiles/DustPedia_Planck_CCS2.csv"]
+        # Check whether the files are already present
+        for url in photometry_urls:
+            filepath = os.path.join(dir_path, os.path.basename(url))
+            if os.path.isfile(filepath): raise IOError("File is already present: " + filepath)
+
+        # Bring the cached copies up to date, simultaneously
+        engine = DownloadEngine(pool=self.pool, progress_bar=False)
+        result = engine.run(self.update_catalog, photometry_urls)
+        result.raise_on_failure()
 
-        # Download the photometry files
-        network.download_files(urls, dir_path)
+        # Copy them
+        for url, cached_path in result.succeeded.items(): shutil.copy(cached_path, os.path.join(dir_path, os.path.basename(url)))
 
 # -----------------------------------------------------------------
 
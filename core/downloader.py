@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import time
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+# Import DustPedia modules
+from . import network, progress
+from .jobs import JobJournal, RetryPolicy, call_with_retries
+
+# -----------------------------------------------------------------
+
+class DownloadResult(object):
+
+    """
+    This class holds the outcome of a bulk download: the paths of the files that were downloaded and the errors
+    for the files that failed
+    """
+
+    def __init__(self):
+
+        """
+        The constructor ...
+        """
+
+        # url -> path, url -> exception (in the order of the requests)
+        self.succeeded = OrderedDict()
+        self.failed = OrderedDict()
+
+        # URLs that were already done in an earlier run (according to the journal)
+        self.skipped = []
+
+        # Bytes on the wire and after decoding
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+        # Time
+        self.elapsed = 0.
+
+    # -----------------------------------------------------------------
+
+    @property
+    def success(self):
+        return len(self.failed) == 0
+
+    # -----------------------------------------------------------------
+
+    @property
+    def paths(self):
+        return list(self.succeeded.values())
+
+    # -----------------------------------------------------------------
+
+    @property
+    def nsucceeded(self):
+        return len(self.succeeded)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def nfailed(self):
+        return len(self.failed)
+
+    # -----------------------------------------------------------------
+
+    def raise_on_failure(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if self.success: return
+        raise IOError("Failed to download " + str(self.nfailed) + " file(s):\n" + "\n".join(" - " + url + ": " + str(error) for url, error in self.failed.items()))
+
+    # -----------------------------------------------------------------
+
+    def report(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        rate = network.format_size(self.wire_bytes / self.elapsed) + "/s" if self.elapsed > 0 else "?"
+        if len(self.skipped) > 0: print("Skipped " + str(len(self.skipped)) + " file(s) that were downloaded before")
+        print("Downloaded " + str(self.nsucceeded - len(self.skipped)) + " file(s) (" + network.format_size(self.decoded_bytes) + ", " +
+              network.format_size(self.wire_bytes) + " transferred) in " + str(round(self.elapsed, 1)) + " s (" + rate + ")")
+        for url, error in self.failed.items(): print(" FAILED: " + url + ": " + str(error))
+
+# -----------------------------------------------------------------
+
+class DownloadEngine(object):
+
+    """
+    This class downloads many files at once with a pool of worker threads, with a limit on the number of
+    simultaneous connections to each host
+    """
+
+    def __init__(self, nthreads=8, per_host=4, pool=None, session=None, chunk_size=64*1024, progress_bar=True, verbose=True,
+                 retry=True):
+
+        """
+        The constructor ...
+        :param nthreads: the number of worker threads
+        :param per_host: the maximum number of simultaneous downloads from one host
+        :param pool: the SessionPool (default: the default pool of the network module)
+        :param session: one session for all workers (instead of a session per thread from the pool)
+        :param chunk_size:
+        :param progress_bar: show the aggregate progress
+        :param verbose: print a line for each finished file
+        :param retry: True (for the default policy), a RetryPolicy, or False to not retry transient failures
+        """
+
+        # Settings
+        self.nthreads = nthreads
+        self.per_host = per_host
+        self.pool = pool
+        self._session = session
+        self.chunk_size = chunk_size
+        self.progress_bar = progress_bar
+        self.verbose = verbose
+        self.retry = RetryPolicy() if retry is True else (retry if retry else None)
+
+        # Semaphores for the hosts
+        self._hosts = dict()
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    @property
+    def session(self):
+
+        """
+        This function returns the session for the current thread
+        :return:
+        """
+
+        if self._session is not None: return self._session
+        return (self.pool if self.pool is not None else network.default_pool).session
+
+    # -----------------------------------------------------------------
+
+    def host_semaphore(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        host = network.urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts: self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    # -----------------------------------------------------------------
+
+    def fetch(self, url, filepath):
+
+        """
+        This function downloads one file (to a '.part' file that is moved in place when complete, see network.fetch_file)
+        :param url:
+        :param filepath:
+        :return: (wire bytes, decoded bytes)
+        """
+
+        return network.fetch_file(url, filepath, session=self.session, chunk_size=self.chunk_size)
+
+    # -----------------------------------------------------------------
+
+    def run(self, function, urls, label="", journal=None):
+
+        """
+        This function calls function(url) for each URL with the worker pool, respecting the connection limit per host.
+        Transient failures are retried according to the retry policy.
+        :param function: returns the path, or (path, wire bytes, decoded bytes)
+        :param urls:
+        :param label:
+        :param journal: a JobJournal: URLs that are done according to the journal are skipped, and the outcome of the others is recorded
+        :return: DownloadResult
+        """
+
+        result = DownloadResult()
+        urls = list(OrderedDict.fromkeys(urls))
+
+        # Skip what was done before
+        if journal is not None:
+            for url in urls:
+                if not journal.is_done(url): journal.plan(url, url)
+                else: result.skipped.append(url)
+            if len(result.skipped) > 0: print("Skipping " + str(len(result.skipped)) + " file(s) that were downloaded before ...")
+            for url in result.skipped: result.succeeded[url] = journal.get_path(url)
+            urls = [url for url in urls if url not in result.succeeded]
+
+        if len(urls) == 0: return result
+
+        start = time.time()
+        outcomes = dict()
+
+        def attempt(url):
+            with self.host_semaphore(url): return function(url)
+
+        def work(url):
+            begin = time.time()
+            try: outcome = call_with_retries(attempt, self.retry, "'" + url + "'", url)
+            except Exception as error: outcome = error
+
+            # Record
+            if journal is not None:
+                if isinstance(outcome, Exception): journal.mark_failed(url, outcome)
+                else: journal.mark_done(url, outcome[0] if isinstance(outcome, tuple) else outcome)
+
+            return url, outcome, time.time() - begin
+
+        pool = ThreadPool(min(self.nthreads, len(urls)))
+        bar = progress.Bar(label=label, expected_size=len(urls), hide=None if self.progress_bar else True)
+
+        try:
+
+            for index, (url, outcome, elapsed) in enumerate(pool.imap_unordered(work, urls)):
+
+                outcomes[url] = outcome
+
+                # Per-file progress
+                if self.verbose:
+                    if isinstance(outcome, Exception): print("Failed to download '" + url + "': " + str(outcome))
+                    else:
+                        filepath = outcome[0] if isinstance(outcome, tuple) else outcome
+                        print("Downloaded '" + os.path.basename(filepath) + "' in " + str(round(elapsed, 1)) + " s (" + str(index + 1) + " of " + str(len(urls)) + ")")
+
+                # Aggregate progress
+                bar.show(index + 1)
+
+        finally:
+            pool.close()
+            pool.join()
+            bar.done()
+
+        # Fill the result (in the order of the URLs)
+        for url in urls:
+            outcome = outcomes[url]
+            if isinstance(outcome, Exception): result.failed[url] = outcome
+            elif isinstance(outcome, tuple):
+                result.succeeded[url] = outcome[0]
+                result.wire_bytes += outcome[1]
+                result.decoded_bytes += outcome[2]
+            else: result.succeeded[url] = outcome
+        result.elapsed = time.time() - start
+
+        # Return the result
+        return result
+
+    # -----------------------------------------------------------------
+
+    def download(self, urls, path, names=None, overwrite=False, journal=None):
+
+        """
+        This function ...
+        :param urls:
+        :param path: the directory
+        :param names: the file names (default: the last part of the URLs)
+        :param overwrite:
+        :param journal: True (for a journal in the directory) or a JobJournal, to continue an interrupted bulk download
+        :return: DownloadResult
+        """
+
+        urls = list(urls)
+        if names is None: names = [os.path.basename(url) for url in urls]
+        filepaths = dict((url, os.path.join(path, name)) for url, name in zip(urls, names))
+        if journal is True: journal = JobJournal(path)
+
+        # Check for files that are already present, before downloading anything
+        for url in urls:
+            filepath = filepaths[url]
+            if journal is not None and journal.is_done(url): continue
+            if os.path.isfile(filepath):
+
+                # Files are only moved in place when complete: the run was interrupted before it was recorded
+                if journal is not None and journal.get_state(url) is not None: journal.mark_done(url, filepath)
+                elif overwrite: os.remove(filepath)
+                else: raise IOError("File is already present: " + filepath)
+
+            # Plan
+            elif journal is not None: journal.plan(url, url, filepath)
+
+        def download(url):
+            filepath = filepaths[url]
+            wire, decoded = self.fetch(url, filepath)
+            return filepath, wire, decoded
+
+        # Download
+        return self.run(download, urls, label="Downloading ", journal=journal)
+
+# -----------------------------------------------------------------
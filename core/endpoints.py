@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import time
+import threading
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+# Import other modules
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+# -----------------------------------------------------------------
+
+# The DustPedia archive
+primary_base = "http://dustpedia.astro.noa.gr"
+
+# Environment variable with a comma-separated list of mirrors (base URLs that serve the same paths as the archive)
+mirrors_variable = "DUSTPEDIA_MIRRORS"
+
+# Requests with these methods can be sent again to another endpoint (others, like the login POST, are sent only once)
+idempotent_methods = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"]
+
+# -----------------------------------------------------------------
+
+def get_environment_mirrors():
+
+    """
+    This function ...
+    :return:
+    """
+
+    value = os.environ.get(mirrors_variable, "")
+    return [mirror.strip().rstrip("/") for mirror in value.split(",") if mirror.strip()]
+
+# -----------------------------------------------------------------
+
+class Endpoint(object):
+
+    """
+    This class keeps the state of one server
+    """
+
+    def __init__(self, base):
+
+        """
+        The constructor ...
+        :param base: the base URL
+        """
+
+        self.base = base.rstrip("/")
+
+        # Running average of the response time (None if not yet known)
+        self.latency = None
+
+        # Not used until this time after a failure
+        self.down_until = 0.
+
+        # The number of consecutive failures
+        self.failures = 0
+
+    # -----------------------------------------------------------------
+
+    @property
+    def healthy(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return time.time() >= self.down_until
+
+    # -----------------------------------------------------------------
+
+    def __repr__(self):
+        return "Endpoint(" + self.base + ", latency=" + (str(round(self.latency * 1000.)) + "ms" if self.latency is not None else "?") + (", down" if not self.healthy else "") + ")"
+
+# -----------------------------------------------------------------
+
+class EndpointRegistry(object):
+
+    """
+    This class lists the DustPedia archive and its mirrors. Requests are sent to the fastest healthy endpoint;
+    endpoints that fail or are too slow are skipped for a while.
+    """
+
+    def __init__(self, mirrors=None, primary=primary_base, include_primary=True, probe_path="/", timeout=10.,
+                 read_timeout=60., probe_interval=600., down_time=300., smoothing=0.3):
+
+        """
+        The constructor ...
+        :param mirrors: base URLs of mirrors (default: from the DUSTPEDIA_MIRRORS environment variable)
+        :param primary: the base URL that appears in the request URLs
+        :param include_primary: also use the primary server itself
+        :param probe_path: the path that is requested to measure the latency
+        :param timeout: requests to an endpoint that do not connect within this time (in seconds) fail over to the next one
+        :param read_timeout: requests that can be repeated (outside stateful sequences) also fail over when the endpoint
+        does not send data for this time (in seconds)
+        :param probe_interval: the time (in seconds) after which the latencies are measured again
+        :param down_time: the time (in seconds) that a failed endpoint is not used
+        :param smoothing: weight of a new response time in the running average
+        """
+
+        self.primary = primary.rstrip("/")
+
+        # The endpoints
+        if mirrors is None: mirrors = get_environment_mirrors()
+        bases = list(mirrors) + ([self.primary] if include_primary else [])
+        if len(bases) == 0: raise ValueError("No endpoints")
+        self.endpoints = [Endpoint(base) for base in bases]
+
+        # Settings
+        self.probe_path = probe_path
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.probe_interval = probe_interval
+        self.down_time = down_time
+        self.smoothing = smoothing
+
+        # The time of the last probe
+        self._probed = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    @property
+    def nendpoints(self):
+        return len(self.endpoints)
+
+    # -----------------------------------------------------------------
+
+    def probe_endpoint(self, endpoint):
+
+        """
+        This function measures the latency of an endpoint
+        :param endpoint:
+        :return: the latency, or None if the endpoint is down
+        """
+
+        # Import here to enable this module to be imported with a clean python install
+        import requests
+
+        start = time.time()
+        try: requests.head(endpoint.base + self.probe_path, timeout=self.timeout, allow_redirects=False)
+        except (ConnectionError, Timeout):
+            self.mark_failure(endpoint)
+            return None
+
+        latency = time.time() - start
+        self.mark_success(endpoint, latency, reset=True)
+        return latency
+
+    # -----------------------------------------------------------------
+
+    def probe(self):
+
+        """
+        This function measures the latency of all endpoints (simultaneously)
+        :return:
+        """
+
+        pool = ThreadPool(self.nendpoints)
+        try: latencies = pool.map(self.probe_endpoint, self.endpoints)
+        finally: pool.close()
+
+        with self._lock: self._probed = time.time()
+        return latencies
+
+    # -----------------------------------------------------------------
+
+    def mark_success(self, endpoint, latency, reset=False):
+
+        """
+        This function ...
+        :param endpoint:
+        :param latency:
+        :param reset: replace the running average instead of updating it
+        :return:
+        """
+
+        with self._lock:
+            if reset or endpoint.latency is None: endpoint.latency = latency
+            else: endpoint.latency = (1. - self.smoothing) * endpoint.latency + self.smoothing * latency
+            endpoint.failures = 0
+            endpoint.down_until = 0.
+
+    # -----------------------------------------------------------------
+
+    def mark_failure(self, endpoint):
+
+        """
+        This function ...
+        :param endpoint:
+        :return:
+        """
+
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.down_until = time.time() + self.down_time * min(endpoint.failures, 10)
+
+    # -----------------------------------------------------------------
+
+    def get_endpoints(self):
+
+        """
+        This function returns the endpoints in the order in which they should be tried:
+        healthy endpoints from fast to slow, then the endpoints that are down
+        :return:
+        """
+
+        # Measure the latencies first (only useful when there is a choice)
+        if self.nendpoints > 1:
+            with self._lock:
+                probe = self._probed is None or time.time() - self._probed > self.probe_interval
+                if probe: self._probed = time.time() # other threads do not probe at the same time
+            if probe: self.probe()
+
+        with self._lock:
+
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+            down = [endpoint for endpoint in self.endpoints if not endpoint.healthy]
+
+            # Unknown latencies after known ones, keeping the configured order
+            healthy.sort(key=lambda endpoint: (endpoint.latency is None, endpoint.latency if endpoint.latency is not None else 0.))
+            down.sort(key=lambda endpoint: endpoint.down_until)
+
+        return healthy + down
+
+    # -----------------------------------------------------------------
+
+    def is_routed(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        return url == self.primary or url.startswith(self.primary + "/")
+
+    # -----------------------------------------------------------------
+
+    def rewrite(self, url, endpoint):
+
+        """
+        This function ...
+        :param url:
+        :param endpoint:
+        :return:
+        """
+
+        return endpoint.base + url[len(self.primary):]
+
+    # -----------------------------------------------------------------
+
+    def report(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        for endpoint in self.get_endpoints(): print(endpoint)
+
+# -----------------------------------------------------------------
+
+class EndpointAdapter(BaseAdapter):
+
+    """
+    This class is a transport adapter that sends requests for the DustPedia archive to the fastest healthy endpoint
+    of a registry, and tries the next endpoint when one is down, too slow or returns a server error. The server keeps
+    session state (the login, the last search), so once an endpoint is chosen, it is used until it fails.
+    """
+
+    def __init__(self, registry, adapter):
+
+        """
+        The constructor ...
+        :param registry: the EndpointRegistry
+        :param adapter: the transport adapter that does the requests
+        """
+
+        # Call the constructor of the base class
+        super(EndpointAdapter, self).__init__()
+
+        # The registry and the adapter
+        self.registry = registry
+        self.adapter = adapter
+
+        # The endpoint that is used until it fails
+        self.pinned = None
+        self._lock = threading.Lock()
+
+        # The stateful sequence of each thread (see bound)
+        self._local = threading.local()
+
+    # -----------------------------------------------------------------
+
+    @contextmanager
+    def bound(self):
+
+        """
+        This function returns a context in which all requests of this thread go to the endpoint that answered the first
+        one, without failover: for a sequence of requests that depends on server-side state (such as a search and its
+        print preview, or the login and the check of the user page)
+        :return:
+        """
+
+        # Nested: part of the outer sequence
+        if getattr(self._local, "sequence", None) is not None:
+            yield
+            return
+
+        self._local.sequence = [None]
+        try: yield
+        finally: self._local.sequence = None
+
+    # -----------------------------------------------------------------
+
+    def get_endpoints(self):
+
+        """
+        This function returns the endpoints in the order in which they should be tried: the pinned endpoint first
+        (while it is healthy), then the others as ordered by the registry
+        :return:
+        """
+
+        endpoints = self.registry.get_endpoints()
+        with self._lock: pinned = self.pinned
+        if pinned is not None and pinned.healthy and pinned in endpoints:
+            endpoints.remove(pinned)
+            endpoints.insert(0, pinned)
+        return endpoints
+
+    # -----------------------------------------------------------------
+
+    def send(self, request, timeout=None, **kwargs):
+
+        """
+        This function ...
+        :param request:
+        :param timeout:
+        :param kwargs:
+        :return:
+        """
+
+        # Not for the archive
+        if not self.registry.is_routed(request.url): return self.adapter.send(request, timeout=timeout, **kwargs)
+
+        sequence = getattr(self._local, "sequence", None)
+
+        # Later requests of a stateful sequence go to the endpoint of the first
+        if sequence is not None and sequence[0] is not None: endpoints = [sequence[0]]
+        else:
+            endpoints = self.get_endpoints()
+
+            # Only send requests that are safe to repeat to more than one endpoint
+            if request.method not in idempotent_methods: endpoints = endpoints[:1]
+
+        # Fail over to the next endpoint when an endpoint can not be reached in time, or (for requests that can be
+        # repeated elsewhere) when it stops sending data. No limit on the response time of stateful sequences:
+        # searches and the print preview can take long.
+        if timeout is None:
+            if sequence is not None or len(endpoints) == 1: timeout = (self.registry.timeout, None)
+            else: timeout = (self.registry.timeout, self.registry.read_timeout)
+
+        # Try the endpoints
+        for index, endpoint in enumerate(endpoints):
+
+            last = index == len(endpoints) - 1
+
+            attempt = request.copy()
+            attempt.url = self.registry.rewrite(request.url, endpoint)
+
+            start = time.time()
+            try: response = self.adapter.send(attempt, timeout=timeout, **kwargs)
+            except (ConnectionError, Timeout):
+                self.mark_failure(endpoint)
+                if last: raise
+                continue
+
+            # Server error: try the next endpoint
+            if response.status_code >= 500:
+                self.mark_failure(endpoint)
+                if not last:
+                    response.close()
+                    continue
+
+            # Success: keep using this endpoint
+            else:
+                self.registry.mark_success(endpoint, time.time() - start)
+                with self._lock: self.pinned = endpoint
+                if sequence is not None: sequence[0] = endpoint
+
+            # Cookies set by any endpoint belong to the archive
+            response.request = request
+            return response
+
+    # -----------------------------------------------------------------
+
+    def mark_failure(self, endpoint):
+
+        """
+        This function ...
+        :param endpoint:
+        :return:
+        """
+
+        self.registry.mark_failure(endpoint)
+        with self._lock:
+            if self.pinned is endpoint: self.pinned = None
+
+    # -----------------------------------------------------------------
+
+    def close(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        self.adapter.close()
+
+# -----------------------------------------------------------------
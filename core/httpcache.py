@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import os.path
+import re
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+# Import other modules
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Import DustPedia modules
+from .paths import user_path, create_user_directory
+from .ratelimit import LimitingAdapter
+
+# -----------------------------------------------------------------
+
+# The default location of the response cache
+http_cache_path = os.path.join(user_path, "http_cache")
+
+# Time to live (in seconds) of cached responses, by URL pattern. Other URLs are not cached.
+# The search pages and the print preview are never cached: the print preview shows the results of the last search
+# done in the (server-side) session, so the search request must always reach the server.
+default_ttls = [(r"/Data\?GalaxyName=[^&]+&", 24*3600), # Data page of a galaxy
+                (r"/MBB\?GalaxyName=[^&]+&", 24*3600), # MBB page of a galaxy
+                (r"leda\.univ-lyon1\.fr/ledacat\.cgi", 7*24*3600)] # HyperLEDA name lookup
+
+# Cookies that change the contents of the pages (authentication)
+default_cookie_regex = r"auth"
+
+# -----------------------------------------------------------------
+
+class ResponseCache(object):
+
+    """
+    This class stores compressed response bodies on disk, with a total size limit (least recently used entries are
+    evicted first) and a time to live per URL pattern
+    """
+
+    def __init__(self, path=None, max_size=256*1024**2, ttls=None, cookie_regex=default_cookie_regex):
+
+        """
+        The constructor ...
+        :param path:
+        :param max_size: the maximum total size of the cache in bytes
+        :param ttls: list of (URL regex, time to live in seconds)
+        :param cookie_regex: regex for the names of the cookies that are part of the key
+        """
+
+        # The cache directory
+        self.path = path if path is not None else http_cache_path
+        if not os.path.isdir(self.path): create_user_directory(self.path)
+
+        # Settings
+        self.max_size = max_size
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls if ttls is not None else default_ttls)]
+        self.cookie_regex = re.compile(cookie_regex, re.IGNORECASE) if cookie_regex is not None else None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        # The total size (determined on first store)
+        self._size = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    def get_ttl(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        for regex, ttl in self.ttls:
+            if regex.search(url) is not None: return ttl
+        return 0
+
+    # -----------------------------------------------------------------
+
+    def get_key(self, url, cookie_header=None):
+
+        """
+        This function ...
+        :param url:
+        :param cookie_header:
+        :return:
+        """
+
+        relevant = []
+        if cookie_header and self.cookie_regex is not None:
+            for cookie in cookie_header.split(";"):
+                name = cookie.split("=", 1)[0].strip()
+                if self.cookie_regex.search(name) is not None: relevant.append(cookie.strip())
+
+        key = url + "\n" + ";".join(sorted(relevant))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    # -----------------------------------------------------------------
+
+    def _filepath(self, key):
+        return os.path.join(self.path, key + ".cache")
+
+    # -----------------------------------------------------------------
+
+    def get(self, key, url):
+
+        """
+        This function returns (status, headers, body), or None when the URL is not (or no longer) cached
+        :param key:
+        :param url:
+        :return:
+        """
+
+        filepath = self._filepath(key)
+
+        try:
+            with open(filepath, "rb") as cache_file:
+                meta = json.loads(cache_file.readline().decode("utf-8"))
+                body = zlib.decompress(cache_file.read())
+        except (IOError, OSError, ValueError, zlib.error):
+            with self._lock: self.misses += 1
+            return None
+
+        # Expired
+        if time.time() - meta["time"] > self.get_ttl(url):
+            with self._lock: self.misses += 1
+            return None
+
+        # Mark as recently used
+        try: os.utime(filepath, None)
+        except OSError: pass
+
+        with self._lock: self.hits += 1
+        return meta["status"], meta["headers"], body
+
+    # -----------------------------------------------------------------
+
+    def put(self, key, url, status, headers, body):
+
+        """
+        This function ...
+        :param key:
+        :param url:
+        :param status:
+        :param headers:
+        :param body:
+        :return:
+        """
+
+        filepath = self._filepath(key)
+
+        # The body is stored decoded, so drop the headers describing the transfer
+        headers = dict((name, value) for name, value in headers.items() if name.lower() not in ("content-encoding", "content-length", "transfer-encoding", "set-cookie"))
+        meta = {"url": url, "time": time.time(), "status": status, "headers": headers}
+        data = json.dumps(meta).encode("utf-8") + b"\n" + zlib.compress(body)
+
+        # Write
+        temp_path = filepath + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+        with open(temp_path, "wb") as cache_file: cache_file.write(data)
+        os.rename(temp_path, filepath)
+
+        with self._lock:
+            self.stores += 1
+            if self._size is None: self._size = self._total_size()
+            else: self._size += len(data)
+            evict = self._size > self.max_size
+
+        # Evict least recently used entries
+        if evict: self.evict()
+
+    # -----------------------------------------------------------------
+
+    def _entries(self):
+
+        """
+        This function returns (last use, size, path) for each entry
+        :return:
+        """
+
+        entries = []
+        for filename in os.listdir(self.path):
+            if not filename.endswith(".cache"): continue
+            filepath = os.path.join(self.path, filename)
+            try: stat = os.stat(filepath)
+            except OSError: continue
+            entries.append((stat.st_mtime, stat.st_size, filepath))
+        return entries
+
+    # -----------------------------------------------------------------
+
+    def _total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    # -----------------------------------------------------------------
+
+    def evict(self):
+
+        """
+        This function removes the least recently used entries until the cache fits in its maximum size
+        :return:
+        """
+
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+
+        for _, entry_size, filepath in entries:
+            if size <= self.max_size: break
+            try: os.remove(filepath)
+            except OSError: continue
+            size -= entry_size
+            with self._lock: self.evictions += 1
+
+        with self._lock: self._size = size
+
+    # -----------------------------------------------------------------
+
+    def clear(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        for _, _, filepath in self._entries():
+            try: os.remove(filepath)
+            except OSError: pass
+        with self._lock: self._size = 0
+
+    # -----------------------------------------------------------------
+
+    @property
+    def statistics(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions,
+                    "hit_rate": self.hits / requests if requests > 0 else 0.}
+
+    # -----------------------------------------------------------------
+
+    def report(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        statistics = self.statistics
+        print("HTTP cache: " + str(statistics["hits"]) + " hits, " + str(statistics["misses"]) + " misses (" +
+              str(round(statistics["hit_rate"] * 100., 1)) + "%), " + str(statistics["stores"]) + " stored, " +
+              str(statistics["evictions"]) + " evicted")
+
+# -----------------------------------------------------------------
+
+class CachingAdapter(LimitingAdapter):
+
+    """
+    This class is a transport adapter that answers GET requests for cacheable URLs from a ResponseCache
+    """
+
+    def __init__(self, cache, **kwargs):
+
+        """
+        The constructor ...
+        :param cache:
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(CachingAdapter, self).__init__(**kwargs)
+
+        # The cache
+        self.cache = cache
+
+    # -----------------------------------------------------------------
+
+    def send(self, request, stream=False, **kwargs):
+
+        """
+        This function ...
+        :param request:
+        :param stream:
+        :param kwargs:
+        :return:
+        """
+
+        # Only complete GET requests of cacheable URLs
+        if request.method != "GET" or stream or self.cache.get_ttl(request.url) <= 0: return super(CachingAdapter, self).send(request, stream=stream, **kwargs)
+
+        # Look in the cache
+        key = self.cache.get_key(request.url, request.headers.get("Cookie"))
+        cached = self.cache.get(key, request.url)
+        if cached is not None: return self.build_cached_response(request, *cached)
+
+        # Do the request
+        response = super(CachingAdapter, self).send(request, stream=False, **kwargs)
+
+        # Store successful responses
+        if response.status_code == 200: self.cache.put(key, request.url, response.status_code, response.headers, response.content)
+
+        # Return the response
+        return response
+
+    # -----------------------------------------------------------------
+
+    def build_cached_response(self, request, status, headers, body):
+
+        """
+        This function ...
+        :param request:
+        :param status:
+        :param headers:
+        :param body:
+        :return:
+        """
+
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+# -----------------------------------------------------------------
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import os.path
+import shutil
+import hashlib
+import threading
+try: import fcntl
+except ImportError: fcntl = None # Windows: downloads are only coordinated between the threads of one process
+
+# Import DustPedia modules
+from . import network
+from .paths import user_path, create_user_directory
+
+# -----------------------------------------------------------------
+
+# The default location of the image cache
+image_cache_path = os.path.join(user_path, "images")
+
+# The release of the images in the archive: change it when the archive publishes new images,
+# so that the images of the previous release are no longer used (they are evicted over time)
+default_release = "current"
+
+# -----------------------------------------------------------------
+
+class ImageCache(object):
+
+    """
+    This class keeps downloaded FITS files on disk, addressed by release and image name, with a total size limit
+    (least recently used images are evicted first). Images that are saved elsewhere are copied out of the cache,
+    so they take disk space twice (up to max_size extra), unless they are hard-linked (see 'link').
+    """
+
+    def __init__(self, path=None, max_size=10*1024**3, release=default_release, link=False):
+
+        """
+        The constructor ...
+        :param path:
+        :param max_size: the maximum total size of the cache in bytes
+        :param release:
+        :param link: hard-link images out of the cache instead of copying them (when on the same file system).
+        Linked files share their contents with the cache: do not modify them in place (e.g. opening them in 'update' mode).
+        """
+
+        # The cache directory
+        self.path = path if path is not None else image_cache_path
+        if not os.path.isdir(self.path): create_user_directory(self.path)
+
+        # Settings
+        self.max_size = max_size
+        self.release = release
+        self.link = link
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # The total size (determined on first store)
+        self._size = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    def get_key(self, image_name):
+
+        """
+        This function ...
+        :param image_name:
+        :return:
+        """
+
+        return hashlib.sha1((self.release + "/" + image_name).encode("utf-8")).hexdigest()
+
+    # -----------------------------------------------------------------
+
+    def get_filepath(self, image_name):
+
+        """
+        This function ...
+        :param image_name:
+        :return:
+        """
+
+        key = self.get_key(image_name)
+        return os.path.join(self.path, key[:2], key + ".fits")
+
+    # -----------------------------------------------------------------
+
+    def has_image(self, image_name):
+
+        """
+        This function ...
+        :param image_name:
+        :return:
+        """
+
+        return os.path.isfile(self.get_filepath(image_name))
+
+    # -----------------------------------------------------------------
+
+    def get(self, image_name):
+
+        """
+        This function returns the path of the cached image, or None if it is not cached
+        :param image_name:
+        :return:
+        """
+
+        filepath = self.get_filepath(image_name)
+
+        # Mark as recently used
+        try: os.utime(filepath, None)
+        except OSError:
+            with self._lock: self.misses += 1
+            return None
+
+        with self._lock: self.hits += 1
+        return filepath
+
+    # -----------------------------------------------------------------
+
+    def fetch(self, image_name, url, session=None, progress_bar=False, segments=1, pool=None):
+
+        """
+        This function returns the path of the cached image, downloading it first if it is not cached
+        :param image_name:
+        :param url:
+        :param session:
+        :param progress_bar:
+        :param segments:
+        :param pool: the SessionPool for the segments (each segment thread uses its own session)
+        :return:
+        """
+
+        # Cached
+        filepath = self.get(image_name)
+        if filepath is not None: return filepath
+
+        filepath = self.get_filepath(image_name)
+        directory = os.path.dirname(filepath)
+        if not os.path.isdir(directory): create_user_directory(directory)
+
+        # Only one process downloads an image (the cache is shared by all processes of the user)
+        with open(filepath + ".lock", "a") as lock_file:
+
+            if fcntl is not None: fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+
+                # Downloaded by another process in the meantime
+                if self.has_image(image_name): return self.get(image_name)
+
+                # Download into the cache (interrupted downloads are resumed)
+                print("Downloading '" + image_name + "' into the image cache ...")
+                if segments > 1: network.fetch_file_segmented(url, filepath, nsegments=segments, progress_bar=progress_bar, pool=pool)
+                else: network.fetch_file(url, filepath, session=session, progress_bar=progress_bar)
+
+            finally:
+                if fcntl is not None: fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+        # Update the size and evict other images if necessary
+        self.added(os.path.getsize(filepath))
+
+        # Return the path
+        return filepath
+
+    # -----------------------------------------------------------------
+
+    def copy(self, image_name, filepath):
+
+        """
+        This function copies (or hard-links) a cached image to another path
+        :param image_name:
+        :param filepath:
+        :return:
+        """
+
+        # Copy to a temporary file that is moved in place, so that the file is complete when it exists
+        temp_path = filepath + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+
+        # Link (not possible across file systems, or on some file systems)
+        linked = False
+        if self.link and hasattr(os, "link"):
+            try:
+                os.link(self.get_filepath(image_name), temp_path)
+                linked = True
+            except OSError: pass
+
+        if not linked: shutil.copyfile(self.get_filepath(image_name), temp_path)
+        os.rename(temp_path, filepath)
+
+    # -----------------------------------------------------------------
+
+    def added(self, size):
+
+        """
+        This function ...
+        :param size:
+        :return:
+        """
+
+        with self._lock:
+            if self._size is None: self._size = self._total_size()
+            else: self._size += size
+            evict = self._size > self.max_size
+
+        # Evict least recently used images
+        if evict: self.evict()
+
+    # -----------------------------------------------------------------
+
+    def _entries(self):
+
+        """
+        This function returns (last use, size, path) for each image
+        :return:
+        """
+
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if not filename.endswith(".fits"): continue
+                filepath = os.path.join(dirpath, filename)
+                try: stat = os.stat(filepath)
+                except OSError: continue
+                entries.append((stat.st_mtime, stat.st_size, filepath))
+        return entries
+
+    # -----------------------------------------------------------------
+
+    def _total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    # -----------------------------------------------------------------
+
+    @property
+    def size(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with self._lock:
+            if self._size is None: self._size = self._total_size()
+            return self._size
+
+    # -----------------------------------------------------------------
+
+    def evict(self):
+
+        """
+        This function removes the least recently used images until the cache fits in its maximum size
+        (the most recently used image is always kept)
+        :return:
+        """
+
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+
+        for _, entry_size, filepath in entries[:-1]:
+            if size <= self.max_size: break
+            try: os.remove(filepath)
+            except OSError: continue
+            size -= entry_size
+            with self._lock: self.evictions += 1
+
+        with self._lock: self._size = size
+
+    # -----------------------------------------------------------------
+
+    def remove(self, image_name):
+
+        """
+        This function ...
+        :param image_name:
+        :return:
+        """
+
+        filepath = self.get_filepath(image_name)
+        if not os.path.isfile(filepath): return
+        size = os.path.getsize(filepath)
+        os.remove(filepath)
+        with self._lock:
+            if self._size is not None: self._size -= size
+
+    # -----------------------------------------------------------------
+
+    def clear(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        for _, _, filepath in self._entries():
+            try: os.remove(filepath)
+            except OSError: pass
+        with self._lock: self._size = 0
+
+    # -----------------------------------------------------------------
+
+    def report(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with self._lock: hits, misses, evictions = self.hits, self.misses, self.evictions
+        print("Image cache: " + str(hits) + " hits, " + str(misses) + " misses, " + str(evictions) + " evicted, " +
+              network.format_size(self.size) + " of " + network.format_size(self.max_size) + " used")
+
+# -----------------------------------------------------------------
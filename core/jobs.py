@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import json
+import time
+import socket
+import random
+import threading
+
+# Import DustPedia modules
+from .network import IncompleteDownload
+
+# -----------------------------------------------------------------
+
+# The name of the journal file that is kept in a download directory
+journal_name = ".dustpedia_journal"
+
+# Job states
+pending = "pending"
+done = "done"
+failed = "failed"
+
+# HTTP status codes that are worth retrying
+transient_status_codes = [408, 429, 500, 502, 503, 504]
+
+# Low-level connection errors (on Python 3, socket.error is OSError, the base class of all I/O errors)
+if socket.error is OSError: socket_errors = (ConnectionError, socket.timeout) # the built-in ConnectionError
+else: socket_errors = (socket.error, socket.timeout)
+
+# -----------------------------------------------------------------
+
+def is_transient(error):
+
+    """
+    This function returns whether an error may go away when the transfer is tried again
+    :param error:
+    :return:
+    """
+
+    # Import here to enable this module to be imported with a clean python install
+    from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError, ContentDecodingError, HTTPError
+    from urllib3.exceptions import ProtocolError, ReadTimeoutError, DecodeError
+
+    if isinstance(error, HTTPError): return error.response is not None and error.response.status_code in transient_status_codes
+    return isinstance(error, (ConnectionError, Timeout, ChunkedEncodingError, ContentDecodingError, IncompleteDownload,
+                              ProtocolError, ReadTimeoutError, DecodeError) + socket_errors)
+
+# -----------------------------------------------------------------
+
+class RetryPolicy(object):
+
+    """
+    This class decides whether and when a failed transfer is tried again: exponential backoff with jitter
+    """
+
+    def __init__(self, max_attempts=5, base_delay=2., max_delay=120., jitter=0.5):
+
+        """
+        The constructor ...
+        :param max_attempts: the maximum number of attempts (including the first)
+        :param base_delay: the delay (in seconds) before the second attempt
+        :param max_delay: the maximum delay (in seconds)
+        :param jitter: the fraction of the delay that is random (so that workers do not retry at the same moment)
+        """
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    # -----------------------------------------------------------------
+
+    def should_retry(self, error, attempt):
+
+        """
+        This function ...
+        :param error:
+        :param attempt: the number of the attempt that failed
+        :return:
+        """
+
+        return attempt < self.max_attempts and is_transient(error)
+
+    # -----------------------------------------------------------------
+
+    def get_delay(self, attempt):
+
+        """
+        This function ...
+        :param attempt: the number of the attempt that failed
+        :return:
+        """
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1. - self.jitter * random.random())
+
+# -----------------------------------------------------------------
+
+def call_with_retries(function, policy, description, *args, **kwargs):
+
+    """
+    This function calls a function, and calls it again after a transient error (as decided by the retry policy)
+    :param function:
+    :param policy:
+    :param description: for the messages
+    :param args:
+    :param kwargs:
+    :return:
+    """
+
+    attempt = 1
+    while True:
+
+        try: return function(*args, **kwargs)
+        except Exception as error:
+
+            if policy is None or not policy.should_retry(error, attempt): raise
+
+            # Wait and try again
+            delay = policy.get_delay(attempt)
+            print("Attempt " + str(attempt) + " of " + str(policy.max_attempts) + " for " + description + " failed (" + str(error) + "), trying again in " + str(round(delay, 1)) + " s ...")
+            time.sleep(delay)
+            attempt += 1
+
+# -----------------------------------------------------------------
+
+class JobJournal(object):
+
+    """
+    This class records the planned transfers and their outcome in an append-only file, so that a bulk download that
+    was interrupted (or crashed) can continue where it stopped
+    """
+
+    def __init__(self, path):
+
+        """
+        The constructor ...
+        :param path: the journal file, or a directory (in which case the journal is kept in that directory)
+        """
+
+        self.path = os.path.join(path, journal_name) if os.path.isdir(path) else path
+
+        # The latest record for each job
+        self.jobs = dict()
+        self._lock = threading.Lock()
+
+        # Whether the last line of the file was cut off (by a crash)
+        self._torn = False
+
+        # Load the records of earlier runs
+        self.load()
+
+    # -----------------------------------------------------------------
+
+    def load(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        self.jobs = dict()
+        self._torn = False
+        if not os.path.isfile(self.path): return
+
+        line = ""
+        with open(self.path, "r") as journal_file:
+            for line in journal_file:
+                try: record = json.loads(line)
+                except ValueError: continue # line that was being written during a crash
+                self.jobs[record["id"]] = record
+
+        # The last line was cut off: the next record has to start on a new line
+        self._torn = line != "" and not line.endswith("\n")
+
+    # -----------------------------------------------------------------
+
+    def _append(self, record):
+
+        """
+        This function ...
+        :param record:
+        :return:
+        """
+
+        record["time"] = time.time()
+        line = json.dumps(record) + "\n"
+
+        with self._lock:
+            self.jobs[record["id"]] = record
+            with open(self.path, "a") as journal_file:
+                if self._torn: journal_file.write("\n")
+                journal_file.write(line)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            self._torn = False
+
+    # -----------------------------------------------------------------
+
+    def plan(self, job_id, url, path=None):
+
+        """
+        This function records a transfer that is about to be done (unless it is already in the journal)
+        :param job_id:
+        :param url:
+        :param path:
+        :return:
+        """
+
+        with self._lock: known = job_id in self.jobs
+        if not known: self._append({"id": job_id, "url": url, "path": path, "state": pending, "attempts": 0})
+
+    # -----------------------------------------------------------------
+
+    def get_state(self, job_id):
+
+        """
+        This function ...
+        :param job_id:
+        :return:
+        """
+
+        with self._lock: record = self.jobs.get(job_id)
+        return record["state"] if record is not None else None
+
+    # -----------------------------------------------------------------
+
+    def get_path(self, job_id):
+
+        """
+        This function ...
+        :param job_id:
+        :return:
+        """
+
+        with self._lock: record = self.jobs.get(job_id)
+        return record["path"] if record is not None else None
+
+    # -----------------------------------------------------------------
+
+    def is_done(self, job_id):
+
+        """
+        This function returns whether the job completed (and its file, if any, still exists)
+        :param job_id:
+        :return:
+        """
+
+        with self._lock: record = self.jobs.get(job_id)
+        if record is None or record["state"] != done: return False
+        return record["path"] is None or os.path.isfile(record["path"])
+
+    # -----------------------------------------------------------------
+
+    def mark_done(self, job_id, path=None):
+
+        """
+        This function ...
+        :param job_id:
+        :param path:
+        :return:
+        """
+
+        with self._lock: record = dict(self.jobs.get(job_id, {"id": job_id, "url": None, "attempts": 0}))
+        record["state"] = done
+        if path is not None: record["path"] = path
+        record.pop("error", None)
+        self._append(record)
+
+    # -----------------------------------------------------------------
+
+    def mark_failed(self, job_id, error):
+
+        """
+        This function ...
+        :param job_id:
+        :param error:
+        :return:
+        """
+
+        with self._lock: record = dict(self.jobs.get(job_id, {"id": job_id, "url": None, "path": None, "attempts": 0}))
+        record["state"] = failed
+        record["attempts"] = record.get("attempts", 0) + 1
+        record["error"] = str(error)
+        self._append(record)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def ndone(self):
+        with self._lock: return sum(1 for record in self.jobs.values() if record["state"] == done)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def failed_jobs(self):
+        with self._lock: return [record for record in self.jobs.values() if record["state"] == failed]
+
+    # -----------------------------------------------------------------
+
+    def compact(self):
+
+        """
+        This function rewrites the journal with only the latest record of each job
+        :return:
+        """
+
+        with self._lock:
+            temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_path, "w") as journal_file:
+                for record in self.jobs.values(): journal_file.write(json.dumps(record) + "\n")
+            os.rename(temp_path, self.path)
+            self._torn = False
+
+    # -----------------------------------------------------------------
+
+    def remove(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with self._lock:
+            if os.path.isfile(self.path): os.remove(self.path)
+            self.jobs = dict()
+
+# -----------------------------------------------------------------
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import os.path
+import json
+import threading
+from collections import OrderedDict
+
+# Import DustPedia modules
+from .paths import user_path, create_user_directory
+
+# -----------------------------------------------------------------
+
+# The default location of the image manifest
+manifest_path = os.path.join(user_path, "image_manifest.json")
+
+# -----------------------------------------------------------------
+
+# Example link: http://dustpedia.astro.noa.gr/Data/GetImage?imageName=NGC3031_Planck_10600.fits&instrument=Planck
+
+def get_image_name(url):
+
+    """
+    This function ...
+    :param url:
+    :return:
+    """
+
+    return url.split("imageName=")[1].split("&instrument")[0]
+
+# -----------------------------------------------------------------
+
+def get_instrument(url):
+
+    """
+    This function ...
+    :param url:
+    :return:
+    """
+
+    return url.split("instrument=")[1]
+
+# -----------------------------------------------------------------
+
+def parse_image_url(url, galaxy_name=None):
+
+    """
+    This function creates a manifest entry from an image URL
+    :param url:
+    :param galaxy_name:
+    :return:
+    """
+
+    # Get the image name and instrument
+    name = get_image_name(url)
+    instrument = get_instrument(url)
+
+    # naming convention: [galaxy]_[telescope]_[band](_Error).fits
+    stem = name.split(".fits")[0]
+    error_map = stem.endswith("_Error")
+    if error_map: stem = stem[:-len("_Error")]
+
+    # Strip the galaxy name
+    if galaxy_name is not None and stem.startswith(galaxy_name + "_"): stem = stem[len(galaxy_name) + 1:]
+    else: stem = stem.split("_", 1)[1] if "_" in stem else stem
+
+    # Strip the telescope, the rest is the band
+    band = stem.split("_", 1)[1] if "_" in stem else stem
+
+    # Create the entry
+    entry = OrderedDict()
+    entry["name"] = name
+    entry["instrument"] = instrument
+    entry["band"] = band
+    entry["error_map"] = error_map
+    entry["url"] = url
+
+    # Return the entry
+    return entry
+
+# -----------------------------------------------------------------
+
+class ImageManifest(object):
+
+    """
+    This class keeps a persistent index of the images that are available for each galaxy,
+    so that the Data page of a galaxy only has to be scraped once
+    """
+
+    def __init__(self, path=None):
+
+        """
+        The constructor ...
+        :param path:
+        """
+
+        # The path of the manifest file
+        self.path = path if path is not None else manifest_path
+
+        # Galaxy name -> (image name -> entry)
+        self.galaxies = dict()
+
+        # Lock for access from multiple threads
+        self._lock = threading.RLock()
+
+        # Load the manifest if it exists
+        if os.path.isfile(self.path): self.load()
+
+    # -----------------------------------------------------------------
+
+    def load(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with open(self.path, "r") as manifest_file: data = json.load(manifest_file, object_pairs_hook=OrderedDict)
+
+        with self._lock:
+            self.galaxies = dict()
+            for galaxy_name in data: self.galaxies[str(galaxy_name)] = OrderedDict((entry["name"], entry) for entry in data[galaxy_name])
+
+    # -----------------------------------------------------------------
+
+    def save(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Create the directory
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory): create_user_directory(directory)
+
+        with self._lock: data = OrderedDict((galaxy_name, list(self.galaxies[galaxy_name].values())) for galaxy_name in sorted(self.galaxies))
+
+        # Write to a temporary file first, so that the manifest is never left half-written
+        temp_path = self.path + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+        with open(temp_path, "w") as manifest_file: json.dump(data, manifest_file)
+        os.rename(temp_path, self.path)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def galaxy_names(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return sorted(self.galaxies.keys())
+
+    # -----------------------------------------------------------------
+
+    def has_galaxy(self, galaxy_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :return:
+        """
+
+        return galaxy_name in self.galaxies
+
+    # -----------------------------------------------------------------
+
+    def set_urls(self, galaxy_name, urls):
+
+        """
+        This function replaces the entries of a galaxy by the given image URLs
+        :param galaxy_name:
+        :param urls:
+        :return:
+        """
+
+        entries = OrderedDict()
+        for url in urls:
+            entry = parse_image_url(url, galaxy_name=galaxy_name)
+            entries[entry["name"]] = entry
+
+        with self._lock: self.galaxies[galaxy_name] = entries
+
+    # -----------------------------------------------------------------
+
+    def remove(self, galaxy_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :return:
+        """
+
+        with self._lock: self.galaxies.pop(galaxy_name, None)
+
+    # -----------------------------------------------------------------
+
+    def get_entries(self, galaxy_name, error_maps=True, instrument=None):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param error_maps:
+        :param instrument:
+        :return:
+        """
+
+        entries = []
+        for entry in self.galaxies[galaxy_name].values():
+            if entry["error_map"] and not error_maps: continue
+            if instrument is not None and entry["instrument"] != instrument: continue
+            entries.append(entry)
+        return entries
+
+    # -----------------------------------------------------------------
+
+    def get_urls(self, galaxy_name, error_maps=True, instrument=None):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param error_maps:
+        :param instrument:
+        :return:
+        """
+
+        return [entry["url"] for entry in self.get_entries(galaxy_name, error_maps=error_maps, instrument=instrument)]
+
+    # -----------------------------------------------------------------
+
+    def get_names(self, galaxy_name, error_maps=True, instrument=None):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param error_maps:
+        :param instrument:
+        :return:
+        """
+
+        return [entry["name"] for entry in self.get_entries(galaxy_name, error_maps=error_maps, instrument=instrument)]
+
+    # -----------------------------------------------------------------
+
+    def get_entry(self, galaxy_name, image_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :return:
+        """
+
+        return self.galaxies[galaxy_name].get(image_name)
+
+    # -----------------------------------------------------------------
+
+    def get_url(self, galaxy_name, image_name):
+
+        """
+        This function ...
+        :param galaxy_name:
+        :param image_name:
+        :return:
+        """
+
+        entry = self.get_entry(galaxy_name, image_name)
+        return entry["url"] if entry is not None else None
+
+# -----------------------------------------------------------------
@@ -10,14 +10,493 @@ from __future__ import absolute_import, division, print_function
 # Import standard modules
 import os
 import os.path
-from subprocess import check_output
-import urllib
-import httplib
+import bz2
+import shutil
+import json
+import time
+import zlib
+import tempfile
+from email.utils import parsedate_tz, mktime_tz
+import threading
+from io import BytesIO
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from subprocess import check_output, Popen, PIPE
+try:
+    import httplib
+    from urllib2 import urlopen, Request
+    from urlparse import urlparse
+except ImportError: # Python 3
+    import http.client as httplib
+    from urllib.request import urlopen, Request
+    from urllib.parse import urlparse
 from . import archive
 from . import progress
 
 # -----------------------------------------------------------------
 
+# The limiter that is used by all sessions and downloads (None for no limits)
+limiter = None
+
+# -----------------------------------------------------------------
+
+def configure_limiter(bytes_per_second=None, requests_per_second=None, hosts=None, path=None, burst=1.):
+
+    """
+    This function sets the limits for all requests and downloads (of all pools) in this process. Processes that use
+    the same path share the limits.
+    :param bytes_per_second:
+    :param requests_per_second:
+    :param hosts:
+    :param path:
+    :param burst:
+    :return:
+    """
+
+    # Import here to enable this module to be imported with a clean python install
+    from .ratelimit import RateLimiter
+
+    global limiter
+    if bytes_per_second is None and requests_per_second is None and not hosts: limiter = None
+    else: limiter = RateLimiter(bytes_per_second, requests_per_second, hosts=hosts, path=path, burst=burst)
+    return limiter
+
+# -----------------------------------------------------------------
+
+@contextmanager
+def unbound():
+
+    """
+    This function is the context of SessionPool.bound when there are no endpoints to choose from
+    :return:
+    """
+
+    yield
+
+# -----------------------------------------------------------------
+
+class SessionPool(object):
+
+    """
+    This class hands out one requests session per thread. All sessions share one cookie jar (so that a login is
+    valid for every thread) and one keep-alive connection pool per host, so that connections are reused by all threads.
+    """
+
+    def __init__(self, pool_size=10, max_retries=0, block=False, cache=None, endpoints=None):
+
+        """
+        The constructor ...
+        :param pool_size: the maximum number of connections kept alive per host
+        :param max_retries: the number of retries for failed connections
+        :param block: wait for a free connection when all connections to a host are in use (instead of opening an extra one)
+        :param cache: a ResponseCache (see httpcache) to answer repeated page requests from
+        :param endpoints: an EndpointRegistry (see endpoints) to send archive requests to the fastest mirror
+        """
+
+        # Settings
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.block = block
+        self.cache = cache
+        self.endpoints = endpoints
+
+        # The shared state
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+        self._adapter = None
+        self._cookies = None
+
+    # -----------------------------------------------------------------
+
+    @property
+    def adapter(self):
+
+        """
+        This function returns the transport adapter (holding the connection pools) that is shared by all sessions
+        :return:
+        """
+
+        with self._lock:
+
+            if self._adapter is None:
+
+                settings = dict(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=self.max_retries, pool_block=self.block)
+
+                # With or without cache
+                if self.cache is not None:
+                    from .httpcache import CachingAdapter
+                    self._adapter = CachingAdapter(self.cache, **settings)
+                else:
+                    from .ratelimit import LimitingAdapter
+                    self._adapter = LimitingAdapter(**settings)
+
+                # Route to the mirrors
+                if self.endpoints is not None:
+                    from .endpoints import EndpointAdapter
+                    self._adapter = EndpointAdapter(self.endpoints, self._adapter)
+
+            return self._adapter
+
+    # -----------------------------------------------------------------
+
+    def bound(self):
+
+        """
+        This function returns a context in which the requests of this thread that depend on each other's server-side
+        state go to the same archive endpoint (see endpoints.EndpointAdapter.bound)
+        :return:
+        """
+
+        adapter = self.adapter
+        return adapter.bound() if hasattr(adapter, "bound") else unbound()
+
+    # -----------------------------------------------------------------
+
+    @property
+    def cookies(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Import here to enable this module to be imported with a clean python install
+        from requests.cookies import RequestsCookieJar
+
+        with self._lock:
+            if self._cookies is None: self._cookies = RequestsCookieJar() # cookielib jars are thread-safe
+            return self._cookies
+
+    # -----------------------------------------------------------------
+
+    def create_session(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Import here to enable this module to be imported with a clean python install
+        import requests
+
+        session = requests.session()
+
+        # Use the shared connection pools and cookies
+        adapter = self.adapter
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.cookies = self.cookies
+
+        # Keep track of the sessions
+        with self._lock: self._sessions.append(session)
+
+        # Return the session
+        return session
+
+    # -----------------------------------------------------------------
+
+    @property
+    def session(self):
+
+        """
+        This function returns the session of the current thread
+        :return:
+        """
+
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self.create_session()
+            self._local.session = session
+        return session
+
+    # -----------------------------------------------------------------
+
+    def close(self):
+
+        """
+        This function closes all connections (new sessions are created on next use)
+        :return:
+        """
+
+        with self._lock:
+            sessions = self._sessions
+            adapter = self._adapter
+            self._sessions = []
+            self._adapter = None
+            self._local = threading.local()
+
+        for session in sessions: session.close()
+        if adapter is not None: adapter.close()
+
+    # -----------------------------------------------------------------
+
+    def reset(self):
+
+        """
+        This function closes all connections and forgets all cookies
+        :return:
+        """
+
+        self.close()
+        with self._lock: self._cookies = None
+
+# -----------------------------------------------------------------
+
+# The pool that is used when no session is given
+default_pool = SessionPool()
+
+# -----------------------------------------------------------------
+
+# Ask for compressed transfer (decoded transparently, also when streaming)
+compressed_headers = {"Accept-Encoding": "gzip, deflate"}
+
+# -----------------------------------------------------------------
+
+def format_size(nbytes):
+
+    """
+    This function ...
+    :param nbytes:
+    :return:
+    """
+
+    for unit in ["B", "KB", "MB", "GB"]:
+        if nbytes < 1024. or unit == "GB": break
+        nbytes /= 1024.
+    return (str(int(nbytes)) if unit == "B" else "{:.1f}".format(nbytes)) + " " + unit
+
+# -----------------------------------------------------------------
+
+class TransferStatistics(object):
+
+    """
+    This class keeps track of the number of bytes that were transferred (on the wire) and the number of bytes after
+    decoding (written to disk), for each download
+    """
+
+    def __init__(self):
+
+        """
+        The constructor ...
+        """
+
+        self._lock = threading.Lock()
+
+        # (url, wire bytes, decoded bytes) for each download
+        self.downloads = []
+
+    # -----------------------------------------------------------------
+
+    def add(self, url, wire, decoded):
+
+        """
+        This function ...
+        :param url:
+        :param wire:
+        :param decoded:
+        :return:
+        """
+
+        with self._lock: self.downloads.append((url, wire, decoded))
+
+    # -----------------------------------------------------------------
+
+    @property
+    def wire_bytes(self):
+        with self._lock: return sum(download[1] for download in self.downloads)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def decoded_bytes(self):
+        with self._lock: return sum(download[2] for download in self.downloads)
+
+    # -----------------------------------------------------------------
+
+    def clear(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        with self._lock: self.downloads = []
+
+    # -----------------------------------------------------------------
+
+    def report(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        wire = self.wire_bytes
+        decoded = self.decoded_bytes
+        saved = 100. * (1. - wire / decoded) if decoded > 0 else 0.
+        print(str(len(self.downloads)) + " downloads: " + format_size(wire) + " transferred, " + format_size(decoded) +
+              " decoded (" + str(round(saved, 1)) + "% saved by compression)")
+
+# -----------------------------------------------------------------
+
+# The statistics of all downloads
+transfer_statistics = TransferStatistics()
+
+# -----------------------------------------------------------------
+
+# Buffer sizes for streaming to files: the buffer starts at the chunk size and grows up to the maximum
+min_buffer_size = 64*1024
+max_buffer_size = 4*1024**2
+
+# Time between progress bar updates (in seconds)
+progress_interval = 0.2
+
+# -----------------------------------------------------------------
+
+def iter_buffers(r, chunk_size=min_buffer_size):
+
+    """
+    This function yields the (decoded) content of a streamed response as memoryviews of one reused buffer, which grows
+    (up to max_buffer_size) as long as the reads fill it. Each view is only valid until the next one is yielded.
+    :param r:
+    :param chunk_size: the initial buffer size
+    :return:
+    """
+
+    size = min(max(chunk_size, min_buffer_size), max_buffer_size)
+    encoding = r.headers.get("content-encoding", "identity")
+
+    # Read directly into the buffer (only without compression: decoded reads can be larger than asked)
+    if r.raw is not None and encoding == "identity" and hasattr(r.raw, "readinto"):
+
+        # Import here to enable this module to be imported with a clean python install
+        from requests.exceptions import ChunkedEncodingError, ConnectionError, ContentDecodingError
+        from urllib3.exceptions import ProtocolError, ReadTimeoutError, DecodeError
+
+        buffer = bytearray(max_buffer_size)
+        view = memoryview(buffer)
+
+        while True:
+
+            # Raise the same errors as requests does when it reads the content (iter_content)
+            try: nbytes = r.raw.readinto(view[:size])
+            except ProtocolError as e: raise ChunkedEncodingError(e)
+            except ReadTimeoutError as e: raise ConnectionError(e)
+            except DecodeError as e: raise ContentDecodingError(e)
+
+            if not nbytes: break
+            if limiter is not None: limiter.acquire_bytes(r.url, nbytes)
+            yield view[:nbytes]
+
+            # Grow
+            if nbytes == size and size < max_buffer_size: size = min(2 * size, max_buffer_size)
+
+    # Decoded chunks
+    else:
+        tell = getattr(r.raw, "tell", None)
+        position = tell() if tell is not None else 0
+        for chunk in r.iter_content(chunk_size=size):
+            if not chunk: continue # filter out keep-alive new chunks
+
+            # Count the bytes on the wire
+            if limiter is not None:
+                previous, position = position, (tell() if tell is not None else position + len(chunk))
+                limiter.acquire_bytes(r.url, position - previous)
+
+            yield memoryview(chunk)
+
+# -----------------------------------------------------------------
+
+def write_response(r, f, chunk_size=min_buffer_size, progress_bar=False, fsync=True):
+
+    """
+    This function writes the (decoded) content of a streamed response to a file, and records the number of bytes on
+    the wire and after decoding
+    :param r:
+    :param f:
+    :param chunk_size: the initial buffer size
+    :param progress_bar: show the progress (of the transfer)
+    :param fsync: make sure the file is on disk when the function returns
+    :return: (wire bytes, decoded bytes)
+    """
+
+    # The size on the wire (compressed size when the server compressed the content)
+    content_length = r.headers.get("content-length")
+    total_length = int(content_length) if content_length is not None and content_length.isdigit() else None
+
+    # No raw stream for responses from the cache
+    tell = getattr(r.raw, "tell", None)
+
+    # Progress bar in kilobytes transferred
+    bar = progress.Bar(expected_size=max(total_length // 1024, 1)) if progress_bar and total_length is not None and tell is not None else None
+    last_update = time.time()
+
+    # Write the content
+    decoded = 0
+    try:
+        for view in iter_buffers(r, chunk_size=chunk_size):
+            f.write(view)
+            decoded += len(view)
+
+            # Update the progress bar now and then
+            if bar is not None and time.time() - last_update > progress_interval:
+                bar.show(min(tell() // 1024, bar.expected_size))
+                last_update = time.time()
+
+        if bar is not None: bar.show(bar.expected_size)
+
+    finally:
+        if bar is not None: bar.done()
+
+    # Write to disk
+    if fsync:
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Record
+    wire = tell() if tell is not None else 0
+    transfer_statistics.add(r.url, wire, decoded)
+
+    # Inform the user about the compression
+    encoding = r.headers.get("content-encoding")
+    if encoding is not None and encoding != "identity": print("Transferred " + format_size(wire) + " (" + encoding + ") for " + format_size(decoded))
+
+    # Return the sizes
+    return wire, decoded
+
+# -----------------------------------------------------------------
+
+def get_session():
+
+    """
+    This function returns the session of the current thread from the default pool
+    :return:
+    """
+
+    return default_pool.session
+
+# -----------------------------------------------------------------
+
+def configure_pool(pool_size=10, max_retries=0, block=False, cache=None, endpoints=None):
+
+    """
+    This function replaces the default pool
+    :param pool_size:
+    :param max_retries:
+    :param block:
+    :param cache:
+    :param endpoints:
+    :return:
+    """
+
+    global default_pool
+    default_pool.close()
+    default_pool = SessionPool(pool_size=pool_size, max_retries=max_retries, block=block, cache=cache, endpoints=endpoints)
+    return default_pool
+
+# -----------------------------------------------------------------
+
 def exists(url):
 
     """
@@ -26,8 +505,6 @@ def exists(url):
     :return:
     """
 
-    from urlparse import urlparse
-
     p = urlparse(url)
     conn = httplib.HTTPConnection(p.netloc)
     conn.request('HEAD', p.path)
@@ -36,7 +513,234 @@ def exists(url):
 
 # -----------------------------------------------------------------
 
-def download_and_decompress_file(url, path, remove=True, overwrite=False, progress_bar=False):
+# The compressed formats that can be decompressed while downloading
+streamable_extensions = [".gz", ".bz2"]
+
+# -----------------------------------------------------------------
+
+def is_streamable(filename):
+
+    """
+    This function ...
+    :param filename:
+    :return:
+    """
+
+    return any(filename.endswith(extension) for extension in streamable_extensions)
+
+# -----------------------------------------------------------------
+
+def get_decompressed_name(filename):
+
+    """
+    This function ...
+    :param filename:
+    :return:
+    """
+
+    for extension in streamable_extensions:
+        if filename.endswith(extension): return filename[:-len(extension)]
+    raise ValueError("Unrecognized compression (must be " + " or ".join(streamable_extensions) + "): " + filename)
+
+# -----------------------------------------------------------------
+
+class DecompressingWriter(object):
+
+    """
+    This class is a file-like object that decompresses the gzip or bz2 data written to it into another file
+    (files with several compressed streams one after the other are supported)
+    """
+
+    def __init__(self, f, filename):
+
+        """
+        The constructor ...
+        :param f: the file for the decompressed data
+        :param filename: the name of the compressed file (to determine the format)
+        """
+
+        self.f = f
+        self.bz2 = filename.endswith(".bz2")
+        self.decompressor = self.create_decompressor()
+
+        # The number of decompressed bytes
+        self.written = 0
+
+    # -----------------------------------------------------------------
+
+    def create_decompressor(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if self.bz2: return bz2.BZ2Decompressor()
+        else: return zlib.decompressobj(16 + zlib.MAX_WBITS) # gzip header and trailer
+
+    # -----------------------------------------------------------------
+
+    def write(self, data):
+
+        """
+        This function ...
+        :param data:
+        :return:
+        """
+
+        if self.bz2 and isinstance(data, memoryview): data = data.tobytes() # not accepted by the bz2 module of Python 2
+        while data:
+
+            decompressed = self.decompressor.decompress(data)
+            if decompressed:
+                self.f.write(decompressed)
+                self.written += len(decompressed)
+
+            # The next compressed stream
+            data = self.decompressor.unused_data
+            if data: self.decompressor = self.create_decompressor()
+
+    # -----------------------------------------------------------------
+
+    def close(self):
+
+        """
+        This function checks that the compressed data was complete
+        :return:
+        """
+
+        if not self.bz2:
+            remainder = self.decompressor.flush()
+            if remainder:
+                self.f.write(remainder)
+                self.written += len(remainder)
+
+        # Not known in Python 2
+        if not getattr(self.decompressor, "eof", True): raise IncompleteDownload("The compressed data ends before the end of the compressed stream")
+
+# -----------------------------------------------------------------
+
+def fetch_decompressed_file(url, filepath, session=None, chunk_size=min_buffer_size, progress_bar=False):
+
+    """
+    This function downloads a gzip or bz2 compressed file and decompresses it while it is received, so that the
+    compressed file is never written to disk. The decompressed file is written into a '.part' file that is moved
+    in place when it is complete.
+    :param url:
+    :param filepath: the path of the decompressed file
+    :param session:
+    :param chunk_size:
+    :param progress_bar:
+    :return: (wire bytes, decompressed bytes)
+    """
+
+    # Use the session of this thread from the pool
+    if session is None: session = get_session()
+
+    # Request (the data is already compressed)
+    r = session.get(url, headers={"Accept-Encoding": "identity"}, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+
+    part_path = filepath + ".part"
+    try:
+
+        r.raise_for_status()
+
+        # Decompress into the partial file
+        with open(part_path, "wb") as f:
+            writer = DecompressingWriter(f, os.path.basename(urlparse(url).path))
+            wire, _ = write_response(r, writer, chunk_size=chunk_size, progress_bar=progress_bar, fsync=False)
+            writer.close()
+            f.flush()
+            os.fsync(f.fileno())
+
+    except Exception:
+        if os.path.isfile(part_path): os.remove(part_path)
+        raise
+
+    finally: r.close()
+
+    # Check that everything was received
+    content_length = r.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and wire != int(content_length):
+        os.remove(part_path)
+        raise IncompleteDownload("Incomplete download of '" + url + "': received " + str(wire) + " of " + content_length + " bytes")
+
+    # Move in place
+    os.rename(part_path, filepath)
+
+    # Return the sizes
+    return wire, writer.written
+
+# -----------------------------------------------------------------
+
+def finish_process(process):
+
+    """
+    This function closes the input of a process and waits for it to finish
+    :param process:
+    :return: the return code
+    """
+
+    try: process.stdin.close()
+    except (IOError, OSError): pass # broken pipe: the process has stopped reading
+    return process.wait()
+
+# -----------------------------------------------------------------
+
+def fetch_and_extract_directory(url, path, session=None, strip_components=0, chunk_size=min_buffer_size, progress_bar=False):
+
+    """
+    This function downloads a tar archive (.tar.gz or .tar.bz2) and extracts it while it is received, by streaming
+    the data into tar, so that the archive is never written to disk (and decompression runs in parallel with the transfer)
+    :param url:
+    :param path: the directory to extract into
+    :param session:
+    :param strip_components: the number of leading directories to strip from the paths in the archive
+    :param chunk_size:
+    :param progress_bar:
+    :return: the number of bytes on the wire
+    """
+
+    # Use the session of this thread from the pool
+    if session is None: session = get_session()
+
+    # The tar command
+    compression = "-j" if urlparse(url).path.endswith(".bz2") else "-z"
+    command = ["tar", "-x", compression, "-f", "-", "-C", path]
+    if strip_components > 0: command.append("--strip-components=" + str(strip_components))
+
+    # Request (the data is already compressed)
+    r = session.get(url, headers={"Accept-Encoding": "identity"}, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+
+    try:
+
+        r.raise_for_status()
+
+        # Feed the response to tar
+        process = Popen(command, stdin=PIPE)
+        try: wire, _ = write_response(r, process.stdin, chunk_size=chunk_size, progress_bar=progress_bar, fsync=False)
+        except Exception as error:
+
+            # When tar stops early (e.g. for a corrupt archive), writing fails with a broken pipe: report the tar error
+            if finish_process(process) != 0: raise IOError("Extracting '" + url + "' failed (tar exited with code " + str(process.returncode) + ")")
+            raise error
+
+        returncode = finish_process(process)
+
+    finally: r.close()
+
+    # Check
+    if returncode != 0: raise IOError("Extracting '" + url + "' failed (tar exited with code " + str(returncode) + ")")
+    content_length = r.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and wire != int(content_length):
+        raise IncompleteDownload("Incomplete download of '" + url + "': received " + str(wire) + " of " + content_length + " bytes")
+
+    # Return the number of bytes
+    return wire
+
+# -----------------------------------------------------------------
+
+def download_and_decompress_file(url, path, remove=True, overwrite=False, progress_bar=False, stream=True, session=None):
 
     """
     This function ...
@@ -45,20 +749,39 @@ def download_and_decompress_file(url, path, remove=True, overwrite=False, progre
     :param remove:
     :param overwrite:
     :param progress_bar:
+    :param stream: decompress while downloading (for gzip and bz2), instead of decompressing the downloaded file
+    :param session:
     :return:
     """
 
     # Check if path is a directory
     if not os.path.isdir(path): raise ValueError("Second argument must be an existing directory")
 
+    # Decompress while downloading
+    filename = os.path.basename(urlparse(url).path)
+    if stream and is_streamable(filename):
+
+        # Check filepath
+        filepath = os.path.join(path, get_decompressed_name(filename))
+        if os.path.isfile(filepath):
+            if overwrite: os.remove(filepath)
+            else: raise IOError("File is already present: " + filepath)
+
+        # Inform the user
+        print("Downloading and decompressing '" + filename + "' to '" + path + "' ...")
+
+        # Download
+        fetch_decompressed_file(url, filepath, session=session, progress_bar=progress_bar)
+        return filepath
+
     # Download the file and decompress
-    filepath = download_file(url, path, overwrite=overwrite, progress_bar=progress_bar)
+    filepath = download_file(url, path, overwrite=overwrite, progress_bar=progress_bar, session=session)
     decompressed_filepath = archive.decompress_file_in_place(filepath, remove=remove)
     return decompressed_filepath
 
 # -----------------------------------------------------------------
 
-def download_and_decompress_directory(url, path, remove=True, overwrite=False, progress_bar=False, into_root=False):
+def download_and_decompress_directory(url, path, remove=True, overwrite=False, progress_bar=False, into_root=False, stream=True, session=None):
 
     """
     This function ...
@@ -68,12 +791,44 @@ def download_and_decompress_directory(url, path, remove=True, overwrite=False, p
     :param overwrite:
     :param progress_bar:
     :param into_root:
+    :param stream: extract while downloading, instead of extracting the downloaded archive
+    :param session:
     :return:
     """
 
     # Check if path is a directory
     if not os.path.isdir(path): raise ValueError("Second argument must be an existing directory")
 
+    # Extract while downloading
+    filename = os.path.basename(urlparse(url).path)
+    if stream and (filename.endswith(".tar.gz") or filename.endswith(".tar.bz2")):
+
+        # Inform the user
+        print("Downloading and extracting '" + filename + "' to '" + path + "' ...")
+
+        # Extract into a temporary directory, so that nothing is left behind when the download or extraction fails
+        # (the archive contains a directory with the name of the archive)
+        temp_path = tempfile.mkdtemp(dir=path, prefix=".extract_")
+        try:
+
+            fetch_and_extract_directory(url, temp_path, session=session, strip_components=1 if into_root else 0, progress_bar=progress_bar)
+
+            # Check what is already present
+            names = os.listdir(temp_path)
+            present = [name for name in names if os.path.lexists(os.path.join(path, name))]
+            if len(present) > 0 and not overwrite: raise IOError("Already present in '" + path + "': " + ", ".join(present))
+            for name in present:
+                target = os.path.join(path, name)
+                if os.path.isdir(target) and not os.path.islink(target): shutil.rmtree(target)
+                else: os.remove(target)
+
+            # Move in place
+            for name in names: os.rename(os.path.join(temp_path, name), os.path.join(path, name))
+
+        finally: shutil.rmtree(temp_path, ignore_errors=True)
+
+        return path if into_root else os.path.join(path, filename.rsplit(".tar.", 1)[0])
+
     # Download the file and decompress into directory
     filepath = download_file(url, path, overwrite=overwrite, progress_bar=progress_bar)
     decompressed_path = archive.decompress_directory_in_place(filepath, remove=remove, into_root=into_root)
@@ -106,15 +861,428 @@ def download_file_no_requests(url, path, overwrite=False):
     print("Downloading '" + filename + "' to '" + path + "' ...")
     print("URL: " + url)
 
-    # Download
-    urllib.urlretrieve(url, filepath)
+    # Download, with compressed transfer
+    response = urlopen(Request(url, headers=compressed_headers), timeout=600)
+    encoding = response.info().get("Content-Encoding", "identity")
+    if encoding == "gzip": decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate": decompressor = zlib.decompressobj()
+    else: decompressor = None
+
+    wire = decoded = 0
+    try:
+        with open(filepath, 'wb') as f:
+            while True:
+                chunk = response.read(64*1024)
+                if not chunk: break
+                wire += len(chunk)
+                if decompressor is not None: chunk = decompressor.decompress(chunk)
+                f.write(chunk)
+                decoded += len(chunk)
+            if decompressor is not None:
+                chunk = decompressor.flush()
+                f.write(chunk)
+                decoded += len(chunk)
+    finally: response.close()
+
+    # Record
+    transfer_statistics.add(url, wire, decoded)
+    if decompressor is not None: print("Transferred " + format_size(wire) + " (" + encoding + ") for " + format_size(decoded))
 
     # Return the file path
     return filepath
 
 # -----------------------------------------------------------------
 
-def download_file(url, path, new_name=None, overwrite=False, progress_bar=False, stream=False, chunk_size=1024, session=None):
+class IncompleteDownload(IOError):
+
+    """
+    This class is the error for transfers that ended before all bytes were received
+    """
+
+    pass
+
+# -----------------------------------------------------------------
+
+class RangeNotSupported(IOError):
+
+    """
+    This class ...
+    """
+
+    pass
+
+# -----------------------------------------------------------------
+
+def parse_content_range(header):
+
+    """
+    This function parses a Content-Range header ('bytes start-end/total' or 'bytes */total')
+    :param header:
+    :return: (start, total), with None for unknown values
+    """
+
+    if header is None or not header.startswith("bytes "): return None, None
+    byte_range, _, total = header[6:].partition("/")
+    start = int(byte_range.split("-")[0]) if byte_range != "*" else None
+    total = int(total) if total.isdigit() else None
+    return start, total
+
+# -----------------------------------------------------------------
+
+def fetch_file(url, filepath, session=None, chunk_size=64*1024, progress_bar=False, resume=True):
+
+    """
+    This function downloads a file into a '.part' file, which is moved in place when it is complete.
+    When a '.part' file of an earlier, interrupted download exists, only the remaining bytes are requested.
+    :param url:
+    :param filepath:
+    :param session:
+    :param chunk_size:
+    :param progress_bar:
+    :param resume:
+    :return: (wire bytes, decoded bytes)
+    """
+
+    # Use the session of this thread from the pool
+    if session is None: session = get_session()
+
+    # The partial file, and the validators of the remote file it was downloaded from
+    part_path = filepath + ".part"
+    meta_path = part_path + ".meta"
+
+    # Load the state of the earlier download
+    meta = None
+    if resume and os.path.isfile(part_path) and os.path.isfile(meta_path):
+        try:
+            with open(meta_path, "r") as meta_file: meta = json.load(meta_file)
+        except ValueError: meta = None
+        if meta is not None and meta.get("url") != url: meta = None
+
+        # Without a validator, a change of the remote file can not be detected
+        if meta is not None and meta.get("etag") is None and meta.get("last_modified") is None: meta = None
+
+    # Start over
+    if meta is None:
+        for leftover in (part_path, meta_path):
+            if os.path.isfile(leftover): os.remove(leftover)
+
+    offset = os.path.getsize(part_path) if meta is not None else 0
+
+    # Request the remaining bytes. The partial file holds the decoded content, so ask for the content without
+    # compression: the offsets are then the same. If-Range makes the server send the full file if it has changed.
+    if offset > 0:
+        print("Resuming the download of '" + os.path.basename(filepath) + "' at " + format_size(offset) + " ...")
+        headers = {"Accept-Encoding": "identity", "Range": "bytes=" + str(offset) + "-"}
+        headers["If-Range"] = meta.get("etag") or meta.get("last_modified")
+    else: headers = compressed_headers
+
+    # Request
+    r = session.get(url, headers=headers, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+
+    try:
+
+        # The partial file is already complete, or does not match the remote file
+        if r.status_code == 416 and offset > 0:
+            _, total = parse_content_range(r.headers.get("content-range"))
+            if total == offset:
+                os.rename(part_path, filepath)
+                os.remove(meta_path)
+                return 0, 0
+            r.close()
+            return fetch_file(url, filepath, session=session, chunk_size=chunk_size, progress_bar=progress_bar, resume=False)
+
+        r.raise_for_status()
+
+        # The remaining bytes
+        if r.status_code == 206:
+
+            start, total = parse_content_range(r.headers.get("content-range"))
+            if start != offset:
+                r.close()
+                return fetch_file(url, filepath, session=session, chunk_size=chunk_size, progress_bar=progress_bar, resume=False)
+            mode = "ab"
+
+        # The complete file
+        else:
+
+            encoding = r.headers.get("content-encoding", "identity")
+            content_length = r.headers.get("content-length")
+            total = int(content_length) if encoding == "identity" and content_length is not None and content_length.isdigit() else None
+            mode = "wb"
+
+            # Save the validators (weak ETags can not be used with If-Range)
+            etag = r.headers.get("etag")
+            if etag is not None and etag.startswith("W/"): etag = None
+            with open(meta_path, "w") as meta_file: json.dump({"url": url, "etag": etag, "last_modified": r.headers.get("last-modified")}, meta_file)
+
+        # Write
+        with open(part_path, mode) as f: wire, decoded = write_response(r, f, chunk_size=chunk_size, progress_bar=progress_bar)
+
+    finally: r.close()
+
+    # Check that everything was received (the partial file is kept, for the next attempt)
+    content_length = r.headers.get("content-length")
+    if wire > 0 and content_length is not None and content_length.isdigit() and wire != int(content_length):
+        raise IncompleteDownload("Incomplete download of '" + url + "': received " + str(wire) + " of " + content_length + " bytes")
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise IncompleteDownload("Incomplete download of '" + url + "': " + str(size) + " of " + str(total) + " bytes")
+
+    # Move in place
+    os.rename(part_path, filepath)
+    os.remove(meta_path)
+
+    # Return the sizes
+    return wire, decoded
+
+# -----------------------------------------------------------------
+
+def fetch_file_segmented(url, filepath, session=None, nsegments=4, min_segment_size=4*1024**2, chunk_size=256*1024, progress_bar=False, pool=None):
+
+    """
+    This function downloads a file as byte ranges over several connections at once, written into a preallocated
+    '.part' file that is moved in place when complete. It falls back to fetch_file (one stream) when the server does
+    not support ranges, or when the file is too small to be split.
+    :param url:
+    :param filepath:
+    :param session: one session for all segments (sessions are not thread-safe: prefer a pool)
+    :param nsegments: the maximum number of segments (connections)
+    :param min_segment_size: the minimum size of a segment (in bytes)
+    :param chunk_size:
+    :param progress_bar:
+    :param pool: the SessionPool that gives each segment thread its own session (default: the default pool)
+    :return: (wire bytes, decoded bytes)
+    """
+
+    def get_session_for_thread():
+        if session is not None: return session
+        return (pool if pool is not None else default_pool).session
+
+    # Determine the size, and whether the server supports ranges
+    r = get_session_for_thread().head(url, headers={"Accept-Encoding": "identity"}, allow_redirects=True, timeout=(60,600))
+    content_length = r.headers.get("content-length")
+    size = int(content_length) if r.status_code == 200 and content_length is not None and content_length.isdigit() else None
+    ranges = r.headers.get("accept-ranges", "none").lower() == "bytes"
+    etag = r.headers.get("etag")
+    validator = etag if etag is not None and not etag.startswith("W/") else r.headers.get("last-modified")
+
+    # Determine the segments
+    nsegments = min(nsegments, size // min_segment_size) if size is not None else 0
+    if not ranges or nsegments < 2: return fetch_file(url, filepath, session=get_session_for_thread(), chunk_size=chunk_size, progress_bar=progress_bar)
+    bounds = [size * index // nsegments for index in range(nsegments + 1)]
+    segments = [(bounds[index], bounds[index + 1] - 1) for index in range(nsegments)]
+
+    # Preallocate the partial file (without a '.part.meta' file, so that fetch_file will never try to resume it)
+    part_path = filepath + ".part"
+    for leftover in (part_path, part_path + ".meta"):
+        if os.path.isfile(leftover): os.remove(leftover)
+    with open(part_path, "wb") as f: f.truncate(size)
+
+    # Progress
+    lock = threading.Lock()
+    received = [0]
+    bar = progress.Bar(expected_size=max(size // 1024, 1)) if progress_bar else None
+
+    def fetch_segment(segment):
+
+        start, end = segment
+        headers = {"Accept-Encoding": "identity", "Range": "bytes=" + str(start) + "-" + str(end)}
+        if validator is not None: headers["If-Range"] = validator
+
+        r = get_session_for_thread().get(url, headers=headers, stream=True, timeout=(60,600))
+        try:
+
+            r.raise_for_status()
+
+            # The server sent the complete file (ranges not honoured, or the file changed)
+            if r.status_code != 206 or parse_content_range(r.headers.get("content-range"))[0] != start:
+                raise RangeNotSupported("Range request not honoured for '" + url + "'")
+
+            # Positional writes, in a file object of this segment
+            position = start
+            with open(part_path, "r+b") as f:
+                f.seek(start)
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    if not chunk: continue
+                    if limiter is not None: limiter.acquire_bytes(url, len(chunk))
+                    chunk = chunk[:end + 1 - position] # ignore bytes beyond the segment
+                    f.write(chunk)
+                    position += len(chunk)
+                    with lock:
+                        received[0] += len(chunk)
+                        if bar is not None: bar.show(min(received[0] // 1024, bar.expected_size))
+                    if position > end: break
+
+        finally: r.close()
+
+        # Check
+        if position != end + 1: raise IncompleteDownload("Incomplete segment " + str(start) + "-" + str(end) + " of '" + url + "': " + str(position - start) + " bytes")
+
+    # Fetch the segments simultaneously
+    workers = ThreadPool(nsegments)
+    try: workers.map(fetch_segment, segments)
+    except RangeNotSupported:
+        os.remove(part_path)
+        return fetch_file(url, filepath, session=get_session_for_thread(), chunk_size=chunk_size, progress_bar=progress_bar)
+    except Exception:
+        os.remove(part_path)
+        raise
+    finally:
+        workers.close()
+        if bar is not None: bar.done()
+
+    # Write to disk
+    with open(part_path, "r+b") as f: os.fsync(f.fileno())
+
+    # Move in place
+    os.rename(part_path, filepath)
+
+    # Record
+    transfer_statistics.add(url, size, size)
+    return size, size
+
+# -----------------------------------------------------------------
+
+class SpillBuffer(object):
+
+    """
+    This class is a file-like buffer that is kept in memory until it grows larger than a maximum size,
+    after which it is moved to a temporary file
+    """
+
+    def __init__(self, max_size=None, path=None):
+
+        """
+        The constructor ...
+        :param max_size: the maximum size (in bytes) kept in memory (None for no maximum)
+        :param path: the directory for the temporary file (default: the system temporary directory)
+        """
+
+        self.max_size = max_size
+        self.path = path
+
+        # The buffer
+        self.file = BytesIO()
+        self.spilled = False
+
+    # -----------------------------------------------------------------
+
+    def spill(self):
+
+        """
+        This function moves the contents to a temporary file
+        :return:
+        """
+
+        if self.spilled: return
+        temp_file = tempfile.NamedTemporaryFile(dir=self.path, prefix="dustpedia_", delete=False)
+        temp_file.write(self.file.getvalue())
+        self.file.close()
+        self.file = temp_file
+        self.spilled = True
+
+    # -----------------------------------------------------------------
+
+    def write(self, data):
+
+        """
+        This function ...
+        :param data:
+        :return:
+        """
+
+        if not self.spilled and self.max_size is not None and self.file.tell() + len(data) > self.max_size: self.spill()
+        self.file.write(data)
+
+    # -----------------------------------------------------------------
+
+    def open(self):
+
+        """
+        This function returns a read-only file object with the contents, positioned at the start. The temporary file
+        is removed from the directory right away, so that it disappears when the file object is closed
+        (on Windows, it is left in the temporary directory).
+        :return:
+        """
+
+        # In memory
+        if not self.spilled:
+            self.file.seek(0)
+            return self.file
+
+        # Reopen the temporary file for reading
+        name = self.file.name
+        self.file.close()
+        fileobj = open(name, "rb")
+        try: os.remove(name)
+        except OSError: pass
+        return fileobj
+
+    # -----------------------------------------------------------------
+
+    def close(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        self.file.close()
+        if self.spilled and os.path.isfile(self.file.name): os.remove(self.file.name)
+
+# -----------------------------------------------------------------
+
+def fetch_buffer(url, session=None, max_memory=None, spill_path=None, chunk_size=min_buffer_size, progress_bar=False):
+
+    """
+    This function downloads a file into memory, or into a temporary file when it is larger than max_memory
+    :param url:
+    :param session:
+    :param max_memory: the maximum size (in bytes) to keep in memory (None for no maximum)
+    :param spill_path: the directory for the temporary file
+    :param chunk_size:
+    :param progress_bar:
+    :return: a read-only file object positioned at the start (see SpillBuffer.open)
+    """
+
+    # Use the session of this thread from the pool
+    if session is None: session = get_session()
+
+    # Request
+    r = session.get(url, headers=compressed_headers, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+
+    try:
+
+        r.raise_for_status()
+
+        # Write straight to a temporary file when the file is known to be too large
+        buf = SpillBuffer(max_memory, spill_path)
+        content_length = r.headers.get("content-length")
+        encoding = r.headers.get("content-encoding", "identity")
+        total = int(content_length) if encoding == "identity" and content_length is not None and content_length.isdigit() else None
+        if total is not None and max_memory is not None and total > max_memory: buf.spill()
+
+        # Write
+        try: write_response(r, buf, chunk_size=chunk_size, progress_bar=progress_bar, fsync=False)
+        except Exception:
+            buf.close()
+            raise
+
+    finally: r.close()
+
+    # Check that everything was received
+    size = buf.file.tell()
+    if total is not None and size != total:
+        buf.close()
+        raise IncompleteDownload("Incomplete download of '" + url + "': " + str(size) + " of " + str(total) + " bytes")
+
+    # Return the file, positioned at the start
+    return buf.open()
+
+# -----------------------------------------------------------------
+
+def download_file(url, path, new_name=None, overwrite=False, progress_bar=False, stream=False, chunk_size=min_buffer_size, session=None, resume=True, segments=1,
+                  pool=None):
 
     """
     This function ...
@@ -126,12 +1294,12 @@ def download_file(url, path, new_name=None, overwrite=False, progress_bar=False,
     :param stream
     :param chunk_size:
     :param session:
+    :param resume: continue an interrupted download (see fetch_file)
+    :param segments: download large files as this number of byte ranges at once (see fetch_file_segmented)
+    :param pool: the SessionPool to take the sessions from (default: the default pool)
     :return:
     """
 
-    # Import here to enable this module to be imported with a clean python install
-    import requests
-
     # Get the name of the file
     if new_name is not None: filename = new_name
     else: filename = os.path.basename(url)
@@ -148,68 +1316,149 @@ def download_file(url, path, new_name=None, overwrite=False, progress_bar=False,
     print("Downloading '" + filename + "' to '" + path + "' ...")
     print("URL: " + url)
 
-    # Show progress bar, so stream
-    if progress_bar:
+    # Download (each segment with the session of its own thread)
+    if segments > 1: fetch_file_segmented(url, filepath, session=session, nsegments=segments, progress_bar=progress_bar, pool=pool)
+    else:
 
-        # Request
-        if session is None: session = requests.session()
-        r = session.get(url, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+        # Use the session of this thread from the pool
+        if session is None: session = (pool if pool is not None else default_pool).session
+        fetch_file(url, filepath, session=session, chunk_size=chunk_size, progress_bar=progress_bar, resume=resume)
 
-        # Open the local file
-        with open(filepath, 'wb') as f:
+    # Return the file path
+    return filepath
 
-            total_length = int(r.headers.get('content-length'))
-            for chunk in progress.bar(r.iter_content(chunk_size=chunk_size), expected_size=(total_length / chunk_size) + 1):
-                if chunk:
-                    f.write(chunk)
-                    f.flush()
+# -----------------------------------------------------------------
 
-    # User wants streaming
-    elif stream:
+def download_file_if_modified(url, path, new_name=None, session=None, chunk_size=64*1024):
 
-        # Request
-        if session is None: session = requests.session()
-        r = session.get(url, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+    """
+    This function keeps a local copy of a remote file up to date. When a copy exists, it is revalidated with the
+    ETag / Last-Modified validators that were saved with it (If-None-Match / If-Modified-Since), or, if the server
+    gave none, with a HEAD request comparing the size and the modification date. The file is only transferred again
+    when it changed.
+    :param url:
+    :param path: directory or file path
+    :param new_name:
+    :param session:
+    :param chunk_size:
+    :return: the file path
+    """
 
-        # Open the local file, and load the content in it
-        with open(filepath, 'wb') as f:
+    # Determine the local path to the file
+    filename = new_name if new_name is not None else os.path.basename(url)
+    filepath = os.path.join(path, filename) if os.path.isdir(path) else path
+    meta_path = filepath + ".meta"
 
-            for chunk in r.iter_content(chunk_size=chunk_size):
-                if chunk:  # filter out keep-alive new chunks
-                    f.write(chunk)
-                    # f.flush() # commented by recommendation from J.F.Sebastian
+    # Use the session of this thread from the pool
+    if session is None: session = get_session()
 
-    # Regular download
-    elif session is not None:
+    # Load the validators of the local copy
+    meta = None
+    if os.path.isfile(filepath) and os.path.isfile(meta_path):
+        try:
+            with open(meta_path, "r") as meta_file: meta = json.load(meta_file)
+        except ValueError: meta = None
 
-        # Request
-        if session is None: session = requests.session()
-        r = session.get(url, timeout=(60,600)) # (connect timeout, read timeout)
+    headers = dict()
+    if meta is not None:
 
-        # Open the local file, and load the content in it
-        with open(filepath, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=chunk_size):
-                if chunk:  # filter out keep-alive new chunks
-                    f.write(chunk)
+        # Conditional request
+        if meta.get("etag") is not None: headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified") is not None: headers["If-Modified-Since"] = meta["last_modified"]
+
+        # No validators: compare size and date
+        if len(headers) == 0:
+            r = session.head(url, headers=compressed_headers, allow_redirects=True, timeout=(60,600))
+            r.close()
+            size = r.headers.get("content-length")
+            modified = parsedate_tz(r.headers.get("last-modified", ""))
+            newer = modified is not None and mktime_tz(modified) > os.path.getmtime(filepath)
+            if r.status_code == 200 and size is not None and size == meta.get("content_length") and not newer:
+                print("Local copy of '" + filename + "' is up to date")
+                return filepath
+
+    # Request
+    headers.update(compressed_headers)
+    r = session.get(url, headers=headers, stream=True, timeout=(60,600)) # (connect timeout, read timeout)
+
+    try:
 
-    # Regular download , no session
-    else: urllib.urlretrieve(url, filepath)
+        # Not modified
+        if r.status_code == 304:
+            print("Local copy of '" + filename + "' is up to date")
+            return filepath
+
+        r.raise_for_status()
+
+        # Debugging
+        print("Downloading '" + filename + "' to '" + path + "' ...")
+        print("URL: " + url)
+
+        # Write to a temporary file (unique per process and thread), then replace the local copy
+        temp_path = filepath + "." + str(os.getpid()) + "." + str(threading.current_thread().ident) + ".tmp"
+        try:
+            with open(temp_path, 'wb') as f: write_response(r, f, chunk_size=chunk_size)
+        except Exception:
+            if os.path.isfile(temp_path): os.remove(temp_path)
+            raise
+        os.rename(temp_path, filepath)
+
+    finally: r.close()
+
+    # Save the validators
+    meta = {"url": url, "etag": r.headers.get("etag"), "last_modified": r.headers.get("last-modified"), "content_length": r.headers.get("content-length")}
+    with open(meta_path, "w") as meta_file: json.dump(meta, meta_file)
 
     # Return the file path
     return filepath
 
 # -----------------------------------------------------------------
 
-def download_and_decompress_files(urls, path, remove=True, overwrite=False):
+def download_and_decompress_files(urls, path, remove=True, overwrite=False, stream=True, nthreads=8, per_host=4, progress_bar=True):
 
     """
     This function ...
     :param urls:
     :param path:
     :param remove:
+    :param overwrite:
+    :param stream: decompress while downloading (for gzip and bz2), instead of decompressing the downloaded files
+    :param nthreads: (when streaming)
+    :param per_host: (when streaming)
+    :param progress_bar:
     :return:
     """
 
+    # Decompress while downloading
+    if stream and all(is_streamable(os.path.basename(urlparse(url).path)) for url in urls):
+
+        # Import here to avoid a circular import
+        from .downloader import DownloadEngine
+
+        # Determine the paths, and check for files that are already present
+        filepaths = dict((url, os.path.join(path, get_decompressed_name(os.path.basename(urlparse(url).path)))) for url in urls)
+        for filepath in filepaths.values():
+            if not os.path.isfile(filepath): continue
+            if overwrite: os.remove(filepath)
+            else: raise IOError("File is already present: " + filepath)
+
+        # Debugging
+        print("Downloading and decompressing " + str(len(urls)) + " files to '" + path + "' ...")
+
+        def download(url):
+            filepath = filepaths[url]
+            wire, decoded = fetch_decompressed_file(url, filepath, session=engine.session)
+            return filepath, wire, decoded
+
+        # Download
+        engine = DownloadEngine(nthreads=nthreads, per_host=per_host, progress_bar=progress_bar)
+        result = engine.run(download, urls, label="Downloading ")
+        result.report()
+        result.raise_on_failure()
+
+        # Return the paths of the decompressed files
+        return [filepaths[url] for url in urls]
+
     # Debugging
     print("Downloading the files to '" + path + "' ...")
 
@@ -227,48 +1476,41 @@ def download_and_decompress_files(urls, path, remove=True, overwrite=False):
 
 # -----------------------------------------------------------------
 
-def download_files(urls, path, overwrite=False, info=None):
+def download_files(urls, path, overwrite=False, info=None, session=None, chunk_size=64*1024, nthreads=8, per_host=4, progress_bar=True,
+                   journal=False):
 
     """
-    This function ...
+    This function downloads files simultaneously (see downloader.DownloadEngine)
     :param urls:
     :param path:
     :param overwrite:
     :param info:
+    :param session: one session for all workers (default: a session per thread from the default pool)
+    :param chunk_size:
+    :param nthreads:
+    :param per_host: the maximum number of simultaneous downloads from one host
+    :param progress_bar:
+    :param journal: keep a journal in the directory, so that an interrupted call continues where it stopped when it is repeated
     :return:
     """
 
-    paths = []
+    # Import here to avoid a circular import
+    from .downloader import DownloadEngine
 
-    count = len(urls)
-
-    # Loop over the urls
-    index = 0
-    for url in urls:
-
-        filename = os.path.basename(url)
-        filepath = os.path.join(path, filename)
-
-        # Check if the file is present
-        if os.path.isfile(filepath):
-            if overwrite: os.remove(filepath)
-            else: raise IOError("File is already present: " + filepath)
-
-        # Debugging
-        if info is not None: print("Downloading '" + filename + "' to '" + path + "' ... (" + str(index+1) + " of " + str(count) + " " + info + ")")
-        else: print("Downloading '" + filename + "' to '" + path + "' ... (" + str(index+1) + " of " + str(count) + ")")
-        print("URL: " + url)
-
-        # Download
-        urllib.urlretrieve(url, filepath)
+    # Debugging
+    if info is not None: print("Downloading " + str(len(urls)) + " " + info + " to '" + path + "' ...")
+    else: print("Downloading " + str(len(urls)) + " files to '" + path + "' ...")
 
-        # If succesful, add the file path to the list
-        paths.append(filepath)
+    # Download
+    engine = DownloadEngine(nthreads=nthreads, per_host=per_host, session=session, chunk_size=chunk_size, progress_bar=progress_bar)
+    result = engine.download(urls, path, overwrite=overwrite, journal=journal if journal else None)
+    result.report()
 
-        index += 1
+    # Raise an error if not all files could be downloaded
+    result.raise_on_failure()
 
     # Return paths
-    return paths
+    return result.paths
 
 # -----------------------------------------------------------------
 
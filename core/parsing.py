@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import re
+from collections import OrderedDict
+from lxml import html, etree
+
+# -----------------------------------------------------------------
+
+# The results are always in the last table of the page
+last_table_xpath = etree.XPath("(//table)[last()]")
+
+# The rows of the results table (the first row holds the column headings)
+rows_xpath = etree.XPath(".//tr")
+
+# The first cell of a row holds the info box, the other cells hold the links
+first_cell_xpath = etree.XPath("(.//td)[1]")
+text_xpath = etree.XPath("string()")
+link_xpath = etree.XPath("(.//td)[position() > 1]//@*[name() = 'href' or name() = 'src']")
+
+# -----------------------------------------------------------------
+
+# Example info box:
+#  Name: NGC3031
+#  RA(2000): 148.888
+#  DEC(2000): 69.065
+#  Hubble Stage(T): 2.4
+#  Hubble Type: Sab
+#  V (km/s): -39
+#  D25 (arcmin): 21.4
+#  Inclination (deg.): 68.3
+
+def _field_regex(label):
+    return re.compile(r"^\s*" + re.escape(label) + r"\s*:[ \t]*(.*?)\s*$", re.MULTILINE)
+
+name_regex = _field_regex("Name")
+ra_regex = _field_regex("RA(2000)")
+dec_regex = _field_regex("DEC(2000)")
+stage_regex = _field_regex("Hubble Stage(T)")
+type_regex = _field_regex("Hubble Type")
+v_regex = _field_regex("V (km/s)")
+d25_regex = _field_regex("D25 (arcmin)")
+inclination_regex = _field_regex("Inclination (deg.)")
+
+# -----------------------------------------------------------------
+
+# Example MBB info box:
+#  Dust Temperature (K):
+#  22.6&plusmn0.7
+#  Dust Mass (M_sun):
+#  4900000&plusmn1000000
+#  Dust Luminosity (L_sun):
+#  2.10E+09&plusmn1.00E+08
+
+def _value_error_regex(label):
+    return re.compile(re.escape(label) + r"[^:\n]*:\s*([-+0-9.eE]+)\s*(?:(?:&plusmn;?|\xb1)\s*([-+0-9.eE]+))?")
+
+temperature_regex = _value_error_regex("Dust Temperature")
+mass_regex = _value_error_regex("Dust Mass")
+luminosity_regex = _value_error_regex("Dust Luminosity")
+
+# -----------------------------------------------------------------
+
+def get_results_table(page):
+
+    """
+    This function returns the last table of the page
+    :param page: page contents or a parsed tree
+    :return:
+    """
+
+    tree = html.fromstring(page) if isinstance(page, (bytes, type(u""))) else page
+    return last_table_xpath(tree)[-1]
+
+# -----------------------------------------------------------------
+
+def get_result_rows(page):
+
+    """
+    This function ...
+    :param page:
+    :return:
+    """
+
+    return rows_xpath(get_results_table(page))[1:]
+
+# -----------------------------------------------------------------
+
+def get_info_box(row):
+
+    """
+    This function ...
+    :param row:
+    :return:
+    """
+
+    cells = first_cell_xpath(row)
+    return text_xpath(cells[0]) if len(cells) > 0 else None
+
+# -----------------------------------------------------------------
+
+def get_info_boxes(page):
+
+    """
+    This function returns the text of the info box of each row of the results table
+    :param page:
+    :return:
+    """
+
+    boxes = []
+    for row in get_result_rows(page):
+        box = get_info_box(row)
+        if box is not None: boxes.append(box)
+    return boxes
+
+# -----------------------------------------------------------------
+
+def iter_info_boxes(stream):
+
+    """
+    This function yields the text of the galaxy info boxes while the page is being read from the stream,
+    discarding each row once it has been handled so that memory use does not grow with the number of rows
+    :param stream: file-like object with the page contents
+    :return:
+    """
+
+    for event, row in etree.iterparse(stream, events=("end",), tag="tr", html=True):
+
+        # Only rows of which the first cell is an info box (skips the heading row)
+        box = get_info_box(row)
+        if box is not None and name_regex.search(box) is not None: yield box
+
+        # Free the row and the rows before it
+        row.clear()
+        while row.getprevious() is not None: del row.getparent()[0]
+
+# -----------------------------------------------------------------
+
+def get_links(page):
+
+    """
+    This function returns the links (relative to the base URL) in the results table
+    :param page:
+    :return:
+    """
+
+    links = []
+    for row in get_result_rows(page): links.extend(str(link) for link in link_xpath(row))
+    return links
+
+# -----------------------------------------------------------------
+
+def _string(regex, text):
+    match = regex.search(text)
+    return match.group(1) if match is not None and match.group(1) else None
+
+# -----------------------------------------------------------------
+
+def _real(regex, text):
+    value = _string(regex, text)
+    try: return float(value) if value is not None else None
+    except ValueError: return None
+
+# -----------------------------------------------------------------
+
+def get_galaxy_name(box):
+
+    """
+    This function ...
+    :param box:
+    :return:
+    """
+
+    return _string(name_regex, box)
+
+# -----------------------------------------------------------------
+
+def get_galaxy_names(page):
+
+    """
+    This function ...
+    :param page:
+    :return:
+    """
+
+    return [get_galaxy_name(box) for box in get_info_boxes(page)]
+
+# -----------------------------------------------------------------
+
+def parse_galaxy_info(box):
+
+    """
+    This function parses the info box of a galaxy
+    :param box:
+    :return:
+    """
+
+    info = OrderedDict()
+    info["name"] = _string(name_regex, box)
+    info["ra"] = _real(ra_regex, box)
+    info["dec"] = _real(dec_regex, box)
+    info["stage"] = _real(stage_regex, box)
+    info["type"] = _string(type_regex, box)
+    info["v"] = _real(v_regex, box)
+    info["d25"] = _real(d25_regex, box)
+    info["inclination"] = _real(inclination_regex, box)
+    return info
+
+# -----------------------------------------------------------------
+
+def _value_and_error(regex, text):
+    match = regex.search(text)
+    if match is None: return None, None
+    value = float(match.group(1))
+    error = float(match.group(2)) if match.group(2) is not None else None
+    return value, error
+
+# -----------------------------------------------------------------
+
+def parse_black_body_info(box):
+
+    """
+    This function parses the info box of the MBB page of a galaxy
+    :param box:
+    :return: (temperature, temperature error, mass, mass error, luminosity, luminosity error), without units
+    """
+
+    temperature, temperature_error = _value_and_error(temperature_regex, box)
+    mass, mass_error = _value_and_error(mass_regex, box)
+    luminosity, luminosity_error = _value_and_error(luminosity_regex, box)
+    return temperature, temperature_error, mass, mass_error, luminosity, luminosity_error
+
+# -----------------------------------------------------------------
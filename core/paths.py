@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import os.path
+
+# -----------------------------------------------------------------
+
+# The directory where persistent DustPedia data (manifests, caches, ...) is kept
+user_path = os.environ.get("DUSTPEDIA_HOME", os.path.join(os.path.expanduser("~"), ".dustpedia"))
+
+# -----------------------------------------------------------------
+
+def create_user_directory(name=None):
+
+    """
+    This function ...
+    :param name:
+    :return:
+    """
+
+    path = os.path.join(user_path, name) if name is not None else user_path
+
+    # Check whether the directory does not exist yet
+    if not os.path.isdir(path):
+
+        # Create the directory (and its parents), another process may have beaten us to it
+        try: os.makedirs(path)
+        except OSError:
+            if not os.path.isdir(path): raise
+
+    # Return the path
+    return path
+
+# -----------------------------------------------------------------
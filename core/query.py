@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+from collections import OrderedDict
+
+# Import astronomical modules
+from astropy.table import Table
+
+# Import DustPedia modules
+from . import tables, types
+from .sample import ledawise_table_path
+
+# -----------------------------------------------------------------
+
+# Selection parameter -> LEDAWISE column (the parameters of page_link_from_parameters)
+range_columns = OrderedDict([("T", "t"), ("V", "v"), ("inclination", "incl"), ("D25", "d25")])
+
+# -----------------------------------------------------------------
+
+def real_column(column):
+
+    """
+    This function converts a (masked) table column to a float array, with NaN for missing or invalid values
+    :param column:
+    :return:
+    """
+
+    mask = np.ma.getmaskarray(column)
+    values = np.full(len(column), np.nan)
+    for index, value in enumerate(np.ma.getdata(column)):
+        if mask[index]: continue
+        try: values[index] = float(value)
+        except ValueError: pass
+    return values
+
+# -----------------------------------------------------------------
+
+def string_column(column):
+
+    """
+    This function ...
+    :param column:
+    :return:
+    """
+
+    mask = np.ma.getmaskarray(column)
+    data = np.ma.getdata(column)
+    return np.array([None if mask[index] else str(data[index]).strip() for index in range(len(column))], dtype=object)
+
+# -----------------------------------------------------------------
+
+class LocalQueryEngine(object):
+
+    """
+    This class answers galaxy selection queries from the bundled LEDAWISE table instead of the DustPedia archive
+    """
+
+    def __init__(self, path=ledawise_table_path):
+
+        """
+        The constructor ...
+        :param path:
+        """
+
+        # Load the table
+        table = Table.read(path)
+
+        # The galaxy properties
+        self.names = string_column(table["objname"])
+        self.ra = real_column(table["ra2000"])
+        self.dec = real_column(table["de2000"])
+        self.types = string_column(table["type"])
+        self.type_strings = np.array([hubble_type if hubble_type is not None else "" for hubble_type in self.types])
+        self.values = OrderedDict((parameter, real_column(table[column_name])) for parameter, column_name in range_columns.items())
+
+        # Sorted index for each range column (NaNs go to the end)
+        self.sorted_indices = dict()
+        self.sorted_values = dict()
+        self.nvalid = dict()
+        for parameter in self.values:
+            indices = np.argsort(self.values[parameter], kind="mergesort")
+            self.sorted_indices[parameter] = indices
+            self.sorted_values[parameter] = self.values[parameter][indices]
+            self.nvalid[parameter] = np.count_nonzero(~np.isnan(self.values[parameter]))
+
+    # -----------------------------------------------------------------
+
+    @property
+    def ngalaxies(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return len(self.names)
+
+    # -----------------------------------------------------------------
+
+    def range_mask(self, parameter, low=None, high=None):
+
+        """
+        This function returns the mask of galaxies with low <= value <= high, using the sorted index
+        :param parameter:
+        :param low:
+        :param high:
+        :return:
+        """
+
+        nvalid = self.nvalid[parameter]
+        values = self.sorted_values[parameter][:nvalid]
+
+        # Find the range in the sorted values
+        start = np.searchsorted(values, low, side="left") if low is not None else 0
+        end = np.searchsorted(values, high, side="right") if high is not None else nvalid
+
+        # Create the mask
+        mask = np.zeros(self.ngalaxies, dtype=bool)
+        mask[self.sorted_indices[parameter][start:end]] = True
+        return mask
+
+    # -----------------------------------------------------------------
+
+    def hubble_type_mask(self, hubble_types):
+
+        """
+        This function ...
+        :param hubble_types: a Hubble type or a sequence of Hubble types
+        :return:
+        """
+
+        if types.is_string_type(hubble_types): hubble_types = [hubble_types]
+        return np.isin(self.type_strings, [str(hubble_type) for hubble_type in hubble_types])
+
+    # -----------------------------------------------------------------
+
+    def get_mask(self, parameters):
+
+        """
+        This function evaluates the selection parameters (as for page_link_from_parameters and add_hubble_type)
+        :param parameters:
+        :return:
+        """
+
+        mask = np.ones(self.ngalaxies, dtype=bool)
+
+        # Range parameters
+        for parameter in range_columns:
+            if parameter not in parameters: continue
+            low, high = parameters[parameter]
+            if low is None and high is None: continue
+            mask &= self.range_mask(parameter, low, high)
+
+        # Hubble type
+        if "Hubble type" in parameters: mask &= self.hubble_type_mask(parameters["Hubble type"])
+
+        # Return the mask
+        return mask
+
+    # -----------------------------------------------------------------
+
+    def get_indices(self, parameters):
+
+        """
+        This function ...
+        :param parameters:
+        :return:
+        """
+
+        return np.flatnonzero(self.get_mask(parameters))
+
+    # -----------------------------------------------------------------
+
+    def get_galaxy_names(self, parameters):
+
+        """
+        This function ...
+        :param parameters:
+        :return:
+        """
+
+        return list(self.names[self.get_mask(parameters)])
+
+    # -----------------------------------------------------------------
+
+    def get_galaxies(self, parameters):
+
+        """
+        This function returns a table with the same columns as DustPediaDatabase.get_galaxies
+        :param parameters:
+        :return:
+        """
+
+        indices = self.get_indices(parameters)
+
+        def column(values):
+            return [None if value is None or (isinstance(value, float) and np.isnan(value)) else value for value in values[indices].tolist()]
+
+        # Create the table
+        names = ["Name", "RA", "DEC", "Hubble stage", "Hubble type", "V", "D25", "Inclination"]
+        data = [column(self.names), column(self.ra), column(self.dec), column(self.values["T"]), column(self.types),
+                column(self.values["V"]), column(self.values["D25"]), column(self.values["inclination"])]
+        return tables.new(data, names)
+
+# -----------------------------------------------------------------
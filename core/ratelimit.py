@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import time
+import threading
+try: import fcntl
+except ImportError: fcntl = None # Windows: limits are shared between the threads of one process only
+
+# Import other modules
+from requests.adapters import HTTPAdapter
+
+# Import DustPedia modules
+from . import network
+
+# -----------------------------------------------------------------
+
+class TokenBucket(object):
+
+    """
+    This class is a token bucket: tokens are added at a fixed rate, up to a maximum, and taking more tokens than
+    available makes the caller wait. When a path is given, the bucket is kept in that file (under a file lock),
+    so that it is shared by all processes that use the same file.
+    """
+
+    def __init__(self, rate, capacity=None, path=None):
+
+        """
+        The constructor ...
+        :param rate: tokens per second
+        :param capacity: the maximum number of tokens (the burst size, default: one second worth of tokens)
+        :param path:
+        """
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else self.rate
+        self.path = path if fcntl is not None else None
+
+        # The state (when not kept in a file)
+        self._tokens = self.capacity
+        self._time = time.time()
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    def _take(self, amount, tokens, last):
+
+        """
+        This function ...
+        :param amount:
+        :param tokens:
+        :param last:
+        :return: (new number of tokens, time, the time to wait)
+        """
+
+        now = time.time()
+        tokens = min(self.capacity, tokens + (now - last) * self.rate) - amount
+
+        # Tokens can go below zero: the caller waits until they would be back at zero,
+        # and the next callers wait for the tokens that this caller took in advance
+        return tokens, now, max(0., -tokens / self.rate)
+
+    # -----------------------------------------------------------------
+
+    def acquire(self, amount=1):
+
+        """
+        This function takes tokens, and waits as long as needed
+        :param amount:
+        :return:
+        """
+
+        with self._lock:
+
+            # In this process
+            if self.path is None: self._tokens, self._time, wait = self._take(amount, self._tokens, self._time)
+
+            # Shared between processes
+            else:
+                with open(self.path, "a+") as state_file:
+                    fcntl.flock(state_file.fileno(), fcntl.LOCK_EX)
+                    try:
+                        state_file.seek(0)
+                        try: tokens, last = [float(value) for value in state_file.read().split()]
+                        except ValueError: tokens, last = self.capacity, time.time() # new file
+                        tokens, last, wait = self._take(amount, tokens, last)
+                        state_file.seek(0)
+                        state_file.truncate()
+                        state_file.write(repr(tokens) + " " + repr(last))
+                        state_file.flush()
+                    finally: fcntl.flock(state_file.fileno(), fcntl.LOCK_UN)
+
+        # Wait
+        if wait > 0: time.sleep(wait)
+
+# -----------------------------------------------------------------
+
+class RateLimiter(object):
+
+    """
+    This class limits the number of requests per second and the number of bytes per second for each host
+    """
+
+    def __init__(self, bytes_per_second=None, requests_per_second=None, hosts=None, path=None, burst=1.):
+
+        """
+        The constructor ...
+        :param bytes_per_second: the limit for each host (None for no limit)
+        :param requests_per_second: the limit for each host (None for no limit)
+        :param hosts: dictionary of host -> (bytes per second, requests per second), for hosts with other limits
+        :param path: a directory to keep the state in, to share the limits with other processes (of the same job)
+        :param burst: the number of seconds worth of tokens that can be used at once
+        """
+
+        self.bytes_per_second = bytes_per_second
+        self.requests_per_second = requests_per_second
+        self.hosts = hosts if hosts is not None else dict()
+        self.path = path
+        self.burst = burst
+
+        if self.path is not None and not os.path.isdir(self.path): os.makedirs(self.path)
+
+        # The buckets, created on first use: (host, kind) -> bucket
+        self._buckets = dict()
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+
+    def get_bucket(self, url, kind):
+
+        """
+        This function ...
+        :param url:
+        :param kind: "bytes" or "requests"
+        :return: the bucket, or None if there is no limit
+        """
+
+        host = network.urlparse(url).hostname
+
+        with self._lock:
+
+            key = (host, kind)
+            if key not in self._buckets:
+
+                # Determine the rate
+                limits = self.hosts.get(host, (self.bytes_per_second, self.requests_per_second))
+                rate = limits[0] if kind == "bytes" else limits[1]
+
+                # Create the bucket
+                if rate is None: self._buckets[key] = None
+                else:
+                    path = os.path.join(self.path, host + "." + kind) if self.path is not None else None
+                    self._buckets[key] = TokenBucket(rate, capacity=max(rate * self.burst, 1), path=path)
+
+            return self._buckets[key]
+
+    # -----------------------------------------------------------------
+
+    def acquire_request(self, url):
+
+        """
+        This function ...
+        :param url:
+        :return:
+        """
+
+        bucket = self.get_bucket(url, "requests")
+        if bucket is not None: bucket.acquire(1)
+
+    # -----------------------------------------------------------------
+
+    def acquire_bytes(self, url, nbytes):
+
+        """
+        This function ...
+        :param url:
+        :param nbytes:
+        :return:
+        """
+
+        bucket = self.get_bucket(url, "bytes")
+        if bucket is not None and nbytes > 0: bucket.acquire(nbytes)
+
+# -----------------------------------------------------------------
+
+class LimitingAdapter(HTTPAdapter):
+
+    """
+    This class is a transport adapter that takes a token from the request rate limit of the host before each request,
+    and (for responses that are not streamed) tokens for the bytes of the response (see network.configure_limiter)
+    """
+
+    def send(self, request, stream=False, **kwargs):
+
+        """
+        This function ...
+        :param request:
+        :param stream:
+        :param kwargs:
+        :return:
+        """
+
+        limiter = network.limiter
+        if limiter is not None: limiter.acquire_request(request.url)
+
+        # Do the request
+        response = super(LimitingAdapter, self).send(request, stream=stream, **kwargs)
+
+        # Streamed responses are limited while they are read (see network.iter_buffers)
+        if limiter is not None and not stream: limiter.acquire_bytes(request.url, len(response.content))
+        return response
+
+# -----------------------------------------------------------------
@@ -69,16 +69,17 @@ filter_names = {"GALEX FUV": "GALEX_FUV",
 
 # -----------------------------------------------------------------
 
-def resolve_name(galaxy_name):
+def resolve_name(galaxy_name, session=None):
 
     """
     This function ...
     :param galaxy_name: 
+    :param session: the session for the HyperLEDA lookup
     :return: 
     """
 
     sample = DustPediaSample()
-    name = sample.get_name(galaxy_name)
+    name = sample.get_name(galaxy_name, session=session)
     return name
 
 # -----------------------------------------------------------------
@@ -115,16 +116,17 @@ class DustPediaSample(object):
 
     # -----------------------------------------------------------------
 
-    def get_name(self, galaxy_name): # gets name = HYPERLEDA name, and checks whether in DustPedia sample
+    def get_name(self, galaxy_name, session=None): # gets name = HYPERLEDA name, and checks whether in DustPedia sample
 
         """
         This function ...
         :param galaxy_name:
+        :param session: the session for the HyperLEDA lookup
         :return:
         """
 
         # Get the HYPERLEDA name
-        objname = catalogs.get_hyperleda_name(galaxy_name)
+        objname = catalogs.get_hyperleda_name(galaxy_name, session=session)
 
         #print(objname)
 
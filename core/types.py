@@ -13,6 +13,10 @@ try:
     import numpy as np
 except ImportError: HAS_NP = False
 
+# Python 3
+try: basestring
+except NameError: basestring = str
+
 # -----------------------------------------------------------------
 
 if HAS_NP: boolean_types = [bool, np.bool]
@@ -72,7 +76,7 @@ def is_real_type(value):
 
 # -----------------------------------------------------------------
 
-if HAS_NP: string_types = [basestring, str, np.string_]
+if HAS_NP: string_types = [basestring, str, np.bytes_] # np.string_ in older versions of numpy
 else: string_types = [basestring, str]
 
 # -----------------------------------------------------------------
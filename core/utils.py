@@ -9,6 +9,8 @@ from __future__ import absolute_import, division, print_function
 
 # Import standard modules
 import copy
+import sys
+import threading
 from collections import OrderedDict
 from functools import wraps, partial
 
@@ -718,3 +720,72 @@ class memoize_method(object):
 # assert Test.inc_add(t, 2) != Test.inc_add(t, 2)
 
 # -----------------------------------------------------------------
+
+class SingleFlight(object):
+
+    """
+    This class coalesces identical calls that are in flight at the same time: the first caller for a key executes the
+    function, concurrent callers for the same key wait for it and share its result (or its exception)
+    """
+
+    def __init__(self):
+
+        """
+        The constructor ...
+        """
+
+        # The calls in flight: key -> [event, result, exception info]
+        self._calls = dict()
+        self._lock = threading.Lock()
+
+        # The number of calls that were executed and that were shared
+        self.executed = 0
+        self.shared = 0
+
+    # -----------------------------------------------------------------
+
+    def do(self, key, function, *args, **kwargs):
+
+        """
+        This function ...
+        :param key:
+        :param function:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+
+        with self._lock:
+
+            call = self._calls.get(key)
+            leader = call is None
+
+            # Become the leader for this key
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+                self.executed += 1
+
+            # Already in flight
+            else: self.shared += 1
+
+        # Wait for the leader and share its outcome
+        if not leader:
+
+            call[0].wait()
+            if call[2] is not None: raise call[2][1]
+            return call[1]
+
+        # Execute
+        try: call[1] = function(*args, **kwargs)
+        except Exception: call[2] = sys.exc_info()
+
+        # Done: let the waiting callers go
+        finally:
+            with self._lock: del self._calls[key]
+            call[0].set()
+
+        # Return the result or raise the exception
+        if call[2] is not None: raise call[2][1]
+        return call[1]
+
+# -----------------------------------------------------------------
@@ -19,6 +19,7 @@ from core.database import DustPediaDatabase
 # Parse arguments
 parser = argparse.ArgumentParser(description="get image")
 parser.add_argument("name", type=str, help="the image name [galaxyname_instrument_band.fits]")
+parser.add_argument("--segments", type=int, default=1, help="download large images as this number of byte ranges at once")
 arguments = parser.parse_args()
 
 # -----------------------------------------------------------------
@@ -36,6 +37,6 @@ if not arguments.name.endswith("fits"): arguments.name = arguments.name + ".fits
 galaxy_name = arguments.name.split("_")[0]
 
 # Download
-database.download_image(galaxy_name, arguments.name, path)
+database.download_image(galaxy_name, arguments.name, path, segments=arguments.segments)
 
 # -----------------------------------------------------------------
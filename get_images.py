@@ -15,6 +15,7 @@ import argparse
 
 # Import DustPedia API
 from core.database import DustPediaDatabase
+from core import network
 from core.sample import resolve_name
 
 # -----------------------------------------------------------------
@@ -29,6 +30,11 @@ parser.add_argument("galaxy", type=str, help="the galaxy name")
 parser.add_argument("instrument", type=str, nargs='?', choices=instruments, help="the instrument (optional)")
 parser.add_argument("--errors", action="store_true", help="also get error maps")
 parser.add_argument("-o", type=str, help="output path")
+parser.add_argument("--threads", type=int, default=8, help="number of images to download simultaneously")
+parser.add_argument("--resume", action="store_true", help="keep a journal in the output directory, and skip the images that were downloaded by an earlier (interrupted) run")
+parser.add_argument("--max-rate", type=float, help="maximum download rate per host in MB/s")
+parser.add_argument("--max-requests", type=float, help="maximum number of requests per second per host")
+parser.add_argument("--shared-limits", type=str, help="directory to keep the rate limits in, to share them with other (simultaneous) runs")
 arguments = parser.parse_args()
 
 # -----------------------------------------------------------------
@@ -38,6 +44,13 @@ galaxy_name = resolve_name(arguments.galaxy)
 
 # -----------------------------------------------------------------
 
+# Limit the load on the archive
+if arguments.max_rate is not None or arguments.max_requests is not None:
+    bytes_per_second = arguments.max_rate * 1024**2 if arguments.max_rate is not None else None
+    network.configure_limiter(bytes_per_second, arguments.max_requests, path=arguments.shared_limits)
+
+# -----------------------------------------------------------------
+
 # Create the database
 database = DustPediaDatabase()
 
@@ -49,6 +62,6 @@ if not os.path.isdir(path): os.mkdir(path)
 
 # -----------------------------------------------------------------
 
-database.download_images(galaxy_name, path, error_maps=arguments.errors, progress_bar=True, instrument=arguments.instrument)
+database.download_images(galaxy_name, path, error_maps=arguments.errors, progress_bar=True, instrument=arguments.instrument, nthreads=arguments.threads, journal=arguments.resume)
 
 # -----------------------------------------------------------------
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import time
+import shutil
+import tempfile
+import unittest
+try: from unittest import mock
+except ImportError: import mock # Python 2
+
+# Import other modules
+import requests
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# Import DustPedia modules
+from core.httpcache import ResponseCache, CachingAdapter
+from core.ratelimit import LimitingAdapter
+
+# -----------------------------------------------------------------
+
+data_url = "http://dustpedia.astro.noa.gr/Data?GalaxyName=NGC3031&tLow=&tHigh="
+search_url = "http://dustpedia.astro.noa.gr/Data?GalaxyName=&tLow=0&tHigh=5"
+leda_url = "http://leda.univ-lyon1.fr/ledacat.cgi?o=M81"
+
+# -----------------------------------------------------------------
+
+class ResponseCacheTest(unittest.TestCase):
+
+    """
+    This class tests the on-disk response cache
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.path)
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_ttls(self):
+
+        self.assertEqual(self.cache.get_ttl(data_url), 24*3600)
+        self.assertEqual(self.cache.get_ttl(data_url.replace("/Data?", "/MBB?")), 24*3600)
+        self.assertEqual(self.cache.get_ttl(leda_url), 7*24*3600)
+
+        # Search pages and the print preview are never cached
+        self.assertEqual(self.cache.get_ttl(search_url), 0)
+        self.assertEqual(self.cache.get_ttl("http://dustpedia.astro.noa.gr/Data/PrintPreview"), 0)
+
+    # -----------------------------------------------------------------
+
+    def test_keys(self):
+
+        key = self.cache.get_key(data_url)
+
+        # Only the authentication cookies are part of the key, in any order
+        self.assertEqual(self.cache.get_key(data_url, "theme=dark; lang=en"), key)
+        self.assertNotEqual(self.cache.get_key(data_url, ".ASPXAUTH=abc"), key)
+        self.assertEqual(self.cache.get_key(data_url, "theme=dark; .ASPXAUTH=abc; AuthToken=1"), self.cache.get_key(data_url, "AuthToken=1; .ASPXAUTH=abc"))
+        self.assertNotEqual(self.cache.get_key(data_url, ".ASPXAUTH=abc"), self.cache.get_key(data_url, ".ASPXAUTH=def"))
+        self.assertNotEqual(self.cache.get_key(data_url.replace("NGC3031", "NGC0628")), key)
+
+    # -----------------------------------------------------------------
+
+    def test_put_and_get(self):
+
+        key = self.cache.get_key(data_url)
+        self.assertIsNone(self.cache.get(key, data_url))
+
+        headers = {"Content-Type": "text/html", "Content-Encoding": "gzip", "Content-Length": "10", "Set-Cookie": "a=b"}
+        self.cache.put(key, data_url, 200, headers, b"<html></html>")
+
+        # The headers of the transfer are dropped, the body is stored decoded
+        self.assertEqual(self.cache.get(key, data_url), (200, {"Content-Type": "text/html"}, b"<html></html>"))
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.stores), (1, 1, 1))
+
+    # -----------------------------------------------------------------
+
+    def test_expiry(self):
+
+        key = self.cache.get_key(data_url)
+        self.cache.put(key, data_url, 200, {}, b"page")
+
+        # Just within and just after the time to live
+        now = time.time()
+        with mock.patch("core.httpcache.time.time", return_value=now + 24*3600 - 60): self.assertIsNotNone(self.cache.get(key, data_url))
+        with mock.patch("core.httpcache.time.time", return_value=now + 24*3600 + 60): self.assertIsNone(self.cache.get(key, data_url))
+
+    # -----------------------------------------------------------------
+
+    def test_eviction(self):
+
+        cache = ResponseCache(self.path, max_size=2500)
+        body = os.urandom(1000) # does not compress
+
+        # Store three entries, of which the first was used most recently
+        keys = [cache.get_key(data_url + str(index)) for index in range(3)]
+        for index, key in enumerate(keys[:2]):
+            cache.put(key, data_url, 200, {}, body)
+            os.utime(cache._filepath(key), (1000 + index, 1000 + index))
+        os.utime(cache._filepath(keys[0]), (2000, 2000))
+        cache.put(keys[2], data_url, 200, {}, body)
+
+        # The least recently used entry is evicted
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get(keys[1], data_url))
+        self.assertIsNotNone(cache.get(keys[0], data_url))
+        self.assertIsNotNone(cache.get(keys[2], data_url))
+
+# -----------------------------------------------------------------
+
+def make_response(request, body):
+
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+    response._content = body
+    response.url = request.url
+    response.request = request
+    return response
+
+# -----------------------------------------------------------------
+
+class CachingAdapterTest(unittest.TestCase):
+
+    """
+    This class tests the transport adapter that answers requests from the cache (without network access)
+    """
+
+    def setUp(self):
+
+        self.path = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.path)
+
+        self.session = requests.Session()
+        self.session.mount("http://", CachingAdapter(self.cache))
+
+        # The requests that reach the network
+        self.sent = []
+        def send(adapter, request, stream=False, **kwargs):
+            self.sent.append(request.url)
+            return make_response(request, ("<html>" + str(len(self.sent)) + "</html>").encode("utf-8"))
+        self.patcher = mock.patch.object(LimitingAdapter, "send", send)
+        self.patcher.start()
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.session.close()
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_cached(self):
+
+        first = self.session.get(data_url)
+        second = self.session.get(data_url)
+        self.assertEqual(self.sent, [data_url])
+        self.assertEqual(second.text, first.text)
+        self.assertEqual(second.url, data_url)
+
+    # -----------------------------------------------------------------
+
+    def test_not_cached(self):
+
+        # Search pages, streamed requests, and other methods go to the network
+        self.session.get(search_url)
+        self.session.get(search_url)
+        self.session.get(data_url, stream=True)
+        self.session.post(data_url)
+        self.assertEqual(self.sent, [search_url, search_url, data_url, data_url])
+
+    # -----------------------------------------------------------------
+
+    def test_cookies(self):
+
+        # Another login gives another entry
+        self.session.get(data_url)
+        self.session.cookies.set(".ASPXAUTH", "abc")
+        self.session.get(data_url)
+        self.session.get(data_url)
+        self.assertEqual(len(self.sent), 2)
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import errno
+import json
+import socket
+import shutil
+import tempfile
+import unittest
+try: from unittest import mock
+except ImportError: import mock # Python 2
+
+# Import other modules
+from requests.models import Response
+from requests.exceptions import ConnectionError, ReadTimeout, ChunkedEncodingError, HTTPError, InvalidURL
+from urllib3.exceptions import ProtocolError
+
+# Import DustPedia modules
+from core.jobs import is_transient, RetryPolicy, call_with_retries, JobJournal, journal_name, pending, done, failed
+from core.network import IncompleteDownload
+
+# -----------------------------------------------------------------
+
+def http_error(status):
+
+    response = Response()
+    response.status_code = status
+    return HTTPError(str(status), response=response)
+
+# -----------------------------------------------------------------
+
+class TransientTest(unittest.TestCase):
+
+    """
+    This class tests which errors are worth retrying
+    """
+
+    def test_transient(self):
+
+        for error in [ConnectionError(), ReadTimeout(), ChunkedEncodingError(), IncompleteDownload("6 of 10 bytes"),
+                      ProtocolError("Connection broken"), socket.timeout(), socket.error(errno.ECONNRESET, "Connection reset by peer"),
+                      http_error(429), http_error(503), http_error(504)]:
+            self.assertTrue(is_transient(error), repr(error))
+
+    # -----------------------------------------------------------------
+
+    def test_permanent(self):
+
+        # Other I/O errors (a full disk, a missing directory) are not retried
+        for error in [http_error(404), http_error(403), HTTPError("no response"), InvalidURL(), ValueError(),
+                      IOError(28, "No space left on device"), OSError(2, "No such file or directory")]:
+            self.assertFalse(is_transient(error), repr(error))
+
+# -----------------------------------------------------------------
+
+class RetryPolicyTest(unittest.TestCase):
+
+    """
+    This class tests the retry policy
+    """
+
+    def test_should_retry(self):
+
+        policy = RetryPolicy(max_attempts=3)
+        self.assertTrue(policy.should_retry(ConnectionError(), 1))
+        self.assertTrue(policy.should_retry(ConnectionError(), 2))
+        self.assertFalse(policy.should_retry(ConnectionError(), 3))
+        self.assertFalse(policy.should_retry(http_error(404), 1))
+
+    # -----------------------------------------------------------------
+
+    def test_delay(self):
+
+        # Exponential, up to the maximum
+        policy = RetryPolicy(base_delay=2., max_delay=10., jitter=0.)
+        self.assertEqual([policy.get_delay(attempt) for attempt in range(1, 6)], [2., 4., 8., 10., 10.])
+
+        # With jitter, the delay is shortened by up to the jitter fraction
+        policy = RetryPolicy(base_delay=2., max_delay=10., jitter=0.5)
+        for attempt in range(1, 6):
+            for _ in range(20):
+                delay = policy.get_delay(attempt)
+                self.assertTrue(0.5 * min(10., 2. * 2 ** (attempt - 1)) <= delay <= min(10., 2. * 2 ** (attempt - 1)))
+
+    # -----------------------------------------------------------------
+
+    def test_call_with_retries(self):
+
+        outcomes = [ConnectionError(), ReadTimeout(), "page"]
+        def function():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception): raise outcome
+            return outcome
+
+        with mock.patch("core.jobs.time.sleep") as sleep:
+            self.assertEqual(call_with_retries(function, RetryPolicy(max_attempts=3, jitter=0.), "the page"), "page")
+        self.assertEqual([call[0][0] for call in sleep.call_args_list], [2., 4.])
+
+    # -----------------------------------------------------------------
+
+    def test_call_with_retries_gives_up(self):
+
+        calls = []
+        def function():
+            calls.append(1)
+            raise ConnectionError()
+
+        with mock.patch("core.jobs.time.sleep"): self.assertRaises(ConnectionError, call_with_retries, function, RetryPolicy(max_attempts=3), "the page")
+        self.assertEqual(len(calls), 3)
+
+        # Permanent errors are raised immediately, and without a policy nothing is retried
+        del calls[:]
+        def not_found():
+            calls.append(1)
+            raise http_error(404)
+        self.assertRaises(HTTPError, call_with_retries, not_found, RetryPolicy(), "the page")
+        self.assertRaises(ConnectionError, call_with_retries, function, None, "the page")
+        self.assertEqual(len(calls), 2)
+
+# -----------------------------------------------------------------
+
+class JobJournalTest(unittest.TestCase):
+
+    """
+    This class tests the journal of a bulk download
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.journal_path = os.path.join(self.path, journal_name)
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_states(self):
+
+        journal = JobJournal(self.path)
+        self.assertEqual(journal.path, self.journal_path)
+        filepath = os.path.join(self.path, "a.fits")
+
+        journal.plan("a", "http://host/a", filepath)
+        journal.plan("b", "http://host/b")
+        self.assertEqual(journal.get_state("a"), pending)
+        self.assertIsNone(journal.get_state("c"))
+
+        journal.mark_failed("b", ConnectionError("reset"))
+        journal.mark_failed("b", ConnectionError("reset"))
+        self.assertEqual(journal.get_state("b"), failed)
+        self.assertEqual(journal.failed_jobs[0]["attempts"], 2)
+
+        # Planning again does not reset the job
+        journal.plan("b", "http://host/b")
+        self.assertEqual(journal.get_state("b"), failed)
+
+        # Done only while the file exists
+        journal.mark_done("a")
+        self.assertEqual(journal.get_state("a"), done)
+        self.assertFalse(journal.is_done("a"))
+        with open(filepath, "w") as f: f.write("image")
+        self.assertTrue(journal.is_done("a"))
+        self.assertEqual(journal.ndone, 1)
+
+    # -----------------------------------------------------------------
+
+    def test_reload(self):
+
+        journal = JobJournal(self.path)
+        journal.plan("a", "http://host/a")
+        journal.mark_done("a")
+        journal.plan("b", "http://host/b")
+
+        loaded = JobJournal(self.path)
+        self.assertEqual(loaded.get_state("a"), done)
+        self.assertEqual(loaded.get_state("b"), pending)
+        self.assertEqual(loaded.get_path("a"), None)
+
+        # Compacting keeps only the latest record of each job
+        loaded.compact()
+        with open(self.journal_path, "r") as journal_file: self.assertEqual(len(journal_file.readlines()), 2)
+        self.assertEqual(JobJournal(self.path).get_state("a"), done)
+
+    # -----------------------------------------------------------------
+
+    def test_torn_line(self):
+
+        # The process crashed while writing the last record
+        journal = JobJournal(self.path)
+        journal.plan("a", "http://host/a")
+        journal.mark_done("a")
+        with open(self.journal_path, "a") as journal_file: journal_file.write(json.dumps({"id": "b", "state": done})[:15])
+
+        # The records before the torn line are loaded
+        journal = JobJournal(self.path)
+        self.assertEqual(journal.get_state("a"), done)
+        self.assertIsNone(journal.get_state("b"))
+
+        # New records are not lost by being appended to the torn line
+        journal.plan("b", "http://host/b")
+        loaded = JobJournal(self.path)
+        self.assertEqual(loaded.get_state("a"), done)
+        self.assertEqual(loaded.get_state("b"), pending)
+
+    # -----------------------------------------------------------------
+
+    def test_remove(self):
+
+        journal = JobJournal(self.path)
+        journal.plan("a", "http://host/a")
+        journal.remove()
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertIsNone(journal.get_state("a"))
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
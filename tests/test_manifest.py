@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Import DustPedia modules
+from core.manifest import ImageManifest, parse_image_url, get_image_name, get_instrument
+
+# -----------------------------------------------------------------
+
+def image_url(image_name, instrument):
+    return "http://dustpedia.astro.noa.gr/Data/GetImage?imageName=" + image_name + "&instrument=" + instrument
+
+# -----------------------------------------------------------------
+
+urls = [image_url("NGC3031_GALEX_FUV.fits", "GALEX"),
+        image_url("NGC3031_GALEX_FUV_Error.fits", "GALEX"),
+        image_url("NGC3031_SPIRE_250.fits", "SPIRE"),
+        image_url("NGC3031_Planck_10600.fits", "Planck")]
+
+# -----------------------------------------------------------------
+
+class ImageURLTest(unittest.TestCase):
+
+    """
+    This class tests the parsing of image URLs into manifest entries
+    """
+
+    def test_name_and_instrument(self):
+
+        self.assertEqual(get_image_name(urls[0]), "NGC3031_GALEX_FUV.fits")
+        self.assertEqual(get_instrument(urls[0]), "GALEX")
+
+    # -----------------------------------------------------------------
+
+    def test_entry(self):
+
+        entry = parse_image_url(urls[1], galaxy_name="NGC3031")
+        self.assertEqual(entry["name"], "NGC3031_GALEX_FUV_Error.fits")
+        self.assertEqual(entry["instrument"], "GALEX")
+        self.assertEqual(entry["band"], "FUV")
+        self.assertTrue(entry["error_map"])
+        self.assertEqual(entry["url"], urls[1])
+
+    # -----------------------------------------------------------------
+
+    def test_galaxy_name_with_underscore(self):
+
+        # The galaxy name itself contains an underscore
+        entry = parse_image_url(image_url("ESO_097-013_SPIRE_500.fits", "SPIRE"), galaxy_name="ESO_097-013")
+        self.assertEqual(entry["band"], "500")
+        self.assertFalse(entry["error_map"])
+
+# -----------------------------------------------------------------
+
+class ImageManifestTest(unittest.TestCase):
+
+    """
+    This class tests the persistent image manifest
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.path, "manifest", "image_manifest.json")
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_filters(self):
+
+        manifest = ImageManifest(self.manifest_path)
+        manifest.set_urls("NGC3031", urls)
+
+        self.assertTrue(manifest.has_galaxy("NGC3031"))
+        self.assertFalse(manifest.has_galaxy("NGC0628"))
+        self.assertEqual(manifest.get_urls("NGC3031"), urls)
+        self.assertEqual(manifest.get_names("NGC3031", error_maps=False), ["NGC3031_GALEX_FUV.fits", "NGC3031_SPIRE_250.fits", "NGC3031_Planck_10600.fits"])
+        self.assertEqual(manifest.get_names("NGC3031", instrument="GALEX"), ["NGC3031_GALEX_FUV.fits", "NGC3031_GALEX_FUV_Error.fits"])
+        self.assertEqual(manifest.get_url("NGC3031", "NGC3031_SPIRE_250.fits"), urls[2])
+        self.assertIsNone(manifest.get_url("NGC3031", "NGC3031_SPIRE_350.fits"))
+
+    # -----------------------------------------------------------------
+
+    def test_save_and_load(self):
+
+        manifest = ImageManifest(self.manifest_path)
+        manifest.set_urls("NGC3031", urls)
+        manifest.set_urls("NGC0628", urls[2:3])
+        manifest.save()
+
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.manifest_path)), ["image_manifest.json"])
+
+        # Galaxies are written in sorted order
+        with open(self.manifest_path, "r") as manifest_file: self.assertEqual(list(json.load(manifest_file).keys()), ["NGC0628", "NGC3031"])
+
+        # Load again (the order of the images is kept)
+        loaded = ImageManifest(self.manifest_path)
+        self.assertEqual(loaded.galaxy_names, ["NGC0628", "NGC3031"])
+        self.assertEqual(loaded.get_urls("NGC3031"), urls)
+        self.assertEqual(loaded.get_entry("NGC3031", "NGC3031_GALEX_FUV_Error.fits"), manifest.get_entry("NGC3031", "NGC3031_GALEX_FUV_Error.fits"))
+
+    # -----------------------------------------------------------------
+
+    def test_replace_and_remove(self):
+
+        manifest = ImageManifest(self.manifest_path)
+        manifest.set_urls("NGC3031", urls)
+        manifest.set_urls("NGC3031", urls[:1])
+        self.assertEqual(manifest.get_urls("NGC3031"), urls[:1])
+
+        manifest.remove("NGC3031")
+        manifest.remove("NGC3031") # removing twice is not an error
+        self.assertFalse(manifest.has_galaxy("NGC3031"))
+        self.assertEqual(manifest.galaxy_names, [])
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
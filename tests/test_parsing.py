@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import unittest
+from io import BytesIO
+
+# Import DustPedia modules
+from core import parsing
+
+# -----------------------------------------------------------------
+
+def info_box(name, hubble_type, stage="2.4"):
+    return ("Name: " + name + "<br>RA(2000): 148.888<br>DEC(2000): 69.065<br>Hubble Stage(T): " + stage + "<br>"
+            "Hubble Type: " + hubble_type + "<br>V (km/s): -39<br>D25 (arcmin): 21.4<br>Inclination (deg.): 68.3")
+
+# -----------------------------------------------------------------
+
+def results_page(boxes):
+
+    rows = ["<tr><th>Info</th><th>Image</th></tr>"]
+    for box in boxes:
+        name = box.split("<br>")[0].split(": ")[1]
+        rows.append("<tr><td>" + box.replace("<br>", "\n") + "</td><td><a href='Data?GalaxyName=" + name + "&tLow=&tHigh='>"
+                    "<img src='Images/" + name + ".jpg'></a></td></tr>")
+
+    # A table before the results table (the results are in the last table of the page)
+    return ("<html><body><table><tr><td>Search form</td></tr></table>"
+            "<table>" + "".join(rows) + "</table></body></html>").encode("utf-8")
+
+# -----------------------------------------------------------------
+
+class GalaxyInfoTest(unittest.TestCase):
+
+    """
+    This class tests the parsing of the galaxy info boxes
+    """
+
+    def test_fields(self):
+
+        info = parsing.parse_galaxy_info(info_box("NGC3031", "Sab").replace("<br>", "\n"))
+        self.assertEqual(list(info.keys()), ["name", "ra", "dec", "stage", "type", "v", "d25", "inclination"])
+        self.assertEqual(info["name"], "NGC3031")
+        self.assertAlmostEqual(info["ra"], 148.888)
+        self.assertAlmostEqual(info["dec"], 69.065)
+        self.assertAlmostEqual(info["stage"], 2.4)
+        self.assertEqual(info["v"], -39.)
+        self.assertAlmostEqual(info["d25"], 21.4)
+        self.assertAlmostEqual(info["inclination"], 68.3)
+
+    # -----------------------------------------------------------------
+
+    def test_hubble_type(self):
+
+        # Every Hubble type is parsed (not only 'Sab'), and the type is not confused with the Hubble stage
+        for hubble_type in ["Sab", "SBc", "E", "S0-a", "IB", "SABb pec"]:
+            info = parsing.parse_galaxy_info(info_box("NGC0628", hubble_type, stage="5.2").replace("<br>", "\n"))
+            self.assertEqual(info["type"], hubble_type)
+            self.assertAlmostEqual(info["stage"], 5.2)
+
+    # -----------------------------------------------------------------
+
+    def test_missing_values(self):
+
+        box = "Name: UGC12345\nRA(2000): 1.5\nDEC(2000): -2.5\nHubble Stage(T): \nHubble Type: \nV (km/s): n/a\nD25 (arcmin): 1.2\n"
+        info = parsing.parse_galaxy_info(box)
+        self.assertIsNone(info["stage"])
+        self.assertIsNone(info["type"])
+        self.assertIsNone(info["v"])
+        self.assertIsNone(info["inclination"])
+        self.assertAlmostEqual(info["d25"], 1.2)
+
+    # -----------------------------------------------------------------
+
+    def test_black_body(self):
+
+        box = "Dust Temperature (K):\n22.6&plusmn0.7\nDust Mass (M_sun):\n4900000&plusmn;1000000\nDust Luminosity (L_sun):\n2.10E+09\xb11.00E+08"
+        self.assertEqual(parsing.parse_black_body_info(box), (22.6, 0.7, 4900000., 1000000., 2.1e9, 1e8))
+
+        # Without errors, or without the values
+        self.assertEqual(parsing.parse_black_body_info("Dust Temperature (K): 18.1"), (18.1, None, None, None, None, None))
+
+# -----------------------------------------------------------------
+
+class ResultsTableTest(unittest.TestCase):
+
+    """
+    This class tests the parsing of the results table of a search page
+    """
+
+    def setUp(self):
+        self.page = results_page([info_box("NGC3031", "Sab"), info_box("NGC0628", "Sc")])
+
+    # -----------------------------------------------------------------
+
+    def test_galaxy_names(self):
+        self.assertEqual(parsing.get_galaxy_names(self.page), ["NGC3031", "NGC0628"])
+
+    # -----------------------------------------------------------------
+
+    def test_info_boxes(self):
+
+        boxes = parsing.get_info_boxes(self.page)
+        self.assertEqual([parsing.parse_galaxy_info(box)["type"] for box in boxes], ["Sab", "Sc"])
+
+    # -----------------------------------------------------------------
+
+    def test_links(self):
+        self.assertEqual(parsing.get_links(self.page), ["Data?GalaxyName=NGC3031&tLow=&tHigh=", "Images/NGC3031.jpg",
+                                                         "Data?GalaxyName=NGC0628&tLow=&tHigh=", "Images/NGC0628.jpg"])
+
+    # -----------------------------------------------------------------
+
+    def test_streaming(self):
+
+        # The streaming parser gives the same boxes as the parser of the complete page
+        self.assertEqual(list(parsing.iter_info_boxes(BytesIO(self.page))), parsing.get_info_boxes(self.page))
+
+    # -----------------------------------------------------------------
+
+    def test_empty(self):
+        self.assertEqual(parsing.get_galaxy_names(results_page([])), [])
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+# Import DustPedia modules
+from core.query import LocalQueryEngine
+
+# -----------------------------------------------------------------
+
+# A small LEDAWISE table (with missing values)
+table_lines = ["objname,ra2000,de2000,t,type,v,d25,incl",
+               "NGC0001,1.0,10.0,3.0,Sb,4500,1.5,40.0",
+               "NGC0002,2.0,20.0,5.2,Sc,800,6.0,70.0",
+               "NGC0003,3.0,30.0,-4.8,E,1200,2.5,",
+               "NGC0004,4.0,40.0,,,2000,,55.0",
+               "NGC0005,5.0,50.0,3.0,Sb,300,10.0,89.5"]
+
+# -----------------------------------------------------------------
+
+class LocalQueryEngineTest(unittest.TestCase):
+
+    """
+    This class tests galaxy selections on a local LEDAWISE table
+    """
+
+    def setUp(self):
+
+        self.path = tempfile.mkdtemp()
+        filepath = os.path.join(self.path, "ledawise.csv")
+        with open(filepath, "w") as table_file: table_file.write("\n".join(table_lines) + "\n")
+        self.engine = LocalQueryEngine(filepath)
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_no_selection(self):
+
+        self.assertEqual(self.engine.ngalaxies, 5)
+        self.assertEqual(self.engine.get_galaxy_names({}), ["NGC0001", "NGC0002", "NGC0003", "NGC0004", "NGC0005"])
+
+    # -----------------------------------------------------------------
+
+    def test_ranges(self):
+
+        # Inclusive bounds, galaxies without a value are never selected
+        self.assertEqual(self.engine.get_galaxy_names({"T": (3.0, 5.2)}), ["NGC0001", "NGC0002", "NGC0005"])
+        self.assertEqual(self.engine.get_galaxy_names({"inclination": (50., None)}), ["NGC0002", "NGC0004", "NGC0005"])
+        self.assertEqual(self.engine.get_galaxy_names({"D25": (None, 2.5)}), ["NGC0001", "NGC0003"])
+        self.assertEqual(self.engine.get_galaxy_names({"V": (None, None)}), self.engine.get_galaxy_names({}))
+        self.assertEqual(self.engine.get_galaxy_names({"V": (5000, 6000)}), [])
+
+    # -----------------------------------------------------------------
+
+    def test_combined(self):
+        self.assertEqual(self.engine.get_galaxy_names({"T": (0., 10.), "V": (None, 1000)}), ["NGC0002", "NGC0005"])
+
+    # -----------------------------------------------------------------
+
+    def test_hubble_type(self):
+
+        self.assertEqual(self.engine.get_galaxy_names({"Hubble type": "Sb"}), ["NGC0001", "NGC0005"])
+        self.assertEqual(self.engine.get_galaxy_names({"Hubble type": ["E", "Sc"]}), ["NGC0002", "NGC0003"])
+        self.assertEqual(self.engine.get_galaxy_names({"Hubble type": "Sb", "D25": (5., None)}), ["NGC0005"])
+
+    # -----------------------------------------------------------------
+
+    def test_galaxies(self):
+
+        table = self.engine.get_galaxies({"V": (1000, 2500)})
+        self.assertEqual(list(table.colnames), ["Name", "RA", "DEC", "Hubble stage", "Hubble type", "V", "D25", "Inclination"])
+        self.assertEqual(list(table["Name"]), ["NGC0003", "NGC0004"])
+        self.assertEqual(list(table["V"]), [1200, 2000])
+
+        # Missing values are masked
+        self.assertTrue(np.ma.is_masked(table["Hubble stage"][1]))
+        self.assertTrue(np.ma.is_masked(table["Inclination"][0]))
+
+# -----------------------------------------------------------------
+
+class BundledTableTest(unittest.TestCase):
+
+    """
+    This class compares the sorted-index selections on the bundled table with a direct evaluation
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = LocalQueryEngine()
+
+    # -----------------------------------------------------------------
+
+    def test_ranges(self):
+
+        for parameter, low, high in [("T", 2., 5.), ("V", None, 1000.), ("inclination", 60., None), ("D25", 3., 10.)]:
+
+            values = self.engine.values[parameter]
+            with np.errstate(invalid="ignore"):
+                expected = ~np.isnan(values)
+                if low is not None: expected &= values >= low
+                if high is not None: expected &= values <= high
+
+            self.assertTrue(np.array_equal(self.engine.range_mask(parameter, low, high), expected))
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import shutil
+import tempfile
+import unittest
+try: from unittest import mock
+except ImportError: import mock # Python 2
+
+# Import DustPedia modules
+from core import ratelimit
+from core.ratelimit import TokenBucket, RateLimiter
+
+# -----------------------------------------------------------------
+
+class Clock(object):
+
+    """
+    This class replaces time.time and time.sleep: sleeping advances the time
+    """
+
+    def __init__(self):
+        self.now = 1000.
+        self.sleeps = []
+
+    # -----------------------------------------------------------------
+
+    def time(self):
+        return self.now
+
+    # -----------------------------------------------------------------
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+# -----------------------------------------------------------------
+
+class TokenBucketTest(unittest.TestCase):
+
+    """
+    This class tests the token bucket, with a fake clock
+    """
+
+    def setUp(self):
+
+        self.path = tempfile.mkdtemp()
+        self.clock = Clock()
+        self.patcher = mock.patch.object(ratelimit, "time", self.clock)
+        self.patcher.start()
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def test_burst(self):
+
+        # The bucket starts full: a burst of 'capacity' tokens does not wait
+        bucket = TokenBucket(10., capacity=5.)
+        for _ in range(5): bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        # Then one token every 1/rate seconds
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(len(self.clock.sleeps), 2)
+        for seconds in self.clock.sleeps: self.assertAlmostEqual(seconds, 0.1)
+
+    # -----------------------------------------------------------------
+
+    def test_default_capacity(self):
+
+        # One second worth of tokens
+        bucket = TokenBucket(100.)
+        bucket.acquire(100)
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire(50)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.5)
+
+    # -----------------------------------------------------------------
+
+    def test_refill(self):
+
+        bucket = TokenBucket(10., capacity=5.)
+        bucket.acquire(5)
+
+        # Tokens come back with time, up to the capacity
+        self.clock.now += 0.5
+        bucket.acquire(4)
+        self.assertEqual(self.clock.sleeps, [])
+        self.clock.now += 3600.
+        bucket.acquire(5)
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire(1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.1)
+
+    # -----------------------------------------------------------------
+
+    def test_debt(self):
+
+        # Taking more than the capacity at once: this caller waits for it, and so does the next
+        bucket = TokenBucket(1000., capacity=1000.)
+        bucket.acquire(3000)
+        self.assertAlmostEqual(self.clock.sleeps[0], 2.)
+        bucket.acquire(1000)
+        self.assertAlmostEqual(self.clock.sleeps[1], 1.)
+
+    # -----------------------------------------------------------------
+
+    @unittest.skipIf(ratelimit.fcntl is None, "no file locks on this platform")
+    def test_shared(self):
+
+        # Two buckets with the same file share their tokens (as in two processes)
+        path = os.path.join(self.path, "host.requests")
+        first = TokenBucket(10., capacity=5., path=path)
+        second = TokenBucket(10., capacity=5., path=path)
+
+        for _ in range(3): first.acquire()
+        for _ in range(2): second.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        second.acquire()
+        first.acquire()
+        self.assertEqual(len(self.clock.sleeps), 2)
+        for seconds in self.clock.sleeps: self.assertAlmostEqual(seconds, 0.1)
+
+# -----------------------------------------------------------------
+
+class RateLimiterTest(unittest.TestCase):
+
+    """
+    This class tests the rate limits per host
+    """
+
+    def test_buckets(self):
+
+        limiter = RateLimiter(bytes_per_second=1e6, requests_per_second=None, hosts={"leda.univ-lyon1.fr": (None, 2.)})
+
+        # No limit
+        self.assertIsNone(limiter.get_bucket("http://dustpedia.astro.noa.gr/Data", "requests"))
+        self.assertIsNone(limiter.get_bucket("http://leda.univ-lyon1.fr/ledacat.cgi", "bytes"))
+
+        # One bucket per host and kind
+        bucket = limiter.get_bucket("http://dustpedia.astro.noa.gr/Data", "bytes")
+        self.assertEqual(bucket.rate, 1e6)
+        self.assertIs(limiter.get_bucket("http://dustpedia.astro.noa.gr/Data/GetImage", "bytes"), bucket)
+        self.assertEqual(limiter.get_bucket("http://leda.univ-lyon1.fr/ledacat.cgi", "requests").rate, 2.)
+
+        # At least one token fits in the bucket
+        self.assertEqual(limiter.get_bucket("http://leda.univ-lyon1.fr/ledacat.cgi", "requests").capacity, 2.)
+        self.assertEqual(RateLimiter(requests_per_second=0.5).get_bucket("http://host/", "requests").capacity, 1.)
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
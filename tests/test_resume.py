@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+
+# Import other modules
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# Import DustPedia modules
+from core.network import fetch_file, IncompleteDownload
+
+# -----------------------------------------------------------------
+
+url = "http://dustpedia.astro.noa.gr/Data/GetImage?imageName=NGC3031_SPIRE_250.fits&instrument=SPIRE"
+content = b"0123456789"
+etag = '"v1"'
+
+# -----------------------------------------------------------------
+
+def make_response(status, body=b"", headers=None):
+
+    response = Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers if headers is not None else {})
+    if "Content-Length" not in response.headers: response.headers["Content-Length"] = str(len(body))
+    response.raw = BytesIO(body)
+    response.url = url
+    return response
+
+# -----------------------------------------------------------------
+
+class FakeSession(object):
+
+    """
+    This class replaces the session: it records the headers of the requests and gives the prepared responses
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    # -----------------------------------------------------------------
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers))
+        return self.responses.pop(0)
+
+# -----------------------------------------------------------------
+
+class ResumeTest(unittest.TestCase):
+
+    """
+    This class tests fetch_file: resuming interrupted downloads with Range and If-Range requests
+    """
+
+    def setUp(self):
+
+        self.path = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.path, "NGC3031_SPIRE_250.fits")
+        self.part_path = self.filepath + ".part"
+        self.meta_path = self.part_path + ".meta"
+
+    # -----------------------------------------------------------------
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    # -----------------------------------------------------------------
+
+    def make_partial(self, data, etag=etag, last_modified=None):
+
+        with open(self.part_path, "wb") as part_file: part_file.write(data)
+        with open(self.meta_path, "w") as meta_file: json.dump({"url": url, "etag": etag, "last_modified": last_modified}, meta_file)
+
+    # -----------------------------------------------------------------
+
+    def check_complete(self):
+
+        with open(self.filepath, "rb") as f: self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(self.path), [os.path.basename(self.filepath)])
+
+    # -----------------------------------------------------------------
+
+    def test_complete_download(self):
+
+        session = FakeSession(make_response(200, content, {"ETag": etag}))
+        self.assertEqual(fetch_file(url, self.filepath, session=session), (10, 10))
+        self.check_complete()
+        self.assertNotIn("Range", session.requests[0])
+
+    # -----------------------------------------------------------------
+
+    def test_resume(self):
+
+        self.make_partial(content[:4])
+        session = FakeSession(make_response(206, content[4:], {"Content-Range": "bytes 4-9/10"}))
+        self.assertEqual(fetch_file(url, self.filepath, session=session), (6, 6))
+        self.check_complete()
+
+        # Only the remaining bytes, without compression, and only if the file did not change
+        headers = session.requests[0]
+        self.assertEqual(headers["Range"], "bytes=4-")
+        self.assertEqual(headers["If-Range"], etag)
+        self.assertEqual(headers["Accept-Encoding"], "identity")
+
+    # -----------------------------------------------------------------
+
+    def test_resume_with_last_modified(self):
+
+        self.make_partial(content[:4], etag=None, last_modified="Mon, 01 Jun 2020 10:00:00 GMT")
+        session = FakeSession(make_response(206, content[4:], {"Content-Range": "bytes 4-9/10"}))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+        self.assertEqual(session.requests[0]["If-Range"], "Mon, 01 Jun 2020 10:00:00 GMT")
+
+    # -----------------------------------------------------------------
+
+    def test_changed(self):
+
+        # If-Range did not match: the server sends the complete (new) file, which replaces the partial file
+        self.make_partial(b"xxxx")
+        session = FakeSession(make_response(200, content, {"ETag": '"v2"'}))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+
+    # -----------------------------------------------------------------
+
+    def test_already_complete(self):
+
+        # 416 for a range starting at the end of the file: the partial file is the complete file
+        self.make_partial(content)
+        session = FakeSession(make_response(416, headers={"Content-Range": "bytes */10"}))
+        self.assertEqual(fetch_file(url, self.filepath, session=session), (0, 0))
+        self.check_complete()
+        self.assertEqual(len(session.requests), 1)
+
+    # -----------------------------------------------------------------
+
+    def test_not_satisfiable(self):
+
+        # 416 for a partial file that is larger than the remote file: start over
+        self.make_partial(content + b"stale")
+        session = FakeSession(make_response(416, headers={"Content-Range": "bytes */10"}), make_response(200, content, {"ETag": etag}))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+        self.assertNotIn("Range", session.requests[1])
+
+    # -----------------------------------------------------------------
+
+    def test_wrong_range(self):
+
+        # The server sent another range than the one that was asked for: start over
+        self.make_partial(content[:4])
+        session = FakeSession(make_response(206, content[2:], {"Content-Range": "bytes 2-9/10"}), make_response(200, content, {"ETag": etag}))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+        self.assertEqual(len(session.requests), 2)
+
+    # -----------------------------------------------------------------
+
+    def test_without_validator(self):
+
+        # Without a validator, a change of the remote file can not be detected: no resume
+        self.make_partial(content[:4], etag=None, last_modified=None)
+        session = FakeSession(make_response(200, content))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+        self.assertNotIn("Range", session.requests[0])
+
+    # -----------------------------------------------------------------
+
+    def test_weak_etag(self):
+
+        # A weak ETag can not be used with If-Range: the download can not be resumed
+        session = FakeSession(make_response(200, content[:6], {"ETag": 'W/"v1"', "Content-Length": "10"}))
+        self.assertRaises(IncompleteDownload, fetch_file, url, self.filepath, session=session)
+        session = FakeSession(make_response(200, content))
+        fetch_file(url, self.filepath, session=session)
+        self.assertNotIn("Range", session.requests[0])
+
+    # -----------------------------------------------------------------
+
+    def test_interrupted(self):
+
+        # The connection dropped after 6 bytes: the partial file is kept, and the next attempt resumes
+        session = FakeSession(make_response(200, content[:6], {"ETag": etag, "Content-Length": "10"}))
+        self.assertRaises(IncompleteDownload, fetch_file, url, self.filepath, session=session)
+        self.assertFalse(os.path.exists(self.filepath))
+        self.assertEqual(os.path.getsize(self.part_path), 6)
+
+        session = FakeSession(make_response(206, content[6:], {"Content-Range": "bytes 6-9/10"}))
+        fetch_file(url, self.filepath, session=session)
+        self.check_complete()
+        self.assertEqual(session.requests[0]["Range"], "bytes=6-")
+
+    # -----------------------------------------------------------------
+
+    def test_no_resume(self):
+
+        self.make_partial(content[:4])
+        session = FakeSession(make_response(200, content, {"ETag": etag}))
+        fetch_file(url, self.filepath, session=session, resume=False)
+        self.check_complete()
+        self.assertNotIn("Range", session.requests[0])
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------
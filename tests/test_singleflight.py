@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# **********************************
+# **       DUSTPEDIA API          **
+# **********************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import time
+import threading
+import unittest
+
+# Import DustPedia modules
+from core.utils import SingleFlight
+
+# -----------------------------------------------------------------
+
+class SingleFlightTest(unittest.TestCase):
+
+    """
+    This class tests the coalescing of concurrent identical calls
+    """
+
+    def setUp(self):
+
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    # -----------------------------------------------------------------
+
+    def function(self, value):
+
+        self.calls.append(value)
+        self.release.wait(10)
+        if isinstance(value, Exception): raise value
+        return value * 2
+
+    # -----------------------------------------------------------------
+
+    def run_callers(self, key, value, ncallers):
+
+        """
+        This function calls the function from several threads at once, and returns the result or error of each
+        """
+
+        outcomes = [None] * ncallers
+
+        def call(index):
+            try: outcomes[index] = self.flight.do(key, self.function, value)
+            except Exception as e: outcomes[index] = e
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(ncallers)]
+        for thread in threads: thread.start()
+
+        # Let the leader finish once all others are waiting for it
+        deadline = time.time() + 10
+        while self.flight.shared < ncallers - 1 and time.time() < deadline: time.sleep(0.01)
+        self.release.set()
+
+        for thread in threads: thread.join(10)
+        return outcomes
+
+    # -----------------------------------------------------------------
+
+    def test_shared_result(self):
+
+        outcomes = self.run_callers("NGC3031", 21, 8)
+        self.assertEqual(outcomes, [42] * 8)
+        self.assertEqual(self.calls, [21])
+        self.assertEqual((self.flight.executed, self.flight.shared), (1, 7))
+
+    # -----------------------------------------------------------------
+
+    def test_shared_exception(self):
+
+        error = ValueError("page not found")
+        outcomes = self.run_callers("NGC3031", error, 4)
+        self.assertEqual(len(self.calls), 1)
+        for outcome in outcomes: self.assertIs(outcome, error)
+
+    # -----------------------------------------------------------------
+
+    def test_sequential_calls(self):
+
+        # A call that is no longer in flight is executed again (results are not cached)
+        self.release.set()
+        self.assertEqual(self.flight.do("NGC3031", self.function, 1), 2)
+        self.assertEqual(self.flight.do("NGC3031", self.function, 2), 4)
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual((self.flight.executed, self.flight.shared), (2, 0))
+
+    # -----------------------------------------------------------------
+
+    def test_sequential_after_exception(self):
+
+        self.release.set()
+        self.assertRaises(ValueError, self.flight.do, "NGC3031", self.function, ValueError())
+        self.assertEqual(self.flight.do("NGC3031", self.function, 3), 6)
+
+    # -----------------------------------------------------------------
+
+    def test_different_keys(self):
+
+        self.release.set()
+        results = []
+        threads = [threading.Thread(target=lambda key=key: results.append(self.flight.do(key, self.function, 1))) for key in ["a", "b", "c"]]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join(10)
+        self.assertEqual(results, [2, 2, 2])
+        self.assertEqual((self.flight.executed, self.flight.shared), (3, 0))
+
+# -----------------------------------------------------------------
+
+if __name__ == "__main__": unittest.main()
+
+# -----------------------------------------------------------------